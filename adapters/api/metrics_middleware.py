@@ -0,0 +1,47 @@
+import logging
+import time
+
+from infrastructure.metrics.metrics import EMF_ENABLED, REQUEST_DURATION, emit_emf, start_request
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede a duração total de cada requisição (por rota e status) e abre o
+    contexto onde as etapas do pipeline (`span`) são acumuladas; na Lambda, emite a linha EMF
+    da requisição ao final.
+    """
+
+    def __init__(self, app, emf_enabled: bool = EMF_ENABLED, excluded_paths=("/metrics",)):
+        self.app = app
+        self.emf_enabled = emf_enabled
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        request_metrics = start_request()
+        started = time.perf_counter()
+        status = 500
+
+        async def measured_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, measured_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            # O template da rota (ex.: /videos/{video_id}) evita uma série por id
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.observe(elapsed, method=scope["method"], route=route, status=status)
+            if self.emf_enabled:
+                try:
+                    emit_emf(request_metrics, route, scope["method"], status, elapsed)
+                except Exception as e:
+                    logger.error(f"Erro ao emitir métricas EMF: {str(e)}")
@@ -0,0 +1,76 @@
+import logging
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from application.services.rate_limiter import RateLimitExceeded, UserRateLimiter, get_rate_limiter
+from application.services.token_service import TokenService
+
+logger = logging.getLogger(__name__)
+
+# Só os métodos que enviam dados consomem o limite: GET/HEAD (status de jobs, offset da sessão
+# retomável) e DELETE passam livres, para que o acompanhamento de um upload não gere 429
+RATE_LIMITED_METHODS = frozenset({"POST", "PATCH"})
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI que aplica os limites por usuário (UserRateLimiter) às requisições que enviam
+    dados (POST/PATCH) nas rotas de upload antes de qualquer leitura do corpo: o usuário vem do token (validação em cache) e os bytes do
+    Content-Length. Sem Content-Length (ex.: corpo chunked), os bytes são descontados à medida que
+    chegam. Requisições sem token válido seguem para a rota, que responde o erro de autenticação.
+    """
+
+    def __init__(self, app, limiter: UserRateLimiter | None = None, path_prefix: str = "/upload"):
+        self.app = app
+        self.limiter = limiter or get_rate_limiter()
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http" or not self.limiter.enabled or scope["method"] not in RATE_LIMITED_METHODS
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        user_id = await self._user_id(headers.get("authorization", ""))
+        if user_id is not None:
+            content_length = headers.get("content-length", "")
+            try:
+                self.limiter.acquire(user_id, int(content_length) if content_length.isdigit() else 0)
+            except RateLimitExceeded as e:
+                logger.warning(f"Limite de requisições excedido pelo usuário {user_id}.")
+                response = JSONResponse(
+                    {"detail": "Limite de requisições excedido, tente novamente mais tarde"}, status_code=429,
+                    headers={"Retry-After": str(e.retry_after), "Connection": "close"}
+                )
+                await response(scope, receive, send)
+                return
+            if not content_length.isdigit():
+                receive = self._charging_receive(receive, user_id)
+
+        await self.app(scope, receive, send)
+
+    def _charging_receive(self, receive, user_id: str):
+        async def charging_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                self.limiter.charge_bytes(user_id, len(message.get("body", b"")))
+            return message
+        return charging_receive
+
+    @staticmethod
+    async def _user_id(authorization: str) -> str | None:
+        if not authorization.startswith("Bearer "):
+            return None
+        try:
+            result = await TokenService.extract_user_email_and_user_id_async(authorization.split("Bearer ")[1])
+        except HTTPException:
+            return None
+        # Sem user_id no token, o email identifica o usuário
+        if isinstance(result, tuple):
+            return result[1] or result[0]
+        return result or None
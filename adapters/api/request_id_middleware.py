@@ -0,0 +1,50 @@
+import re
+import uuid
+
+from infrastructure.logging.logging_config import bind_request_id, reset_request_id
+
+REQUEST_ID_HEADER = "x-request-id"
+# Ids recebidos do cliente só são aceitos se forem curtos e sem caracteres de controle
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def resolve_request_id(scope) -> str:
+    """Id informado pelo cliente (X-Request-Id), o da invocação da Lambda ou um novo uuid."""
+    for name, value in scope.get("headers", ()):
+        if name == REQUEST_ID_HEADER.encode():
+            request_id = value.decode("latin-1")
+            if _VALID_REQUEST_ID.match(request_id):
+                return request_id
+            break
+    aws_context = scope.get("aws.context")
+    if aws_context is not None and getattr(aws_context, "aws_request_id", None):
+        return aws_context.aws_request_id
+    return uuid.uuid4().hex
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI que associa um id a cada requisição: todos os logs emitidos durante ela o
+    incluem, e a resposta o devolve no header X-Request-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = resolve_request_id(scope)
+        token = bind_request_id(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            reset_request_id(token)
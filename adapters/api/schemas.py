@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+
+# Nomes de arquivo não podem conter separadores de caminho (compõem a chave no S3)
+FILE_NAME_PATTERN = r"^[^/\\]+$"
+
+
+class PresignedUploadRequest(BaseModel):
+    file_name: str = Field(min_length=1, max_length=255, pattern=FILE_NAME_PATTERN)
+    content_type: str
+    file_size: int = Field(gt=0)
+
+
+class UploadedPart(BaseModel):
+    part_number: int = Field(ge=1, le=10000)
+    etag: str = Field(min_length=1)
+
+
+class PresignedUploadCompleteRequest(BaseModel):
+    file_name: str = Field(min_length=1, max_length=255, pattern=FILE_NAME_PATTERN)
+    upload_id: str | None = None
+    parts: list[UploadedPart] = []
+
+
+class ResumableUploadRequest(BaseModel):
+    file_name: str = Field(min_length=1, max_length=255, pattern=FILE_NAME_PATTERN)
+    content_type: str
+    file_size: int = Field(gt=0)
@@ -0,0 +1,255 @@
+import base64
+import hashlib
+import logging
+import time
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from application.services.video_validation import (
+    MAX_VIDEO_SIZE, MAX_FILES_PER_REQUEST, ALLOWED_CONTENT_TYPES, SNIFF_BYTES, matches_content_type
+)
+from infrastructure.metrics.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+# Folga para os cabeçalhos e delimitadores do multipart
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _MultipartInspector:
+    """
+    Acompanha o corpo multipart à medida que chega, sem armazená-lo: conta os bytes de cada
+    arquivo, confere os bytes iniciais contra o content type declarado e calcula, no mesmo passo,
+    o SHA-256 de cada arquivo e de cada trecho de `checksum_part_size` bytes (as partes do upload
+    multipart ao S3), disponíveis em `files` ao fim do corpo.
+
+    Enquanto o arquivo não passa de uma parte, um único hash serve aos dois: o do arquivo é
+    copiado do hash da primeira parte quando ela se completa, e só o restante é calculado duas vezes.
+    """
+
+    def __init__(self, boundary: bytes, max_part_size: int, allowed_types: list[str],
+                 checksum_part_size: int | None = None):
+        self.max_part_size = max_part_size
+        self.allowed_types = allowed_types
+        self.checksum_part_size = checksum_part_size
+        self.error = None
+        self.files = []
+        self._disabled = False
+        self._reset_part()
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._reset_part,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    @classmethod
+    def for_content_type(cls, content_type: str | None, max_part_size: int, allowed_types: list[str],
+                         checksum_part_size: int | None = None):
+        if not content_type:
+            return None
+        media_type, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            return None
+        return cls(boundary, max_part_size, allowed_types, checksum_part_size)
+
+    def feed(self, data: bytes):
+        if self._disabled or self.error or not data:
+            return
+        try:
+            self._parser.write(data)
+        except Exception as e:
+            # Corpo malformado: o parser da aplicação devolve o erro adequado
+            logger.warning(f"Corpo multipart não inspecionado: {e}")
+            self._disabled = True
+        if self.error:
+            raise self.error
+
+    def _reset_part(self):
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._file_name = None
+        self._content_type = None
+        self._size = 0
+        self._head = bytearray()
+        self._checked = False
+        self._sha256 = None
+        self._part_sha256 = None
+        self._part_filled = 0
+        self._part_checksums = []
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        file_name = params.get(b"filename")
+        if not file_name:
+            return
+        self._file_name = file_name.decode(errors="replace")
+        self._content_type = self._headers.get(b"content-type", b"").decode(errors="replace")
+        self._part_sha256 = hashlib.sha256()
+        if self._content_type not in self.allowed_types:
+            self._reject(415, f"Tipo de mídia inválido: {self._content_type}")
+
+    def _on_part_data(self, data, start, end):
+        if self._file_name is None or self.error:
+            return
+        self._size += end - start
+        if self._size > self.max_part_size:
+            self._reject(413, f"Tamanho do vídeo {self._file_name} excede o máximo permitido de "
+                              f"{self.max_part_size // (1024 * 1024)}MB")
+            return
+        self._hash(memoryview(data)[start:end])
+        if not self._checked:
+            self._head += data[start:min(end, start + SNIFF_BYTES - len(self._head))]
+            if len(self._head) >= SNIFF_BYTES:
+                self._check_signature()
+
+    def _on_part_end(self):
+        if self._file_name is not None and not self._checked and not self.error:
+            self._check_signature()
+        if self._file_name is not None and not self.error:
+            if self._sha256 is None:
+                # Arquivo de até uma parte: o hash da parte é o do arquivo
+                self._sha256 = self._part_sha256.copy()
+            if self._part_filled:
+                self._part_checksums.append(base64.b64encode(self._part_sha256.digest()).decode())
+            self.files.append({
+                "file_name": self._file_name,
+                "sha256": self._sha256.hexdigest(),
+                "part_sha256": self._part_checksums if self.checksum_part_size else None
+            })
+
+    def _hash(self, view: memoryview):
+        if self._sha256 is not None:
+            self._sha256.update(view)
+        if not self.checksum_part_size:
+            if self._sha256 is None:
+                self._part_sha256.update(view)
+            return
+        while view:
+            take = min(len(view), self.checksum_part_size - self._part_filled)
+            self._part_sha256.update(view[:take])
+            self._part_filled += take
+            if self._part_filled == self.checksum_part_size:
+                if self._sha256 is None:
+                    self._sha256 = self._part_sha256.copy()
+                    self._sha256.update(view[take:])
+                self._part_checksums.append(base64.b64encode(self._part_sha256.digest()).decode())
+                self._part_sha256 = hashlib.sha256()
+                self._part_filled = 0
+            view = view[take:]
+
+    def _check_signature(self):
+        self._checked = True
+        if not matches_content_type(self._content_type, bytes(self._head)):
+            self._reject(415, f"Conteúdo do arquivo {self._file_name} não corresponde a {self._content_type}")
+
+    def _reject(self, status_code, detail):
+        if self.error is None:
+            self.error = UploadRejected(status_code, detail)
+
+
+class UploadGuardMiddleware:
+    """
+    Middleware ASGI que recusa uploads inválidos enquanto o corpo ainda está chegando:
+    Content-Length acima do limite é recusado antes de qualquer leitura; arquivos acima do
+    limite ou cujo conteúdo não corresponde ao tipo declarado são recusados no primeiro bloco
+    que viola a regra, sem receber o restante do payload. Os checksums calculados durante o
+    recebimento ficam em `request.state.upload_checksums`; com `checksum_part_size` (o tamanho
+    de parte do S3), incluem o SHA-256 de cada parte do upload multipart.
+    """
+
+    def __init__(self, app, paths=("/upload",), max_part_size: int = MAX_VIDEO_SIZE,
+                 max_files: int = MAX_FILES_PER_REQUEST, allowed_types: list[str] = None,
+                 checksum_part_size: int | None = None):
+        self.app = app
+        self.paths = set(paths)
+        self.max_part_size = max_part_size
+        self.checksum_part_size = checksum_part_size
+        self.max_request_size = max_files * max_part_size + MULTIPART_OVERHEAD_BYTES
+        self.allowed_types = allowed_types or ALLOWED_CONTENT_TYPES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_request_size:
+            logger.warning(f"Upload recusado pelo Content-Length: {content_length} bytes.")
+            await self._reject(scope, receive, send, UploadRejected(413, "Requisição excede o tamanho máximo permitido"))
+            return
+
+        inspector = _MultipartInspector.for_content_type(
+            headers.get("content-type"), self.max_part_size, self.allowed_types, self.checksum_part_size
+        )
+        if inspector is not None:
+            # Mesma lista, preenchida conforme cada arquivo termina de chegar
+            scope.setdefault("state", {})["upload_checksums"] = inspector.files
+        received = 0
+        rejected = False
+        body_started = None
+
+        async def guarded_receive():
+            nonlocal received, rejected, body_started
+            if rejected:
+                return {"type": "http.disconnect"}
+
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+
+            body = message.get("body", b"")
+            received += len(body)
+            if body_started is None:
+                body_started = time.perf_counter()
+            if not message.get("more_body", False):
+                record_stage("body_read", time.perf_counter() - body_started, nbytes=received)
+            try:
+                if received > self.max_request_size:
+                    raise UploadRejected(413, "Requisição excede o tamanho máximo permitido")
+                if inspector is not None:
+                    inspector.feed(body)
+            except UploadRejected as e:
+                logger.warning(f"Upload recusado durante o recebimento ({received} bytes lidos): {e.detail}")
+                rejected = True
+                await self._reject(scope, receive, send, e)
+                # A aplicação vê uma desconexão e interrompe o parsing; sua resposta é descartada
+                return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, guarded_receive, guarded_send)
+
+    @staticmethod
+    async def _reject(scope, receive, send, error: UploadRejected):
+        response = JSONResponse({"detail": error.detail}, status_code=error.status_code, headers={"Connection": "close"})
+        await response(scope, receive, send)
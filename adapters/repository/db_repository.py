@@ -1,24 +1,89 @@
 import asyncio
 import os
+import random
+import threading
+import time
 
 import boto3
-import uuid
 import logging
+from decimal import Decimal
+from functools import partial
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 
+from infrastructure.aws.credentials_provider import get_credentials_provider
+from infrastructure.aws.resilience import botocore_config, hedged
+from infrastructure.metrics.metrics import span
+
 logger = logging.getLogger(__name__)
 
+# Tabelas já verificadas/criadas neste processo
+_verified_tables = set()
+_verified_tables_lock = threading.Lock()
+
+# Limite de itens por chamada do BatchWriteItem
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_WRITE_BASE_BACKOFF_SECONDS = 0.05
+BATCH_WRITE_MAX_BACKOFF_SECONDS = 1.0
+DEFAULT_BATCH_MAX_ATTEMPTS = 5
+
+# Valores de STATUS_PROCESSAMENTO gravados por este serviço
+STATUS_AGUARDANDO_UPLOAD = "AGUARDANDO_UPLOAD"
+STATUS_PENDENTE_PROCESSAMENTO = "PENDENTE_PROCESSAMENTO"
+STATUS_ERRO_UPLOAD = "ERRO_UPLOAD"
+
+# BLOB_STATUS dos itens do armazenamento por conteúdo (BLOB#<sha256>)
+BLOB_STATUS_ENVIANDO = "ENVIANDO"
+BLOB_STATUS_DISPONIVEL = "DISPONIVEL"
+# Blob sem referências cujo objeto está sendo apagado do S3; novos envios do conteúdo aguardam
+BLOB_STATUS_REMOVENDO = "REMOVENDO"
+# Prazo para concluir a remoção de um blob (objeto no S3 e item): se o processo cair no meio, o
+# conteúdo volta a ser aceito depois dele e o TTL apaga o item
+DEFAULT_BLOB_REMOVAL_TTL_SECONDS = 900
+
+# Índice secundário global para listar os vídeos de um usuário (mais recentes primeiro). Só os
+# registros de vídeo têm ID_USUARIO, então reservas e sessões de upload não entram no índice.
+USER_VIDEOS_INDEX = "IDX_USUARIO_CRIADO_EM"
+USER_VIDEOS_INDEX_ATTRIBUTES = ["NOME_VIDEO", "STATUS_PROCESSAMENTO", "URL_DOWNLOAD"]
+# Espera pelo índice recém-criado ficar ACTIVE (o DynamoDB indexa os itens existentes antes disso)
+DEFAULT_INDEX_WAIT_TIMEOUT_SECONDS = 900
+INDEX_WAIT_POLL_SECONDS = 5
+# CRIADO_EM dos registros gravados antes do índice: entram na listagem como os mais antigos
+LEGACY_CREATED_AT = "1970-01-01T00:00:00.000000Z"
+# Item com o progresso do preenchimento de CRIADO_EM (sem ID_USUARIO: fora do índice e do backfill)
+BACKFILL_CREATED_AT_ID = "BACKFILL#CRIADO_EM"
+# Atributo (epoch em segundos) do TTL da tabela: reservas, sessões e contadores de limite expiram por ele
+TTL_ATTRIBUTE = "EXPIRA_EM"
+
+
+def _from_dynamo(value):
+    """Converte os Decimal devolvidos pelo boto3 em int/float."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {key: _from_dynamo(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_from_dynamo(item) for item in value]
+    return value
+
 
 class DBRepository:
-    def __init__(self, table_name: str):
+    def __init__(self, table_name: str, client_registry=None, credentials_provider=None):
         env = os.getenv("ENV", "prod").lower()
         self.table_name = table_name
         self.env = env
+        self.batch_max_attempts = int(os.getenv("DYNAMODB_BATCH_MAX_ATTEMPTS", DEFAULT_BATCH_MAX_ATTEMPTS))
+        # Gravações idempotentes ganham uma segunda cópia após este tempo (0 desativa o hedge)
+        self.hedge_after = float(os.getenv("DYNAMODB_HEDGE_AFTER_SECONDS", 0))
+        self.blob_removal_ttl = int(os.getenv("BLOB_REMOVAL_TTL_SECONDS", DEFAULT_BLOB_REMOVAL_TTL_SECONDS))
+        # Sem registry, cada repositório cria o seu próprio resource
+        create_resource = client_registry.get_dynamodb_resource if client_registry else partial(
+            boto3.resource, 'dynamodb', config=botocore_config("dynamodb")
+        )
 
         if env == "dev":
             logger.info("Inicializando DBRepository em modo DEV (LocalStack)")
-            self.dynamodb = boto3.resource(
-                'dynamodb',
+            self.dynamodb = create_resource(
                 endpoint_url="http://localhost:4566",  # LocalStack padrão
                 region_name="us-east-1",
                 aws_access_key_id="test",
@@ -26,47 +91,669 @@ class DBRepository:
             )
         else:
             logger.info("Inicializando DBRepository em modo PROD (AWS)")
-            self.dynamodb = boto3.resource('dynamodb', region_name=os.getenv("REGION_NAME"))
+            # Mesmas credenciais (Secrets Manager) do S3, passadas explicitamente ao resource
+            credentials = (credentials_provider or get_credentials_provider()).get_credentials_sync()
+            self.dynamodb = create_resource(
+                region_name=os.getenv("REGION_NAME"),
+                aws_access_key_id=credentials.access_key_id,
+                aws_secret_access_key=credentials.secret_access_key
+            )
 
             # Buscar e exibir o endpoint URL apenas em produção
             logger.info(f"Endpoint URL do DynamoDB (AWS): {self.dynamodb.meta.client.meta.endpoint_url}")
 
-        self._ensure_table_exists()
         self.table = self.dynamodb.Table(self.table_name)
 
-    def _ensure_table_exists(self):
-        try:
-            existing_tables = self.dynamodb.meta.client.list_tables()["TableNames"]
-            if self.table_name not in existing_tables:
-                logger.warning(f"Tabela {self.table_name} não existe. Criando...")
-                self.dynamodb.create_table(
-                    TableName=self.table_name,
-                    KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-                    AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
-                    BillingMode='PAY_PER_REQUEST'
-                ).wait_until_exists()
-                logger.info(f"Tabela {self.table_name} criada com sucesso.")
-            else:
+    def ensure_table_exists(self):
+        """
+        Garante que a tabela existe (criando-a se necessário). Deve ser chamado uma vez no
+        bootstrap (lifespan ou CLI), nunca no caminho das requisições; tabelas já verificadas
+        neste processo não geram novas chamadas ao DynamoDB. Numa tabela existente, o índice de
+        vídeos por usuário só é verificado: criá-lo e preencher os registros antigos pode levar
+        minutos e é feito pelo `bootstrap.py` (`provision_user_videos_index`).
+        """
+        if self.table_name in _verified_tables:
+            return
+
+        with _verified_tables_lock:
+            if self.table_name in _verified_tables:
+                return
+            try:
+                description = self.dynamodb.meta.client.describe_table(TableName=self.table_name)
                 logger.info(f"Tabela {self.table_name} já existe.")
+                self._check_user_videos_index(description["Table"])
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "ResourceNotFoundException":
+                    logger.error(f"Erro ao verificar/criar tabela: {e}")
+                    raise
+                self._create_table()
+            except Exception as e:
+                logger.error(f"Erro ao verificar/criar tabela: {e}")
+                raise
+            self._ensure_time_to_live()
+            _verified_tables.add(self.table_name)
+
+    @staticmethod
+    def _user_videos_index_definition():
+        return {
+            "IndexName": USER_VIDEOS_INDEX,
+            "KeySchema": [
+                {"AttributeName": "ID_USUARIO", "KeyType": "HASH"},
+                {"AttributeName": "CRIADO_EM", "KeyType": "RANGE"}
+            ],
+            "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": USER_VIDEOS_INDEX_ATTRIBUTES}
+        }
+
+    @staticmethod
+    def _user_videos_index_attributes():
+        return [
+            {"AttributeName": "ID_USUARIO", "AttributeType": "S"},
+            {"AttributeName": "CRIADO_EM", "AttributeType": "S"}
+        ]
+
+    @staticmethod
+    def _user_videos_index_status(table_description):
+        indexes = table_description.get("GlobalSecondaryIndexes") or []
+        return next((
+            index.get("IndexStatus", "ACTIVE") for index in indexes if index["IndexName"] == USER_VIDEOS_INDEX
+        ), None)
+
+    def _check_user_videos_index(self, table_description):
+        """Só avisa (sem bloquear o startup) quando o índice de listagem falta ou ainda não está ACTIVE."""
+        status = self._user_videos_index_status(table_description)
+        if status is None:
+            logger.warning(f"Índice {USER_VIDEOS_INDEX} não existe na tabela {self.table_name}: a listagem "
+                           f"de vídeos falhará até executar `python bootstrap.py --table {self.table_name}`.")
+        elif status != "ACTIVE":
+            logger.warning(f"Índice {USER_VIDEOS_INDEX} da tabela {self.table_name} ainda não está ativo "
+                           f"(status: {status}).")
+
+    def provision_user_videos_index(self):
+        """
+        Adiciona o índice de vídeos por usuário a uma tabela criada antes dele e aguarda o índice
+        ficar ACTIVE. Bloqueia por até DYNAMODB_INDEX_WAIT_TIMEOUT_SECONDS: uso restrito ao
+        `bootstrap.py`, nunca ao startup da aplicação.
+        """
+        table = self.dynamodb.meta.client.describe_table(TableName=self.table_name)["Table"]
+        status = self._user_videos_index_status(table)
+        if status == "ACTIVE":
+            return
+        if status is None:
+            logger.warning(f"Índice {USER_VIDEOS_INDEX} não existe na tabela {self.table_name}. Criando...")
+            self.dynamodb.meta.client.update_table(
+                TableName=self.table_name,
+                AttributeDefinitions=self._user_videos_index_attributes(),
+                GlobalSecondaryIndexUpdates=[{"Create": self._user_videos_index_definition()}]
+            )
+        self._wait_for_user_videos_index()
+
+    def _wait_for_user_videos_index(self):
+        timeout = float(os.getenv("DYNAMODB_INDEX_WAIT_TIMEOUT_SECONDS", DEFAULT_INDEX_WAIT_TIMEOUT_SECONDS))
+        deadline = time.monotonic() + timeout
+        while True:
+            table = self.dynamodb.meta.client.describe_table(TableName=self.table_name)["Table"]
+            status = next((
+                index.get("IndexStatus") for index in table.get("GlobalSecondaryIndexes") or []
+                if index["IndexName"] == USER_VIDEOS_INDEX
+            ), None)
+            if status == "ACTIVE":
+                logger.info(f"Índice {USER_VIDEOS_INDEX} ativo na tabela {self.table_name}.")
+                return
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Índice {USER_VIDEOS_INDEX} não ficou ativo em {timeout:.0f}s (status: {status}).")
+            logger.info(f"Aguardando índice {USER_VIDEOS_INDEX} (status: {status})...")
+            time.sleep(INDEX_WAIT_POLL_SECONDS)
+
+    def backfill_created_at(self, restart: bool = False) -> int:
+        """
+        Grava CRIADO_EM (LEGACY_CREATED_AT) nos registros de vídeo que não o têm, para que entrem
+        no índice de listagem. Percorre a tabela inteira (uso restrito ao bootstrap) e guarda o
+        progresso no item BACKFILL_CREATED_AT_ID a cada página: uma execução interrompida continua
+        de onde parou e, depois de concluído, o backfill não é repetido (salvo com `restart`).
+        Independe do status do índice. Retorna o número de registros atualizados.
+        """
+        progress = {} if restart else self.table.get_item(Key={"id": BACKFILL_CREATED_AT_ID}).get("Item") or {}
+        if progress.get("CONCLUIDO"):
+            return 0
+        updated = 0
+        kwargs = {
+            "FilterExpression": Attr("ID_USUARIO").exists() & Attr("CRIADO_EM").not_exists(),
+            "ProjectionExpression": "id"
+        }
+        if progress.get("ULTIMA_CHAVE"):
+            logger.info(f"Retomando o preenchimento de CRIADO_EM na tabela {self.table_name}.")
+            kwargs["ExclusiveStartKey"] = progress["ULTIMA_CHAVE"]
+        while True:
+            response = self.table.scan(**kwargs)
+            for item in response.get("Items", []):
+                try:
+                    self.table.update_item(
+                        Key={"id": item["id"]},
+                        UpdateExpression="SET CRIADO_EM = :criado_em",
+                        ConditionExpression="attribute_not_exists(CRIADO_EM)",
+                        ExpressionAttributeValues={":criado_em": LEGACY_CREATED_AT}
+                    )
+                    updated += 1
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                        raise
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+            self.table.put_item(Item={"id": BACKFILL_CREATED_AT_ID, "ULTIMA_CHAVE": response["LastEvaluatedKey"]})
+        self.table.put_item(Item={"id": BACKFILL_CREATED_AT_ID, "CONCLUIDO": True})
+        if updated:
+            logger.info(f"CRIADO_EM preenchido em {updated} registros antigos da tabela {self.table_name}.")
+        return updated
+
+    def _ensure_time_to_live(self):
+        """Habilita o TTL da tabela em EXPIRA_EM; sem ele os itens que expiram nunca são removidos."""
+        client = self.dynamodb.meta.client
+        description = client.describe_time_to_live(TableName=self.table_name)["TimeToLiveDescription"]
+        status = description.get("TimeToLiveStatus")
+        if status in ("ENABLED", "ENABLING"):
+            if description.get("AttributeName") != TTL_ATTRIBUTE:
+                logger.warning(
+                    f"TTL da tabela {self.table_name} usa o atributo {description.get('AttributeName')}, "
+                    f"não {TTL_ATTRIBUTE}: os itens com {TTL_ATTRIBUTE} não expiram."
+                )
+            return
+        if status == "DISABLING":
+            # O DynamoDB recusa reabilitar o TTL enquanto a desativação não termina
+            logger.warning(f"TTL da tabela {self.table_name} sendo desativado; não foi reabilitado.")
+            return
+        client.update_time_to_live(
+            TableName=self.table_name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": TTL_ATTRIBUTE}
+        )
+        logger.info(f"TTL habilitado na tabela {self.table_name} (atributo {TTL_ATTRIBUTE}).")
+
+    def _create_table(self):
+        logger.warning(f"Tabela {self.table_name} não existe. Criando...")
+        try:
+            self.dynamodb.create_table(
+                TableName=self.table_name,
+                KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+                AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}, *self._user_videos_index_attributes()],
+                GlobalSecondaryIndexes=[self._user_videos_index_definition()],
+                BillingMode='PAY_PER_REQUEST'
+            ).wait_until_exists()
+            logger.info(f"Tabela {self.table_name} criada com sucesso.")
         except ClientError as e:
             logger.error(f"Erro ao verificar/criar tabela: {e}")
             raise
 
-    async def register_video(self, video):
+    async def register_video(self, video, status=STATUS_PENDENTE_PROCESSAMENTO):
         try:
-            item = {
-                "id": str(uuid.uuid4()),
-                "ID_USUARIO": video.user_id,
-                "EMAIL": video.user_email,
-                "STATUS_PROCESSAMENTO": "PENDENTE_PROCESSAMENTO",
-                "URL_DOWNLOAD": "",
-                "NOME_VIDEO": video.file_name,
-                "PATH_S3": video.path_s3
-            }
+            item = video.to_dynamo_item(status)
 
-            logger.info(f"Inserindo item no DynamoDB: {item}")
-            await asyncio.to_thread(self.table.put_item, Item=item)
+            logger.info("Registrando vídeo %s no DynamoDB.", video.video_id)
+            with span("dynamo_put"):
+                # put_item sem condição e com id fixo: repetir a gravação é seguro
+                await hedged(partial(self.table.put_item, Item=item), "put_item", self.hedge_after)
 
         except Exception as e:
             logger.error(f"Erro ao registrar vídeo no DynamoDB: {str(e)}")
             raise
+
+    async def update_video_status(self, video_id, status, path_s3=None):
+        """Atualiza o STATUS_PROCESSAMENTO (e, opcionalmente, o PATH_S3) de um vídeo já registrado."""
+        update_expression = "SET STATUS_PROCESSAMENTO = :status"
+        values = {":status": status}
+        if path_s3 is not None:
+            update_expression += ", PATH_S3 = :path"
+            values[":path"] = path_s3
+        try:
+            with span("dynamo_update"):
+                await hedged(partial(
+                    self.table.update_item,
+                    Key={"id": video_id},
+                    UpdateExpression=update_expression,
+                    ConditionExpression="attribute_exists(id)",
+                    ExpressionAttributeValues=values
+                ), "update_item", self.hedge_after)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar status do vídeo {video_id}: {str(e)}")
+            raise
+
+    @staticmethod
+    def _projection(attributes):
+        names = {f"#a{index}": attribute for index, attribute in enumerate(attributes)}
+        return ", ".join(names), names
+
+    async def get_video(self, video_id, attributes=None):
+        """
+        Retorna o registro do vídeo (apenas `attributes`, se informados), ou None se o id não
+        existir ou não for um vídeo.
+        """
+        kwargs = {"Key": {"id": video_id}}
+        if attributes:
+            kwargs["ProjectionExpression"], kwargs["ExpressionAttributeNames"] = self._projection(
+                ["id", "TIPO_ITEM", *attributes]
+            )
+        with span("dynamo_get"):
+            response = await asyncio.to_thread(self.table.get_item, **kwargs)
+        item = response.get("Item")
+        if item is None or "TIPO_ITEM" in item:
+            return None
+        return _from_dynamo(item)
+
+    async def list_user_videos(self, user_id, limit, start_key=None):
+        """
+        Lista os vídeos do usuário pelo índice USER_VIDEOS_INDEX, do mais recente para o mais
+        antigo. Retorna os itens da página e a chave para continuar (None na última página).
+        """
+        projection, names = self._projection(["id", "ID_USUARIO", "CRIADO_EM", *USER_VIDEOS_INDEX_ATTRIBUTES])
+        kwargs = {
+            "IndexName": USER_VIDEOS_INDEX,
+            "KeyConditionExpression": Key("ID_USUARIO").eq(user_id),
+            "ProjectionExpression": projection,
+            "ExpressionAttributeNames": names,
+            "ScanIndexForward": False,
+            "Limit": limit
+        }
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+        try:
+            with span("dynamo_query"):
+                response = await asyncio.to_thread(self.table.query, **kwargs)
+        except Exception as e:
+            logger.error(f"Erro ao listar vídeos do usuário {user_id}: {str(e)}")
+            raise
+        return _from_dynamo(response.get("Items", [])), response.get("LastEvaluatedKey")
+
+    @staticmethod
+    def _reservation_id(user_id, file_name):
+        return f"RESERVA#{user_id}#{file_name}"
+
+    async def reserve_video_name(self, user_id, file_name, expires_at=None, owner=None):
+        """
+        Reserva o nome do vídeo para o usuário com um put condicional: entre uploads
+        concorrentes do mesmo nome, apenas um consegue a reserva. Com `expires_at` (epoch), a
+        reserva ainda não concluída vale só até esse instante: depois dele o nome pode ser
+        reservado de novo (e o TTL do DynamoDB remove o item). `owner` (id da sessão de upload)
+        fica gravado na reserva para que só o dono a libere (ver release_video_name).
+        """
+        item = {"id": self._reservation_id(user_id, file_name), "TIPO_ITEM": "RESERVA_NOME"}
+        if owner is not None:
+            item["DONO_RESERVA"] = owner
+        condition = self._reservation_condition(item, expires_at)
+        try:
+            with span("dynamo_reserve"):
+                await asyncio.to_thread(self.table.put_item, Item=item, **condition)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                raise ValueError(f"O vídeo '{file_name}' já está carregado. Por favor, consultar o status do vídeo.")
+            logger.error(f"Erro ao reservar nome do vídeo no DynamoDB: {str(e)}")
+            raise
+
+    @staticmethod
+    def _reservation_condition(item, expires_at):
+        """Condição do put de uma reserva; com `expires_at`, grava EXPIRA_EM e aceita tomar reservas expiradas."""
+        if expires_at is None:
+            return {"ConditionExpression": "attribute_not_exists(id)"}
+        item["EXPIRA_EM"] = int(expires_at)
+        return {
+            "ConditionExpression": "attribute_not_exists(id) OR (attribute_not_exists(CONCLUIDO) AND EXPIRA_EM < :agora)",
+            "ExpressionAttributeValues": {":agora": int(time.time())}
+        }
+
+    async def release_video_name(self, user_id, file_name, owner=None):
+        """
+        Libera a reserva de um upload que falhou, permitindo um novo envio com o mesmo nome. Com
+        `owner`, o delete é condicional ao dono: uma reserva expirada já tomada por outra sessão
+        não é apagada por quem a perdeu.
+        """
+        condition = {}
+        if owner is not None:
+            condition = {
+                "ConditionExpression": "DONO_RESERVA = :dono",
+                "ExpressionAttributeValues": {":dono": owner}
+            }
+        try:
+            await asyncio.to_thread(
+                self.table.delete_item, Key={"id": self._reservation_id(user_id, file_name)}, **condition
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                logger.info(f"Reserva do vídeo '{file_name}' pertence a outra sessão; mantida.")
+                return
+            logger.error(f"Erro ao liberar reserva do vídeo '{file_name}': {str(e)}")
+        except Exception as e:
+            logger.error(f"Erro ao liberar reserva do vídeo '{file_name}': {str(e)}")
+
+    @staticmethod
+    def _content_reservation_id(user_id, checksum_sha256):
+        return f"CONTEUDO#{user_id}#{checksum_sha256}"
+
+    async def reserve_content(self, user_id, checksum_sha256, file_name, expires_at=None):
+        """
+        Reserva o conteúdo (SHA-256) para o usuário com um put condicional: o mesmo arquivo
+        enviado com outro nome é detectado sem novo envio ao S3. `expires_at` funciona como em
+        reserve_video_name.
+        """
+        item = {
+            "id": self._content_reservation_id(user_id, checksum_sha256),
+            "TIPO_ITEM": "RESERVA_CONTEUDO",
+            "NOME_VIDEO": file_name
+        }
+        condition = self._reservation_condition(item, expires_at)
+        try:
+            with span("dynamo_reserve"):
+                await asyncio.to_thread(self.table.put_item, Item=item, **condition)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                existing = await asyncio.to_thread(
+                    self.table.get_item, Key={"id": self._content_reservation_id(user_id, checksum_sha256)}
+                )
+                existing_name = existing.get("Item", {}).get("NOME_VIDEO", "")
+                raise ValueError(f"Conteúdo idêntico ao vídeo '{existing_name}' já carregado.")
+            logger.error(f"Erro ao reservar conteúdo do vídeo no DynamoDB: {str(e)}")
+            raise
+
+    async def release_content(self, user_id, checksum_sha256):
+        """Libera a reserva de conteúdo de um upload que falhou."""
+        try:
+            await asyncio.to_thread(
+                self.table.delete_item, Key={"id": self._content_reservation_id(user_id, checksum_sha256)}
+            )
+        except Exception as e:
+            logger.error(f"Erro ao liberar reserva de conteúdo {checksum_sha256}: {str(e)}")
+
+    @staticmethod
+    def _blob_id(checksum_sha256):
+        return f"BLOB#{checksum_sha256}"
+
+    async def acquire_blob(self, checksum_sha256, path_s3) -> bool:
+        """
+        Adiciona uma referência ao blob do conteúdo, criando-o (BLOB_STATUS=ENVIANDO) se ainda não
+        existir. Retorna True quando o objeto já está disponível no S3 e o envio pode ser pulado.
+        Falha (ValueError) enquanto o blob está sendo removido (ver release_blob).
+        """
+        key = {"id": self._blob_id(checksum_sha256)}
+        try:
+            with span("dynamo_blob"):
+                response = await asyncio.to_thread(
+                    self.table.update_item,
+                    Key=key,
+                    UpdateExpression=(
+                        "ADD REFERENCIAS :um "
+                        "SET TIPO_ITEM = :tipo, PATH_S3 = if_not_exists(PATH_S3, :path), "
+                        "BLOB_STATUS = if_not_exists(BLOB_STATUS, :enviando)"
+                    ),
+                    ConditionExpression="attribute_not_exists(BLOB_STATUS) OR BLOB_STATUS <> :removendo",
+                    ExpressionAttributeValues={
+                        ":um": 1, ":tipo": "BLOB", ":path": path_s3, ":enviando": BLOB_STATUS_ENVIANDO,
+                        ":removendo": BLOB_STATUS_REMOVENDO
+                    },
+                    ReturnValues="ALL_OLD"
+                )
+            return response.get("Attributes", {}).get("BLOB_STATUS") == BLOB_STATUS_DISPONIVEL
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                logger.error(f"Erro ao referenciar blob {checksum_sha256}: {str(e)}")
+                raise
+        except Exception as e:
+            logger.error(f"Erro ao referenciar blob {checksum_sha256}: {str(e)}")
+            raise
+
+        # Remoção interrompida (prazo vencido): o blob recomeça do zero com esta referência
+        try:
+            await asyncio.to_thread(
+                self.table.put_item,
+                Item={
+                    **key, "TIPO_ITEM": "BLOB", "PATH_S3": path_s3, "REFERENCIAS": 1,
+                    "BLOB_STATUS": BLOB_STATUS_ENVIANDO
+                },
+                ConditionExpression="BLOB_STATUS = :removendo AND EXPIRA_EM < :agora",
+                ExpressionAttributeValues={":removendo": BLOB_STATUS_REMOVENDO, ":agora": int(time.time())}
+            )
+            return False
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                raise ValueError(f"O conteúdo {checksum_sha256} está sendo removido; tente novamente.")
+            logger.error(f"Erro ao referenciar blob {checksum_sha256}: {str(e)}")
+            raise
+
+    async def mark_blob_available(self, checksum_sha256):
+        """Marca o blob como disponível após o envio ao S3; os próximos envios do conteúdo são pulados."""
+        try:
+            await hedged(partial(
+                self.table.update_item,
+                Key={"id": self._blob_id(checksum_sha256)},
+                UpdateExpression="SET BLOB_STATUS = :disponivel",
+                ExpressionAttributeValues={":disponivel": BLOB_STATUS_DISPONIVEL}
+            ), "update_item", self.hedge_after)
+        except Exception as e:
+            logger.error(f"Erro ao marcar blob {checksum_sha256} como disponível: {str(e)}")
+            raise
+
+    async def release_blob(self, checksum_sha256) -> str | None:
+        """
+        Remove a referência adquirida por acquire_blob. Se era a última, o blob passa a REMOVENDO
+        (condicional a REFERENCIAS = 0, sem disputar com um acquire_blob concorrente) e o PATH_S3
+        é retornado: quem chamou apaga o objeto no S3 e conclui com delete_blob.
+        """
+        key = {"id": self._blob_id(checksum_sha256)}
+        try:
+            response = await asyncio.to_thread(
+                self.table.update_item,
+                Key=key,
+                UpdateExpression="ADD REFERENCIAS :menos_um",
+                ConditionExpression="attribute_exists(id) AND REFERENCIAS > :zero",
+                ExpressionAttributeValues={":menos_um": -1, ":zero": 0},
+                ReturnValues="UPDATED_NEW"
+            )
+            if response.get("Attributes", {}).get("REFERENCIAS", 0) > 0:
+                return None
+        except Exception as e:
+            logger.error(f"Erro ao liberar referência do blob {checksum_sha256}: {str(e)}")
+            return None
+
+        try:
+            response = await asyncio.to_thread(
+                self.table.update_item,
+                Key=key,
+                UpdateExpression="SET BLOB_STATUS = :removendo, EXPIRA_EM = :expira",
+                ConditionExpression="REFERENCIAS = :zero",
+                ExpressionAttributeValues={
+                    ":removendo": BLOB_STATUS_REMOVENDO, ":expira": int(time.time()) + self.blob_removal_ttl,
+                    ":zero": 0
+                },
+                ReturnValues="ALL_NEW"
+            )
+            return response["Attributes"]["PATH_S3"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                return None  # referenciado de novo por outro envio: o blob continua
+            logger.error(f"Erro ao marcar blob {checksum_sha256} para remoção: {str(e)}")
+        except Exception as e:
+            logger.error(f"Erro ao marcar blob {checksum_sha256} para remoção: {str(e)}")
+        return None
+
+    async def delete_blob(self, checksum_sha256):
+        """Apaga o item do blob marcado como REMOVENDO por release_blob, depois que o objeto saiu do S3."""
+        try:
+            await asyncio.to_thread(
+                self.table.delete_item,
+                Key={"id": self._blob_id(checksum_sha256)},
+                ConditionExpression="BLOB_STATUS = :removendo AND REFERENCIAS = :zero",
+                ExpressionAttributeValues={":removendo": BLOB_STATUS_REMOVENDO, ":zero": 0}
+            )
+        except Exception as e:
+            logger.error(f"Erro ao apagar o blob {checksum_sha256}: {str(e)}")
+
+    async def complete_reservation(self, user_id, file_name):
+        """
+        Marca a reserva como concluída (sem expiração); falha se ela não existir ou já tiver sido
+        concluída.
+        """
+        try:
+            await self._complete(self._reservation_id(user_id, file_name))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                raise ValueError(f"Upload do vídeo '{file_name}' não iniciado ou já concluído.")
+            logger.error(f"Erro ao concluir reserva do vídeo no DynamoDB: {str(e)}")
+            raise
+
+    async def complete_content_reservation(self, user_id, checksum_sha256):
+        """Marca a reserva de conteúdo como concluída (sem expiração); falha como complete_reservation."""
+        try:
+            await self._complete(self._content_reservation_id(user_id, checksum_sha256))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                raise ValueError(f"Reserva do conteúdo {checksum_sha256} inexistente ou já concluída.")
+            logger.error(f"Erro ao concluir reserva de conteúdo no DynamoDB: {str(e)}")
+            raise
+
+    async def _complete(self, reservation_id):
+        await asyncio.to_thread(
+            self.table.update_item,
+            Key={"id": reservation_id},
+            UpdateExpression="SET CONCLUIDO = :concluido REMOVE EXPIRA_EM",
+            ConditionExpression="attribute_exists(id) AND attribute_not_exists(CONCLUIDO)",
+            ExpressionAttributeValues={":concluido": True}
+        )
+
+    async def reopen_reservation(self, user_id, file_name, expires_at=None):
+        """
+        Desfaz complete_reservation quando o registro do vídeo falha; com `expires_at`, a reserva
+        reaberta volta a expirar se o cliente não concluir de novo.
+        """
+        update = {"UpdateExpression": "REMOVE CONCLUIDO"}
+        if expires_at is not None:
+            update = {
+                "UpdateExpression": "SET EXPIRA_EM = :expira REMOVE CONCLUIDO",
+                "ExpressionAttributeValues": {":expira": int(expires_at)}
+            }
+        try:
+            await asyncio.to_thread(
+                self.table.update_item,
+                Key={"id": self._reservation_id(user_id, file_name)},
+                **update
+            )
+        except Exception as e:
+            logger.error(f"Erro ao reabrir reserva do vídeo '{file_name}': {str(e)}")
+
+    @staticmethod
+    def _rate_usage_id(user_id, window):
+        return f"LIMITE#{user_id}#{window}"
+
+    async def add_rate_usage(self, user_id, window, requests, nbytes, expires_at):
+        """
+        Soma requisições e bytes ao contador do usuário na janela `window` (compartilhado entre as
+        instâncias) e retorna os totais da janela. Contador com ADD: nunca repetido nem em hedge.
+        """
+        response = await asyncio.to_thread(
+            self.table.update_item,
+            Key={"id": self._rate_usage_id(user_id, window)},
+            UpdateExpression="ADD REQUISICOES :requisicoes, BYTES_ENVIADOS :bytes SET TIPO_ITEM = :tipo, EXPIRA_EM = :expira",
+            ExpressionAttributeValues={
+                ":requisicoes": requests, ":bytes": nbytes, ":tipo": "USO_LIMITE", ":expira": int(expires_at)
+            },
+            ReturnValues="UPDATED_NEW"
+        )
+        attributes = response.get("Attributes", {})
+        return int(attributes.get("REQUISICOES", 0)), int(attributes.get("BYTES_ENVIADOS", 0))
+
+    @staticmethod
+    def _session_id(session_id):
+        return f"SESSAO#{session_id}"
+
+    async def create_upload_session(self, session):
+        """Grava a sessão de upload retomável (o id não pode existir)."""
+        item = {"id": self._session_id(session["session_id"]), "TIPO_ITEM": "SESSAO_UPLOAD", **{
+            key: value for key, value in session.items() if key != "session_id"
+        }}
+        await asyncio.to_thread(self.table.put_item, Item=item, ConditionExpression="attribute_not_exists(id)")
+
+    async def get_upload_session(self, session_id):
+        response = await asyncio.to_thread(
+            self.table.get_item, Key={"id": self._session_id(session_id)}, ConsistentRead=True
+        )
+        item = response.get("Item")
+        if item is None or item.get("TIPO_ITEM") != "SESSAO_UPLOAD":
+            return None
+        return _from_dynamo({**item, "session_id": session_id})
+
+    async def append_upload_part(self, session_id, expected_offset, new_offset, part):
+        """
+        Registra uma parte enviada e avança o offset. A condição sobre o offset atual impede que
+        duas requisições concorrentes gravem a mesma posição.
+        """
+        try:
+            await asyncio.to_thread(
+                self.table.update_item,
+                Key={"id": self._session_id(session_id)},
+                UpdateExpression="SET OFFSET_ATUAL = :novo, PARTES = list_append(PARTES, :parte)",
+                ConditionExpression="OFFSET_ATUAL = :esperado AND STATUS_SESSAO = :aberta",
+                ExpressionAttributeValues={
+                    ":novo": new_offset,
+                    ":esperado": expected_offset,
+                    ":parte": [part],
+                    ":aberta": "ABERTA"
+                }
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                raise ValueError("Offset da sessão de upload foi alterado por outra requisição.")
+            raise
+
+    async def close_upload_session(self, session_id, status):
+        """Encerra a sessão (CONCLUIDA/CANCELADA); falha se ela já estiver encerrada."""
+        try:
+            await asyncio.to_thread(
+                self.table.update_item,
+                Key={"id": self._session_id(session_id)},
+                UpdateExpression="SET STATUS_SESSAO = :status",
+                ConditionExpression="STATUS_SESSAO = :aberta",
+                ExpressionAttributeValues={":status": status, ":aberta": "ABERTA"}
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                raise ValueError("Sessão de upload já encerrada.")
+            raise
+
+    async def register_videos(self, videos):
+        """
+        Registra vários vídeos com BatchWriteItem (até 25 itens por chamada), reenviando os
+        itens não processados. Retorna os vídeos que não puderam ser gravados.
+        """
+        try:
+            videos_by_id = {}
+            items = []
+            for video in videos:
+                item = video.to_dynamo_item(STATUS_PENDENTE_PROCESSAMENTO)
+                videos_by_id[item["id"]] = video
+                items.append(item)
+
+            logger.info(f"Inserindo {len(items)} itens no DynamoDB em lote.")
+            not_written = []
+            for start in range(0, len(items), BATCH_WRITE_MAX_ITEMS):
+                with span("dynamo_batch_write"):
+                    unprocessed = await asyncio.to_thread(self._batch_write, items[start:start + BATCH_WRITE_MAX_ITEMS])
+                not_written.extend(videos_by_id[item["id"]] for item in unprocessed)
+            return not_written
+
+        except Exception as e:
+            logger.error(f"Erro ao registrar vídeos no DynamoDB: {str(e)}")
+            raise
+
+    def _batch_write(self, items):
+        request_items = {self.table_name: [{"PutRequest": {"Item": item}} for item in items]}
+        for attempt in range(self.batch_max_attempts):
+            response = self.dynamodb.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems") or {}
+            if not request_items.get(self.table_name):
+                return []
+            # Backoff exponencial com jitter antes de reenviar os itens não processados
+            delay = min(BATCH_WRITE_MAX_BACKOFF_SECONDS, BATCH_WRITE_BASE_BACKOFF_SECONDS * (2 ** attempt))
+            logger.warning(
+                f"{len(request_items[self.table_name])} itens não processados pelo DynamoDB; "
+                f"nova tentativa em {delay:.2f}s."
+            )
+            time.sleep(random.uniform(0, delay))
+
+        unprocessed = [request["PutRequest"]["Item"] for request in request_items[self.table_name]]
+        logger.error(f"{len(unprocessed)} itens não gravados após {self.batch_max_attempts} tentativas.")
+        return unprocessed
@@ -1,73 +1,413 @@
-import json
+import asyncio
+import base64
+import hashlib
 import logging
 import os
 import uuid
+from contextlib import asynccontextmanager
+from functools import lru_cache
 
-import aioboto3
-import boto3
-from dotenv import load_dotenv
+from botocore.exceptions import ClientError
 
+from infrastructure.aws.credentials_provider import get_credentials_provider
+from infrastructure.aws.resilience import botocore_config, call_with_retry
+from infrastructure.io.buffers import MemoryViewReader, map_stream
 from infrastructure.logging.logging_config import setup_logging
+from infrastructure.metrics.metrics import span
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# O S3 exige partes de no mínimo 5MB (exceto a última) em uploads multipart
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_MULTIPART_CONCURRENCY = 4
+# Tentativas por parte (além dos retries do botocore); uma parte que falha não reinicia o arquivo
+DEFAULT_PART_MAX_ATTEMPTS = 3
+DEFAULT_PRESIGNED_URL_EXPIRES_SECONDS = 3600
+
+
+def multipart_part_size() -> int:
+    """Tamanho das partes dos uploads multipart (S3_MULTIPART_PART_SIZE, no mínimo MIN_PART_SIZE)."""
+    return max(int(os.getenv("S3_MULTIPART_PART_SIZE", DEFAULT_PART_SIZE)), MIN_PART_SIZE)
+
+
+def sha256_base64(data) -> str:
+    """Checksum no formato esperado pelo S3 (ChecksumSHA256): SHA-256 em base64."""
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def hex_to_base64(hex_digest: str) -> str:
+    return base64.b64encode(bytes.fromhex(hex_digest)).decode()
+
+
+def _request_body(body):
+    """O botocore não aceita memoryview como Body: a view segue como file-like (novo a cada tentativa)."""
+    return MemoryViewReader(body) if isinstance(body, memoryview) else body
+
+
+@lru_cache(maxsize=None)
+def _load_env_file(env):
+    """Carrega o .env do ambiente uma única vez por processo."""
+    from dotenv import load_dotenv
+    load_dotenv(f"config/.env.{env}")
+
 
 class S3Repository:
-    def __init__(self, bucket_name):
+    def __init__(self, bucket_name, client_registry=None, credentials_provider=None):
         self.bucket_name = bucket_name
-        client = boto3.client('secretsmanager')
-        response = client.get_secret_value(SecretId='my/aws/creds')
-        secret = json.loads(response['SecretString'])
-
-        os.environ["AWS_ACCESS_KEY_ID"] = secret["AWS_ACCESS_KEY_ID"]
-        os.environ["AWS_SECRET_ACCESS_KEY"] = secret["AWS_SECRET_ACCESS_KEY"]
+        self.client_registry = client_registry
+        self.credentials_provider = credentials_provider or get_credentials_provider()
 
         # Load the appropriate .env file based on the ENV variable
         env = os.getenv("ENV", "dev")
-        env_file = f"config/.env.{env}"
-        load_dotenv(env_file)
+        _load_env_file(env)
 
         self.env = env
         self.endpoint_url = os.getenv("ENDPOINT_URL") if env == "dev" else None
-        self.aws_access_key_id = os.environ["AWS_ACCESS_KEY_ID"]
-        self.aws_secret_access_key = os.environ["AWS_SECRET_ACCESS_KEY"]
         self.region_name = os.getenv("REGION_NAME")
+        self.part_size = multipart_part_size()
+        self.multipart_concurrency = max(
+            int(os.getenv("S3_MULTIPART_CONCURRENCY", DEFAULT_MULTIPART_CONCURRENCY)), 1
+        )
+        self.part_max_attempts = max(int(os.getenv("S3_PART_MAX_ATTEMPTS", DEFAULT_PART_MAX_ATTEMPTS)), 1)
+        self.presigned_url_expires = int(
+            os.getenv("S3_PRESIGNED_URL_EXPIRES_SECONDS", DEFAULT_PRESIGNED_URL_EXPIRES_SECONDS)
+        )
 
     async def upload_video(self, video):
-        """Faz upload assíncrono do vídeo para o S3"""
+        """
+        Faz upload assíncrono do vídeo para o S3 na chave `video.path_s3` (chave do usuário ou do
+        blob, definida por quem cria o Video); sem ela, usa a chave do usuário (build_file_key).
+        O conteúdo é lido do `video.payload`, aberto só aqui.
+        """
         try:
             logger.info(f"Uploading video '{video.file_name}' to S3 bucket '{self.bucket_name}'")
 
-            session = aioboto3.Session()
-            async with session.client(
-                    "s3",
-                    endpoint_url=self.endpoint_url,
-                    aws_access_key_id=self.aws_access_key_id,
-                    aws_secret_access_key=self.aws_secret_access_key,
-                    region_name=self.region_name
-            ) as s3:
-
-                # Diretório do usuário
-                user_directory = f"{video.user_id}/"
-                video_directory = f"{user_directory}{video.file_name}/"
-                file_key = f"{video_directory}{video.file_name}"
-                video.path_s3 = file_key;
-
-                # Verifica se o vídeo já existe
-                response = await s3.list_objects_v2(Bucket=self.bucket_name, Prefix=video_directory)
-                if 'Contents' in response:
-                    raise ValueError(f"O vídeo '{video.file_name}' já está carregado. Por favor, consultar o status do vídeo.")
-
-                # Garante criação das "pastas" (S3 é flat, mas usamos chaves simulando diretórios)
-                await s3.put_object(Bucket=self.bucket_name, Key=video_directory)
+            async with self._s3_client() as s3:
+
+                # A duplicidade é verificada antes, via reserva condicional no DynamoDB
+                # (DBRepository.reserve_video_name); S3 é flat e não precisa de chaves de "pasta"
+                file_key = video.path_s3 or self.build_file_key(video.user_id, video.file_name)
 
                 # Upload do vídeo
-                await s3.put_object(Bucket=self.bucket_name, Key=file_key, Body=video.content)
+                # O S3 confere o SHA-256 de cada objeto/parte no recebimento (integridade); os
+                # calculados no recebimento do corpo são reaproveitados
+                checksum_sha256 = video.checksum_sha256
+                part_checksums = self._matching_part_checksums(video)
+                with span("s3_put") as stage, video.payload.open() as stream:
+                    if isinstance(stream, (bytes, bytearray)):
+                        checksum = hex_to_base64(checksum_sha256) if checksum_sha256 else sha256_base64(stream)
+                        await self._put_object(s3, file_key, stream, checksum)
+                        stage.nbytes = len(stream)
+                    else:
+                        # O arquivo temporário do upload é enviado direto da memória/mmap, sem cópia
+                        with map_stream(stream) as view:
+                            if view is not None:
+                                stage.nbytes = await self._upload_view(s3, file_key, view, checksum_sha256, part_checksums)
+                            else:
+                                stage.nbytes = await self._upload_stream(
+                                    s3, file_key, stream, checksum_sha256, part_checksums
+                                )
 
                 return file_key, None
 
         except Exception as e:
             logger.error(f"Erro no upload do vídeo: {e}")
             raise
+
+    async def create_presigned_upload(self, file_key, content_type, file_size):
+        """
+        Gera as URLs para o cliente enviar o vídeo diretamente ao S3: um PUT simples quando o
+        arquivo cabe em uma parte, ou uma URL por parte de um upload multipart.
+        """
+        try:
+            async with self._s3_client() as s3:
+                if file_size <= self.part_size:
+                    url = await s3.generate_presigned_url(
+                        "put_object",
+                        Params={"Bucket": self.bucket_name, "Key": file_key, "ContentType": content_type},
+                        ExpiresIn=self.presigned_url_expires
+                    )
+                    return {"mode": "single", "url": url, "expires_in": self.presigned_url_expires}
+
+                response = await s3.create_multipart_upload(
+                    Bucket=self.bucket_name, Key=file_key, ContentType=content_type
+                )
+                upload_id = response["UploadId"]
+                part_count = -(-file_size // self.part_size)
+                parts = []
+                for part_number in range(1, part_count + 1):
+                    url = await s3.generate_presigned_url(
+                        "upload_part",
+                        Params={
+                            "Bucket": self.bucket_name,
+                            "Key": file_key,
+                            "UploadId": upload_id,
+                            "PartNumber": part_number
+                        },
+                        ExpiresIn=self.presigned_url_expires
+                    )
+                    parts.append({"part_number": part_number, "url": url})
+
+                return {
+                    "mode": "multipart",
+                    "upload_id": upload_id,
+                    "part_size": self.part_size,
+                    "parts": parts,
+                    "expires_in": self.presigned_url_expires
+                }
+        except Exception as e:
+            logger.error(f"Erro ao gerar URLs de upload para '{file_key}': {e}")
+            raise
+
+    async def create_multipart_upload(self, file_key, content_type):
+        """Inicia um upload multipart cujas partes serão enviadas separadamente (upload retomável)."""
+        async with self._s3_client() as s3:
+            response = await s3.create_multipart_upload(
+                Bucket=self.bucket_name, Key=file_key, ContentType=content_type, ChecksumAlgorithm="SHA256"
+            )
+            return response["UploadId"]
+
+    async def upload_part(self, file_key, upload_id, part_number, body):
+        """
+        Envia uma parte (com seu SHA-256) de um upload iniciado por create_multipart_upload e
+        retorna a parte no formato esperado por complete_multipart_upload.
+        """
+        checksum = await asyncio.to_thread(sha256_base64, body)
+        async with self._s3_client() as s3:
+            etag = await self._upload_part(s3, file_key, upload_id, part_number, body, checksum)
+            return {"PartNumber": part_number, "ETag": etag, "ChecksumSHA256": checksum}
+
+    async def complete_multipart_upload(self, file_key, upload_id, parts):
+        """Conclui um upload multipart feito pelo cliente com as partes (PartNumber/ETag) enviadas."""
+        async with self._s3_client() as s3, span("s3_complete_multipart"):
+            await s3.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=file_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])}
+            )
+
+    async def abort_multipart_upload(self, file_key, upload_id):
+        async with self._s3_client() as s3:
+            await s3.abort_multipart_upload(Bucket=self.bucket_name, Key=file_key, UploadId=upload_id)
+
+    async def get_video_metadata(self, file_key):
+        """Retorna tamanho e content type do objeto, ou None se ele não existir."""
+        async with self._s3_client() as s3:
+            try:
+                response = await s3.head_object(Bucket=self.bucket_name, Key=file_key)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    return None
+                raise
+            return {"size": response["ContentLength"], "content_type": response.get("ContentType")}
+
+    async def delete_video(self, file_key):
+        async with self._s3_client() as s3:
+            await s3.delete_object(Bucket=self.bucket_name, Key=file_key)
+
+    @staticmethod
+    def build_file_key(user_id, file_name):
+        return f"{user_id}/{file_name}/{file_name}"
+
+    @staticmethod
+    def build_blob_key(checksum_sha256):
+        """Chave do armazenamento por conteúdo: um único objeto por SHA-256, compartilhado entre usuários."""
+        return f"blobs/{checksum_sha256[:2]}/{checksum_sha256}"
+
+    @asynccontextmanager
+    async def _s3_client(self):
+        """
+        Usa o cliente compartilhado do registry quando disponível; sem registry, abre um
+        cliente dedicado que é fechado ao final do bloco.
+        """
+        credentials = await self.credentials_provider.get_credentials()
+        client_kwargs = {
+            "endpoint_url": self.endpoint_url,
+            "aws_access_key_id": credentials.access_key_id,
+            "aws_secret_access_key": credentials.secret_access_key,
+            "region_name": self.region_name
+        }
+        if self.client_registry is not None:
+            async with self.client_registry.s3_client(**client_kwargs) as s3:
+                yield s3
+            return
+
+        import aioboto3
+        session = aioboto3.Session()
+        async with session.client("s3", config=botocore_config("s3"), **client_kwargs) as s3:
+            yield s3
+
+    async def warm_up(self):
+        """Carrega as credenciais e cria antecipadamente o cliente compartilhado."""
+        await self.credentials_provider.get_credentials()
+        if self.client_registry is not None:
+            async with self._s3_client():
+                pass
+
+    async def _put_object(self, s3, file_key, body, checksum):
+        await call_with_retry(
+            lambda: s3.put_object(Bucket=self.bucket_name, Key=file_key, Body=_request_body(body), ChecksumSHA256=checksum),
+            "s3", "put_object", self.part_max_attempts
+        )
+
+    async def _upload_part(self, s3, file_key, upload_id, part_number, body, checksum):
+        """Envia uma parte, repetindo apenas ela em falhas transitórias; retorna o ETag."""
+        with span("s3_upload_part") as stage:
+            stage.nbytes = len(body)
+            response = await call_with_retry(
+                lambda: s3.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=file_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=_request_body(body),
+                    ChecksumSHA256=checksum
+                ),
+                "s3", "upload_part", self.part_max_attempts
+            )
+        return response["ETag"]
+
+    def _matching_part_checksums(self, video):
+        """SHA-256 das partes do vídeo, se calculados com o mesmo tamanho de parte deste upload."""
+        part_checksums = video.part_checksums
+        if part_checksums and len(part_checksums) == -(-video.file_size // self.part_size):
+            return part_checksums
+        return None
+
+    async def _upload_view(self, s3, file_key, view, checksum_sha256=None, part_checksums=None):
+        """
+        Envia o conteúdo já mapeado (memoryview). Cada parte é uma fatia da view, lida pelo
+        cliente HTTP em blocos: nenhuma cópia do arquivo ou das partes é feita em memória.
+        Retorna os bytes enviados.
+        """
+        if len(view) < self.part_size:
+            checksum = hex_to_base64(checksum_sha256) if checksum_sha256 else await asyncio.to_thread(sha256_base64, view)
+            await self._put_object(s3, file_key, view, checksum)
+            return len(view)
+
+        return await self._multipart_upload(
+            s3, file_key, lambda upload_id: self._upload_view_parts(s3, file_key, upload_id, view, part_checksums)
+        )
+
+    async def _upload_view_parts(self, s3, file_key, upload_id, view, part_checksums=None):
+        """Envia as fatias da view em paralelo; o semáforo limita só as transferências simultâneas."""
+        semaphore = asyncio.Semaphore(self.multipart_concurrency)
+
+        async def send_part(part_number, offset):
+            async with semaphore:
+                # A fatia é liberada ao fim do envio para que o mmap possa ser fechado
+                with view[offset:offset + self.part_size] as body:
+                    return await self._send_part(
+                        s3, file_key, upload_id, part_number, body, part_checksums and part_checksums[part_number - 1]
+                    )
+
+        tasks = [
+            asyncio.create_task(send_part(part_number, offset))
+            for part_number, offset in enumerate(range(0, len(view), self.part_size), start=1)
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _upload_stream(self, s3, file_key, stream, checksum_sha256=None, part_checksums=None):
+        """
+        Envia um stream que não pode ser mapeado (ex.: leitura apenas assíncrona) em partes, sem
+        carregar o arquivo inteiro em memória. Arquivos menores que uma parte seguem por um único
+        put_object (reaproveitando o SHA-256 do arquivo, quando já calculado no recebimento).
+        Retorna os bytes enviados.
+        """
+        first_part = await self._read_part(stream)
+        if len(first_part) < self.part_size:
+            checksum = hex_to_base64(checksum_sha256) if checksum_sha256 else sha256_base64(first_part)
+            await self._put_object(s3, file_key, first_part, checksum)
+            return len(first_part)
+
+        return await self._multipart_upload(
+            s3, file_key, lambda upload_id: self._upload_parts(s3, file_key, upload_id, stream, first_part, part_checksums)
+        )
+
+    async def _multipart_upload(self, s3, file_key, upload_parts):
+        """Inicia o upload multipart, envia as partes via `upload_parts(upload_id)` e o conclui (ou aborta)."""
+        response = await s3.create_multipart_upload(Bucket=self.bucket_name, Key=file_key, ChecksumAlgorithm="SHA256")
+        upload_id = response["UploadId"]
+        try:
+            parts = await upload_parts(upload_id)
+            await s3.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=file_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": [
+                    {"ETag": part["ETag"], "PartNumber": part["PartNumber"], "ChecksumSHA256": part["ChecksumSHA256"]}
+                    for part in parts
+                ]}
+            )
+            return sum(part["Size"] for part in parts)
+        except BaseException:
+            logger.error(f"Abortando upload multipart de '{file_key}' (UploadId={upload_id})")
+            await s3.abort_multipart_upload(Bucket=self.bucket_name, Key=file_key, UploadId=upload_id)
+            raise
+
+    async def _upload_parts(self, s3, file_key, upload_id, stream, first_part, part_checksums=None):
+        """
+        Lê as partes sequencialmente e as envia em paralelo. O semáforo limita quantas partes
+        ficam em memória ao mesmo tempo (multipart_concurrency + a parte sendo lida).
+        """
+        semaphore = asyncio.Semaphore(self.multipart_concurrency)
+        tasks = []
+
+        async def send_part(part_number, body):
+            try:
+                return await self._send_part(
+                    s3, file_key, upload_id, part_number, body, part_checksums and part_checksums[part_number - 1]
+                )
+            finally:
+                semaphore.release()
+
+        try:
+            part_number = 1
+            part = first_part
+            while part:
+                await semaphore.acquire()
+                # Interrompe a leitura assim que alguma parte falhar
+                for task in tasks:
+                    if task.done() and task.exception() is not None:
+                        semaphore.release()
+                        raise task.exception()
+                tasks.append(asyncio.create_task(send_part(part_number, part)))
+                part_number += 1
+                part = await self._read_part(stream)
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _send_part(self, s3, file_key, upload_id, part_number, body, checksum=None):
+        if checksum is None:
+            # Sem o checksum do recebimento; hashlib libera o GIL: calculado fora do event loop
+            checksum = await asyncio.to_thread(sha256_base64, body)
+        etag = await self._upload_part(s3, file_key, upload_id, part_number, body, checksum)
+        return {"ETag": etag, "PartNumber": part_number, "Size": len(body), "ChecksumSHA256": checksum}
+
+    async def _read_part(self, stream):
+        """Lê até part_size bytes do stream, tolerando leituras parciais."""
+        part = await stream.read(self.part_size)
+        if not part or len(part) >= self.part_size:
+            return part
+
+        buffer = bytearray(part)
+        while len(buffer) < self.part_size:
+            chunk = await stream.read(self.part_size - len(buffer))
+            if not chunk:
+                break
+            buffer += chunk
+        return bytes(buffer)
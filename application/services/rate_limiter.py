@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMIT_REQUESTS_PER_SECOND = 10
+DEFAULT_RATE_LIMIT_REQUEST_BURST = 20
+DEFAULT_RATE_LIMIT_BYTES_PER_MINUTE = 2 * 1024 * 1024 * 1024
+DEFAULT_RATE_LIMIT_MAX_USERS = 10000
+DEFAULT_RATE_LIMIT_SYNC_SECONDS = 1.0
+# Janela dos contadores compartilhados no DynamoDB
+USAGE_WINDOW_SECONDS = 60
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Limite de requisições do usuário excedido")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Balde de fichas: acumula `rate` fichas por segundo até `capacity`; o saldo pode ficar negativo."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos até haver `amount` fichas (0 se já há)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(missing, 0) / self.rate
+
+    def charge(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= amount
+
+
+class _UserUsage:
+    """Baldes de um usuário e o consumo ainda não publicado/observado no contador compartilhado."""
+
+    __slots__ = ("requests", "bytes", "window", "pending_requests", "pending_bytes",
+                 "published_requests", "published_bytes", "remote_requests", "remote_bytes")
+
+    def __init__(self, requests: TokenBucket, nbytes: TokenBucket):
+        self.requests = requests
+        self.bytes = nbytes
+        self.window = None
+        self.pending_requests = 0
+        self.pending_bytes = 0
+        self.published_requests = 0
+        self.published_bytes = 0
+        self.remote_requests = 0
+        self.remote_bytes = 0
+
+
+class UserRateLimiter:
+    """
+    Limita requisições por segundo e bytes por minuto de cada usuário. A decisão é local (baldes de
+    fichas em memória, sem I/O no caminho da requisição); a cada `sync_interval` o consumo local é
+    somado a um contador por usuário e janela no DynamoDB, e o que as outras instâncias consumiram
+    no período é descontado dos baldes locais, aproximando um limite global.
+    """
+
+    def __init__(self, requests_per_second: float | None = None, request_burst: float | None = None,
+                 bytes_per_minute: int | None = None, max_users: int | None = None,
+                 sync_interval: float | None = None, usage_store=None, enabled: bool | None = None, clock=time.monotonic):
+        self.requests_per_second = requests_per_second or float(
+            os.getenv("RATE_LIMIT_REQUESTS_PER_SECOND", DEFAULT_RATE_LIMIT_REQUESTS_PER_SECOND)
+        )
+        self.request_burst = request_burst or float(os.getenv("RATE_LIMIT_REQUEST_BURST", DEFAULT_RATE_LIMIT_REQUEST_BURST))
+        self.bytes_per_minute = bytes_per_minute or int(
+            os.getenv("RATE_LIMIT_BYTES_PER_MINUTE", DEFAULT_RATE_LIMIT_BYTES_PER_MINUTE)
+        )
+        self.max_users = max_users or int(os.getenv("RATE_LIMIT_MAX_USERS", DEFAULT_RATE_LIMIT_MAX_USERS))
+        self.sync_interval = sync_interval if sync_interval is not None else float(
+            os.getenv("RATE_LIMIT_SYNC_SECONDS", DEFAULT_RATE_LIMIT_SYNC_SECONDS)
+        )
+        self.enabled = enabled if enabled is not None else os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        # Repositório com `add_rate_usage` (DBRepository); sem ele os limites valem só por instância
+        self.usage_store = usage_store
+        self.clock = clock
+        self._users: OrderedDict[str, _UserUsage] = OrderedDict()
+        self._last_sync = clock()
+        self._sync_task = None
+
+    def _usage(self, user_id: str, now: float) -> _UserUsage:
+        usage = self._users.get(user_id)
+        if usage is None:
+            usage = _UserUsage(
+                TokenBucket(self.requests_per_second, self.request_burst, now),
+                TokenBucket(self.bytes_per_minute / 60, self.bytes_per_minute, now)
+            )
+            self._users[user_id] = usage
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return usage
+
+    def acquire(self, user_id: str, nbytes: int = 0):
+        """
+        Consome uma requisição e `nbytes` do usuário ou levanta RateLimitExceeded com o tempo de
+        espera. Pedidos maiores que a capacidade do balde de bytes são reduzidos a ela (executam
+        com o balde cheio, em vez de nunca executarem).
+        """
+        if not self.enabled:
+            return
+        now = self.clock()
+        usage = self._usage(user_id, now)
+        wait = max(usage.requests.wait_time(1, now), usage.bytes.wait_time(nbytes, now))
+        if wait > 0:
+            raise RateLimitExceeded(max(1, int(wait + 0.999)))
+        usage.requests.charge(1, now)
+        usage.bytes.charge(nbytes, now)
+        usage.pending_requests += 1
+        usage.pending_bytes += nbytes
+        self._maybe_sync(now)
+
+    def charge_bytes(self, user_id: str, nbytes: int):
+        """
+        Desconta `nbytes` já recebidos, sem verificar o limite: sem Content-Length o tamanho só é
+        conhecido durante a leitura do corpo. O saldo negativo adia as próximas requisições do usuário.
+        """
+        if not self.enabled or not nbytes:
+            return
+        now = self.clock()
+        usage = self._usage(user_id, now)
+        usage.bytes.charge(nbytes, now)
+        usage.pending_bytes += nbytes
+        self._maybe_sync(now)
+
+    def _maybe_sync(self, now: float):
+        if self.usage_store is None or now - self._last_sync < self.sync_interval:
+            return
+        if self._sync_task is not None and not self._sync_task.done():
+            return
+        self._last_sync = now
+        self._sync_task = asyncio.get_running_loop().create_task(self.sync())
+
+    async def sync(self):
+        """Publica o consumo local de cada usuário e desconta o das outras instâncias."""
+        window = int(time.time() // USAGE_WINDOW_SECONDS)
+        pending = [
+            (user_id, usage) for user_id, usage in self._users.items() if usage.pending_requests or usage.pending_bytes
+        ]
+        await asyncio.gather(*(self._sync_user(user_id, usage, window) for user_id, usage in pending))
+
+    async def _sync_user(self, user_id: str, usage: _UserUsage, window: int):
+        if usage.window != window:
+            usage.window = window
+            usage.published_requests = usage.published_bytes = 0
+            usage.remote_requests = usage.remote_bytes = 0
+        requests, nbytes = usage.pending_requests, usage.pending_bytes
+        try:
+            total_requests, total_bytes = await self.usage_store.add_rate_usage(
+                user_id, window, requests, nbytes, expires_at=(window + 2) * USAGE_WINDOW_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Falha ao sincronizar o consumo do usuário {user_id}: {str(e)}")
+            return
+        usage.pending_requests -= requests
+        usage.pending_bytes -= nbytes
+        if usage.window != window:
+            return
+        usage.published_requests += requests
+        usage.published_bytes += nbytes
+        remote_requests = max(0, total_requests - usage.published_requests)
+        remote_bytes = max(0, total_bytes - usage.published_bytes)
+        now = self.clock()
+        usage.requests.charge(remote_requests - usage.remote_requests, now)
+        usage.bytes.charge(remote_bytes - usage.remote_bytes, now)
+        usage.remote_requests, usage.remote_bytes = remote_requests, remote_bytes
+
+
+rate_limiter = UserRateLimiter()
+
+
+def get_rate_limiter() -> UserRateLimiter:
+    return rate_limiter
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Limite de itens por chamada do BatchWriteItem
+DEFAULT_MAX_BATCH_SIZE = 25
+# Espera por outros uploads terminarem antes de gravar um lote parcial
+DEFAULT_LINGER_SECONDS = 0.05
+
+
+class RegistrationBatcher:
+    """
+    Registra no DynamoDB, em lote, os vídeos cujo upload ao S3 terminou. O lote é gravado assim que
+    todos os `expected` vídeos da requisição terminaram (registrados com `add` ou descartados com
+    `discard`), ou `linger_seconds` após o primeiro vídeo pendente: os registros dos uploads que
+    terminam primeiro são gravados enquanto os demais ainda estão em andamento.
+    """
+
+    def __init__(self, db_repo, expected: int, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 linger_seconds: float | None = None):
+        self.db_repo = db_repo
+        self.expected = expected
+        self.max_batch_size = max_batch_size
+        self.linger_seconds = linger_seconds if linger_seconds is not None else float(
+            os.getenv("REGISTRATION_BATCH_LINGER_SECONDS", DEFAULT_LINGER_SECONDS)
+        )
+        self._reported = 0
+        self._pending = []
+        self._writes = []
+        self._timer = None
+
+    def add(self, video) -> asyncio.Future:
+        """Enfileira o vídeo; o future resolve quando o registro for gravado (ou falhar)."""
+        registration = asyncio.get_running_loop().create_future()
+        self._pending.append((video, registration))
+        self._report()
+        return registration
+
+    def discard(self):
+        """Indica que um dos vídeos esperados não será registrado (validação ou upload falhou)."""
+        self._report()
+
+    async def flush(self):
+        """Grava os registros pendentes e aguarda todas as gravações em andamento."""
+        if self._pending:
+            self._start_write()
+        if self._writes:
+            await asyncio.gather(*self._writes)
+            self._writes = []
+
+    def _report(self):
+        self._reported += 1
+        if not self._pending:
+            return
+        if self._reported >= self.expected or len(self._pending) >= self.max_batch_size:
+            self._start_write()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.linger_seconds, self._on_linger)
+
+    def _on_linger(self):
+        self._timer = None
+        if self._pending:
+            self._start_write()
+
+    def _start_write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        self._writes.append(asyncio.create_task(self._write(batch)))
+
+    async def _write(self, batch):
+        try:
+            not_written = await self.db_repo.register_videos([video for video, _ in batch])
+        except Exception as e:
+            for _, registration in batch:
+                registration.set_exception(e)
+            return
+
+        for video, registration in batch:
+            if any(video is failed for failed in not_written):
+                registration.set_exception(RuntimeError("Registro não processado pelo DynamoDB"))
+            else:
+                registration.set_result(video)
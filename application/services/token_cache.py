@@ -0,0 +1,110 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from jwt import PyJWK
+
+DEFAULT_JWKS_TTL_SECONDS = 3600
+# Intervalo mínimo entre buscas forçadas por um 'kid' desconhecido (evita martelar o endpoint)
+DEFAULT_JWKS_MIN_REFETCH_SECONDS = 30
+DEFAULT_TOKEN_CACHE_MAX_ENTRIES = 1024
+DEFAULT_TOKEN_CACHE_TTL_SECONDS = 300
+
+
+class JWKSCache:
+    """
+    Chaves públicas do JWKS de um User Pool indexadas por 'kid'. O conjunto é recarregado ao
+    expirar o TTL ou quando aparece um 'kid' desconhecido (rotação de chaves do Cognito).
+    """
+
+    def __init__(self, jwks_url: str, ttl_seconds: float | None = None,
+                 min_refetch_seconds: float = DEFAULT_JWKS_MIN_REFETCH_SECONDS):
+        self.jwks_url = jwks_url
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("JWKS_CACHE_TTL_SECONDS", DEFAULT_JWKS_TTL_SECONDS)
+        )
+        self.min_refetch_seconds = min_refetch_seconds
+        # PyJWT é importado sob demanda: não pesa no import da aplicação (cold start)
+        from jwt import PyJWKClient
+        self._client = PyJWKClient(jwks_url, cache_jwk_set=False)
+        self._keys = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def get_signing_key_from_jwt(self, token: str) -> "PyJWK":
+        import jwt
+        header = jwt.get_unverified_header(token)
+        return self.get_signing_key(header.get("kid"))
+
+    def get_signing_key(self, kid: str) -> "PyJWK":
+        with self._lock:
+            now = time.monotonic()
+            if self._fetched_at is None or now - self._fetched_at >= self.ttl_seconds:
+                self._refresh()
+            elif kid not in self._keys and now - self._fetched_at >= self.min_refetch_seconds:
+                self._refresh()
+            key = self._keys.get(kid)
+
+        if key is None:
+            import jwt
+            raise jwt.PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return key
+
+    def _refresh(self):
+        jwk_set = self._client.get_jwk_set(refresh=True)
+        self._keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+        self._fetched_at = time.monotonic()
+
+
+class TokenResultCache:
+    """
+    LRU limitado de token -> resultado da validação. A chave é o hash do token (o token em si
+    não fica em memória) e cada entrada expira no menor entre o TTL e o 'exp' do token.
+    """
+
+    def __init__(self, max_entries: int | None = None, ttl_seconds: float | None = None):
+        self.max_entries = max_entries or int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", DEFAULT_TOKEN_CACHE_MAX_ENTRIES))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("TOKEN_CACHE_TTL_SECONDS", DEFAULT_TOKEN_CACHE_TTL_SECONDS)
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, token: str, value, exp: float | None = None):
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= time.time():
+            return
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,19 +1,77 @@
+import asyncio
 import logging
 import os
-from typing import Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TYPE_CHECKING
 
 import boto3
 import botocore
-import jwt
 from fastapi import HTTPException
-from jwt import PyJWKClient, PyJWK
 
+from application.services.token_cache import JWKSCache, TokenResultCache
+from infrastructure.aws.credentials_provider import get_credentials_provider
 from infrastructure.logging.logging_config import setup_logging
+from infrastructure.metrics.metrics import span
+
+if TYPE_CHECKING:
+    from jwt import PyJWK
+
+_cache_lock = threading.Lock()
+_cognito_clients = {}
+_user_pool_id = None
+_jwks_caches = {}
+_token_results = TokenResultCache()
+
+DEFAULT_TOKEN_VALIDATION_WORKERS = 8
+DEFAULT_COGNITO_MAX_CONCURRENCY = 4
+
+# Pool dedicado à validação de tokens: chamadas bloqueantes ao Cognito não ocupam o event loop
+# nem o threadpool padrão usado pelo restante da aplicação
+_validation_executor = None
+_cognito_semaphore = threading.BoundedSemaphore(
+    int(os.getenv("COGNITO_MAX_CONCURRENCY", DEFAULT_COGNITO_MAX_CONCURRENCY))
+)
+
+
+def get_validation_executor() -> ThreadPoolExecutor:
+    global _validation_executor
+    if _validation_executor is None:
+        with _cache_lock:
+            if _validation_executor is None:
+                _validation_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("TOKEN_VALIDATION_WORKERS", DEFAULT_TOKEN_VALIDATION_WORKERS)),
+                    thread_name_prefix="token-validation"
+                )
+    return _validation_executor
+
+
+def _new_cognito_client(region_name, credentials):
+    return boto3.client(
+        'cognito-idp', region_name=region_name,
+        aws_access_key_id=credentials.access_key_id, aws_secret_access_key=credentials.secret_access_key
+    )
+
+
+def get_cognito_client():
+    """
+    Cliente cognito-idp reaproveitado pelo processo (um por região), com as credenciais do
+    Secrets Manager; recriado quando elas mudam.
+    """
+    region_name = os.getenv("REGION_NAME")
+    credentials = get_credentials_provider().get_credentials_sync()
+    cached = _cognito_clients.get(region_name)
+    if cached is None or cached[0] != credentials:
+        with _cache_lock:
+            cached = _cognito_clients.get(region_name)
+            if cached is None or cached[0] != credentials:
+                cached = _cognito_clients[region_name] = (credentials, _new_cognito_client(region_name, credentials))
+    return cached[1]
 
 
 def obter_user_pool_id() -> str:
     try:
-        client = boto3.client('cognito-idp', region_name=os.getenv("REGION_NAME"))
+        client = _new_cognito_client(os.getenv("REGION_NAME"), get_credentials_provider().get_credentials_sync())
         response = client.list_user_pools(MaxResults=1)
 
         user_pools = response.get("UserPools", [])
@@ -27,16 +85,53 @@ def obter_user_pool_id() -> str:
     return ""
 
 
+def get_user_pool_id() -> str:
+    """Resolve o id do User Pool uma única vez por processo."""
+    global _user_pool_id
+    if not _user_pool_id:
+        with _cache_lock:
+            if not _user_pool_id:
+                _user_pool_id = obter_user_pool_id()
+    return _user_pool_id
+
+
+def get_jwks_cache(jwks_url: str) -> JWKSCache:
+    cache = _jwks_caches.get(jwks_url)
+    if cache is None:
+        with _cache_lock:
+            cache = _jwks_caches.get(jwks_url)
+            if cache is None:
+                cache = _jwks_caches[jwks_url] = JWKSCache(jwks_url)
+    return cache
+
+
 class TokenService:
 
+    @staticmethod
+    def clear_caches():
+        """Limpa os caches de validação de token (JWKS, User Pool, Cognito e resultados)."""
+        global _user_pool_id
+        with _cache_lock:
+            _cognito_clients.clear()
+            _jwks_caches.clear()
+            _user_pool_id = None
+        _token_results.clear()
+
+    @staticmethod
+    def warm_up():
+        """Cria antecipadamente o cliente Cognito e o pool de validação (pré-aquecimento do processo)."""
+        get_cognito_client()
+        get_validation_executor()
+
     @staticmethod
     def get_email_from_cognito(access_token: str) -> str:
         """
         Recupera o email do usuário a partir do Cognito utilizando o token de acesso.
         """
         try:
-            client = boto3.client('cognito-idp', region_name=os.getenv("REGION_NAME"))
-            response = client.get_user(AccessToken=access_token)
+            # Limita as chamadas simultâneas ao Cognito feitas pelo processo
+            with _cognito_semaphore:
+                response = get_cognito_client().get_user(AccessToken=access_token)
             return next(attr['Value'] for attr in response['UserAttributes'] if attr['Name'] == 'email')
         except Exception as e:
             raise HTTPException(status_code=401, detail=f"Erro ao obter email do Cognito: {str(e)}")
@@ -46,6 +141,8 @@ class TokenService:
         """
         Decodifica o JWT utilizando a chave secreta e valida sua assinatura.
         """
+        # Importado sob demanda para não pesar no import da aplicação (cold start)
+        import jwt
         try:
             decoded_token = jwt.decode(
                 token,
@@ -77,6 +174,12 @@ class TokenService:
         if not secret_key:
             raise HTTPException(status_code=500, detail="Configuração SECRET_KEY não encontrada")
 
+        # Resultado de uma validação anterior do mesmo token (mesma sessão)
+        cached_result = _token_results.get(token)
+        if cached_result is not None:
+            logger.info("Dados do usuário obtidos do cache de tokens.")
+            return cached_result
+
         # Primeira tentativa: Decodificar o JWT
         decoded_token = TokenService.decode_jwt(token, secret_key)
 
@@ -95,15 +198,47 @@ class TokenService:
 
         logger.info(f"Email extraído do Cognito: {email_retry}")
         logger.info(f"User_id extraído do Cognito: {user_id}")
+        _token_results.set(token, (email_retry, user_id), exp=decoded_token.get("exp"))
         return email_retry, user_id
 
     @staticmethod
-    def extract_signature(token: str) -> PyJWK:
-        user_pool_id = obter_user_pool_id()
+    async def extract_user_email_and_user_id_async(token: str) -> tuple[str, str] | Any:
+        """
+        Versão assíncrona de extract_user_email_and_user_id. Tokens já validados retornam do
+        cache sem sair do event loop; os demais são validados no pool dedicado.
+        """
+        with span("auth"):
+            if token:
+                cached_result = _token_results.get(token)
+                if cached_result is not None:
+                    return cached_result
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                get_validation_executor(), TokenService.extract_user_email_and_user_id, token
+            )
+
+    @staticmethod
+    async def authenticate_user(token: str) -> tuple[str, str]:
+        """
+        Retorna (email, user_id) do token para os casos de uso; responde 403 quando algum dos
+        dois não está presente.
+        """
+        user_email, user_id = await TokenService.extract_user_email_and_user_id_async(token)
+        if not user_email:
+            logging.getLogger(__name__).error("E-mail não encontrado no Token.")
+            raise HTTPException(status_code=403, detail="E-mail não encontrado no Token")
+        if not user_id:
+            logging.getLogger(__name__).error("Usuário não encontrado no Token.")
+            raise HTTPException(status_code=403, detail="Usuário não encontrado no Token")
+        return user_email, user_id
+
+    @staticmethod
+    def extract_signature(token: str) -> "PyJWK":
+        user_pool_id = get_user_pool_id()
         # URL do JWKS do seu User Pool
         jwks_url = f"https://cognito-idp.{os.getenv('REGION_NAME')}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
 
-        # Pega a chave pública correta com base no 'kid' do token
-        jwks_client = PyJWKClient(jwks_url)
-        return jwks_client.get_signing_key_from_jwt(token)
+        # Pega a chave pública correta com base no 'kid' do token (chaves em cache por 'kid')
+        return get_jwks_cache(jwks_url).get_signing_key_from_jwt(token)
 
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+import random
+
+from application.services.upload_scheduler import UploadCapacityExceeded
+from infrastructure.logging.logging_config import bind_request_id, current_request_id, reset_request_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_QUEUE_MAX_SIZE = 100
+DEFAULT_UPLOAD_QUEUE_WORKERS = 4
+DEFAULT_UPLOAD_JOB_MAX_ATTEMPTS = 3
+DEFAULT_UPLOAD_JOB_BACKOFF_SECONDS = 1.0
+DEFAULT_UPLOAD_QUEUE_RETRY_AFTER_SECONDS = 5
+
+
+class UploadWorkQueue:
+    """
+    Fila de uploads em segundo plano drenada por um pool de workers do próprio processo. Cada job
+    expõe `run()` (uma tentativa), `fail(error)` (após esgotar as tentativas ou quando `drain`
+    encerra os workers antes do fim) e `cleanup()` (sempre executado ao final). A fila é limitada: sem espaço, `submit` levanta
+    UploadCapacityExceeded e a requisição recebe 429. Os logs do job levam o id da requisição
+    que o enfileirou.
+    """
+
+    def __init__(self, max_size: int | None = None, workers: int | None = None, max_attempts: int | None = None,
+                 backoff_seconds: float | None = None):
+        self.max_size = max_size or int(os.getenv("UPLOAD_QUEUE_MAX_SIZE", DEFAULT_UPLOAD_QUEUE_MAX_SIZE))
+        self.workers = workers or int(os.getenv("UPLOAD_QUEUE_WORKERS", DEFAULT_UPLOAD_QUEUE_WORKERS))
+        self.max_attempts = max_attempts or int(os.getenv("UPLOAD_JOB_MAX_ATTEMPTS", DEFAULT_UPLOAD_JOB_MAX_ATTEMPTS))
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else float(
+            os.getenv("UPLOAD_JOB_BACKOFF_SECONDS", DEFAULT_UPLOAD_JOB_BACKOFF_SECONDS)
+        )
+        self.retry_after = int(os.getenv("UPLOAD_QUEUE_RETRY_AFTER_SECONDS", DEFAULT_UPLOAD_QUEUE_RETRY_AFTER_SECONDS))
+        self._loop = None
+        self._queue = None
+        self._tasks = []
+
+    def _ensure_started(self):
+        # Fila e workers pertencem ao event loop em execução (recriados se o loop mudar)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._tasks = [loop.create_task(self._worker(index)) for index in range(self.workers)]
+        return self._queue
+
+    def has_capacity(self) -> bool:
+        return self._queue is None or self._loop is not asyncio.get_running_loop() or not self._queue.full()
+
+    def submit(self, job):
+        queue = self._ensure_started()
+        try:
+            queue.put_nowait((job, current_request_id()))
+        except asyncio.QueueFull:
+            logger.warning("Fila de uploads em segundo plano cheia; job recusado.")
+            raise UploadCapacityExceeded(self.retry_after)
+
+    async def _worker(self, index):
+        while True:
+            job, request_id = await self._queue.get()
+            token = bind_request_id(request_id)
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"Worker {index}: erro inesperado no job {job}: {str(e)}")
+            finally:
+                reset_request_id(token)
+                self._queue.task_done()
+
+    async def _process(self, job):
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    await job.run()
+                    return
+                except Exception as e:
+                    if attempt == self.max_attempts:
+                        logger.error(f"Job {job} falhou após {attempt} tentativas: {str(e)}")
+                        await job.fail(e)
+                        return
+                    delay = self.backoff_seconds * (2 ** (attempt - 1))
+                    logger.warning(f"Job {job} falhou (tentativa {attempt}): {str(e)}; nova tentativa em {delay:.2f}s.")
+                    await asyncio.sleep(random.uniform(delay / 2, delay))
+        except asyncio.CancelledError as e:
+            # Encerramento antes do fim do job: registra a falha sem ser interrompido de novo
+            logger.error(f"Job {job} interrompido antes de concluir.")
+            await asyncio.shield(job.fail(e))
+            raise
+        finally:
+            await job.cleanup()
+
+    async def drain(self, timeout: float | None = None):
+        """Aguarda os jobs enfileirados (até `timeout`) e encerra os workers; os não concluídos falham."""
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._queue.qsize()} jobs de upload não concluídos no encerramento.")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Jobs que nem começaram também são registrados como falha (e liberam suas reservas)
+        while not self._queue.empty():
+            job, _ = self._queue.get_nowait()
+            try:
+                await job.fail(asyncio.CancelledError())
+            except Exception as e:
+                logger.error(f"Erro ao registrar a falha do job {job}: {str(e)}")
+            finally:
+                await job.cleanup()
+        self._loop = None
+        self._queue = None
+        self._tasks = []
+
+
+upload_queue = UploadWorkQueue()
+
+
+def get_upload_queue() -> UploadWorkQueue:
+    return upload_queue
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_CONCURRENT_TRANSFERS = 16
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 10
+DEFAULT_RETRY_AFTER_SECONDS = 5
+
+
+class UploadCapacityExceeded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Capacidade de upload esgotada")
+        self.retry_after = retry_after
+
+
+class UploadScheduler:
+    """
+    Controle de admissão de uploads compartilhado por todas as requisições do processo: limita
+    os bytes em trânsito e as transferências simultâneas ao S3. Quem não encontra capacidade
+    aguarda na fila até `queue_timeout`; depois disso recebe UploadCapacityExceeded (HTTP 429).
+    """
+
+    def __init__(self, max_inflight_bytes: int | None = None, max_concurrent_transfers: int | None = None,
+                 queue_timeout: float | None = None, retry_after: int | None = None):
+        self.max_inflight_bytes = max_inflight_bytes or int(
+            os.getenv("UPLOAD_MAX_INFLIGHT_BYTES", DEFAULT_MAX_INFLIGHT_BYTES)
+        )
+        self.max_concurrent_transfers = max_concurrent_transfers or int(
+            os.getenv("UPLOAD_MAX_CONCURRENT_TRANSFERS", DEFAULT_MAX_CONCURRENT_TRANSFERS)
+        )
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(
+            os.getenv("UPLOAD_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS)
+        )
+        self.retry_after = retry_after or int(os.getenv("UPLOAD_RETRY_AFTER_SECONDS", DEFAULT_RETRY_AFTER_SECONDS))
+        self.inflight_bytes = 0
+        self.active_transfers = 0
+        self._loop = None
+        self._condition = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _has_capacity(self, nbytes, transfers):
+        return (self.inflight_bytes + nbytes <= self.max_inflight_bytes
+                and self.active_transfers + transfers <= self.max_concurrent_transfers)
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int, transfers: int = 1):
+        """
+        Reserva capacidade para `transfers` transferências somando `nbytes`. Pedidos maiores que
+        os limites são reduzidos aos limites (executam sozinhos, em vez de nunca executarem).
+        """
+        nbytes = min(nbytes, self.max_inflight_bytes)
+        transfers = min(transfers, self.max_concurrent_transfers)
+        condition = self._get_condition()
+
+        async with condition:
+            if not self._has_capacity(nbytes, transfers):
+                logger.info(
+                    f"Upload aguardando capacidade ({self.inflight_bytes} bytes e "
+                    f"{self.active_transfers} transferências em andamento)."
+                )
+                try:
+                    await asyncio.wait_for(
+                        condition.wait_for(lambda: self._has_capacity(nbytes, transfers)), self.queue_timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning("Capacidade de upload esgotada; requisição recusada.")
+                    raise UploadCapacityExceeded(self.retry_after)
+            self.inflight_bytes += nbytes
+            self.active_transfers += transfers
+
+        try:
+            yield
+        finally:
+            async with condition:
+                self.inflight_bytes -= nbytes
+                self.active_transfers -= transfers
+                condition.notify_all()
+
+
+upload_scheduler = UploadScheduler()
+
+
+def get_upload_scheduler() -> UploadScheduler:
+    return upload_scheduler
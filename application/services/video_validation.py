@@ -0,0 +1,42 @@
+# Regras de aceitação de vídeos compartilhadas pelos fluxos de upload
+MAX_VIDEO_SIZE = 50 * 1024 * 1024  # 50MB
+MAX_FILES_PER_REQUEST = 5
+ALLOWED_CONTENT_TYPES = ["video/mp4", "video/mpeg", "video/quicktime"]
+
+# Bytes iniciais necessários para identificar o contêiner (MPEG-TS confere dois pacotes de 188 bytes)
+SNIFF_BYTES = 189
+
+# Tipos de "atom"/"box" que podem abrir um arquivo ISO BMFF (MP4) ou QuickTime
+_BMFF_LEADING_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot"}
+_MPEG_PACK_HEADER = b"\x00\x00\x01\xba"
+_MPEG_SEQUENCE_HEADER = b"\x00\x00\x01\xb3"
+_MPEG_TS_SYNC_BYTE = 0x47
+_MPEG_TS_PACKET_SIZE = 188
+
+
+def sniff_video_container(head: bytes) -> str | None:
+    """
+    Identifica o contêiner pelos primeiros bytes do arquivo: "bmff" (MP4/QuickTime),
+    "mpeg" (MPEG Program/Elementary/Transport Stream) ou None se não reconhecido.
+    """
+    if len(head) >= 8 and head[4:8] in _BMFF_LEADING_BOXES:
+        return "bmff"
+    if head[:4] in (_MPEG_PACK_HEADER, _MPEG_SEQUENCE_HEADER):
+        return "mpeg"
+    # O byte de sincronismo do TS ("G") é comum; exige-se o início de dois pacotes consecutivos
+    if len(head) > _MPEG_TS_PACKET_SIZE and head[0] == head[_MPEG_TS_PACKET_SIZE] == _MPEG_TS_SYNC_BYTE:
+        return "mpeg"
+    return None
+
+
+_CONTAINERS_BY_CONTENT_TYPE = {
+    "video/mp4": "bmff",
+    "video/quicktime": "bmff",
+    "video/mpeg": "mpeg",
+}
+
+
+def matches_content_type(content_type: str, head: bytes) -> bool:
+    """Confere se os bytes iniciais correspondem ao contêiner esperado para o content type."""
+    expected = _CONTAINERS_BY_CONTENT_TYPE.get(content_type)
+    return expected is not None and sniff_video_container(head) == expected
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from fastapi import HTTPException, UploadFile
+
+from domain.entities.video import Video, VideoPayload
+from application.services.upload_queue import UploadWorkQueue, get_upload_queue
+from application.services.upload_scheduler import UploadCapacityExceeded, UploadScheduler, get_upload_scheduler
+from application.use_cases.upload_video import UploadVideoUseCase, release_blob_reference
+from application.services.token_service import TokenService
+from adapters.repository.s3_repository import S3Repository
+from adapters.repository.db_repository import (
+    DBRepository, STATUS_AGUARDANDO_UPLOAD, STATUS_ERRO_UPLOAD, STATUS_PENDENTE_PROCESSAMENTO
+)
+
+logger = logging.getLogger(__name__)
+
+# Validade das reservas de nome/conteúdo até o envio em segundo plano terminar: se o job se perde
+# com o processo, o nome volta a ficar livre depois disso
+DEFAULT_ASYNC_RESERVATION_TTL_SECONDS = 7200
+
+
+async def _complete_reservations(db_repo: DBRepository, video: Video):
+    """Torna permanentes (sem expiração) as reservas de um vídeo já armazenado."""
+    try:
+        await db_repo.complete_reservation(video.user_id, video.file_name)
+        if video.checksum_sha256:
+            await db_repo.complete_content_reservation(video.user_id, video.checksum_sha256)
+    except Exception as e:
+        logger.warning(f"Reservas do vídeo {video.file_name} ({video.video_id}) não concluídas: {str(e)}")
+
+
+class BackgroundUploadJob:
+    """
+    Envia ao S3 um vídeo já aceito (copiado para um arquivo temporário) e atualiza seu status.
+    Com `blob=True`, o vídeo é o primeiro envio de um blob do armazenamento por conteúdo.
+    """
+
+    def __init__(self, s3_repo: S3Repository, db_repo: DBRepository, scheduler: UploadScheduler,
+                 video: Video, spool_path: str, blob: bool = False):
+        self.s3_repo = s3_repo
+        self.db_repo = db_repo
+        self.scheduler = scheduler
+        self.video = video
+        self.spool_path = spool_path
+        self.blob = blob
+
+    def __str__(self):
+        return self.video.video_id
+
+    async def run(self):
+        # O payload aponta para o arquivo temporário: cada tentativa o reabre desde o início
+        async with self.scheduler.reserve(self.video.file_size):
+            await self.s3_repo.upload_video(self.video)
+        if self.blob:
+            await self.db_repo.mark_blob_available(self.video.checksum_sha256)
+        await self.db_repo.update_video_status(
+            self.video.video_id, STATUS_PENDENTE_PROCESSAMENTO, path_s3=self.video.path_s3
+        )
+        await _complete_reservations(self.db_repo, self.video)
+        logger.info(f"Vídeo {self.video.file_name} ({self.video.video_id}) enviado em segundo plano.")
+
+    async def fail(self, error):
+        try:
+            await self.db_repo.update_video_status(self.video.video_id, STATUS_ERRO_UPLOAD)
+        except Exception as e:
+            logger.error(f"Erro ao marcar falha do vídeo {self.video.video_id}: {str(e)}")
+        await self.db_repo.release_video_name(self.video.user_id, self.video.file_name)
+        if self.video.checksum_sha256:
+            await self.db_repo.release_content(self.video.user_id, self.video.checksum_sha256)
+        if self.blob:
+            await release_blob_reference(self.s3_repo, self.db_repo, self.video.checksum_sha256)
+
+    async def cleanup(self):
+        await asyncio.to_thread(_remove_spool_file, self.spool_path)
+
+
+def _remove_spool_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class AsyncUploadUseCase(UploadVideoUseCase):
+    """
+    Modo "aceita e envia depois": cada vídeo é copiado para um arquivo temporário, registrado no
+    DynamoDB com STATUS_PROCESSAMENTO=AGUARDANDO_UPLOAD e enfileirado para os workers em segundo
+    plano. A resposta (202) traz o id de cada vídeo, usado para consultar o status. As reservas do
+    nome e do conteúdo expiram em ASYNC_RESERVATION_TTL_SECONDS, salvo se o envio for concluído.
+    """
+
+    def __init__(self, s3_repo: S3Repository, db_repo: DBRepository, scheduler: UploadScheduler | None = None,
+                 queue: UploadWorkQueue | None = None, content_addressed: bool | None = None):
+        super().__init__(s3_repo, db_repo, scheduler, content_addressed)
+        self.queue = queue or get_upload_queue()
+        self.spool_dir = os.getenv("UPLOAD_SPOOL_DIR") or None
+        self.reservation_ttl = int(os.getenv("ASYNC_RESERVATION_TTL_SECONDS", DEFAULT_ASYNC_RESERVATION_TTL_SECONDS))
+
+    async def execute(self, files: list[UploadFile], token, checksums: list[str] | None = None,
+                      part_checksums: list[tuple[str, ...] | None] | None = None):
+        user_email, user_id = await TokenService.authenticate_user(token)
+        files = self._validate_files(files)
+        if not self.queue.has_capacity():
+            raise HTTPException(
+                status_code=429,
+                detail="Fila de uploads cheia, tente novamente mais tarde",
+                headers={"Retry-After": str(self.queue.retry_after)}
+            )
+
+        if checksums is not None and len(checksums) != len(files):
+            checksums = None
+        if part_checksums is not None and len(part_checksums) != len(files):
+            part_checksums = None
+        return await asyncio.gather(*[
+            self._accept(
+                file, user_email, user_id,
+                checksums[index] if checksums else None,
+                part_checksums[index] if part_checksums else None
+            )
+            for index, file in enumerate(files)
+        ])
+
+    async def _accept(self, file: UploadFile, user_email, user_id, checksum_sha256: str | None = None,
+                      part_checksums: tuple[str, ...] | None = None):
+        file_size = self._get_file_size(file)
+        invalid = self._validate_file(file, file_size)
+        if invalid:
+            return invalid
+
+        details = f"Nome: {file.filename}, Tamanho: {(file_size / (1024 * 1024)):.2f} MB, Usuário: {user_email}"
+        video = Video(
+            file_name=file.filename,
+            file_size=file_size,
+            user_email=user_email,
+            user_id=user_id,
+            path_s3=self.s3_repo.build_file_key(user_id, file.filename),
+            checksum_sha256=checksum_sha256,
+            part_checksums=part_checksums
+        )
+        try:
+            await self._reserve(video, expires_at=time.time() + self.reservation_ttl)
+        except Exception as e:
+            self.logger.error(f"Erro ao processar o vídeo {file.filename}: {str(e)}")
+            return {"video": file.filename, "details": details, "status": f"Erro: {str(e)}"}
+
+        blob = self._uses_blob(video)
+        if blob:
+            video = self._as_blob(video)
+            try:
+                if await self._acquire_blob(video):
+                    return await self._register_stored(video, details)
+            except Exception as e:
+                self.logger.error(f"Erro ao processar o vídeo {file.filename}: {str(e)}")
+                await self._release(video)
+                return {"video": file.filename, "details": details, "status": f"Erro: {str(e)}"}
+
+        spool_path = None
+        registered = False
+        try:
+            spool_path = await asyncio.to_thread(self._spool, file)
+            video = video.with_changes(payload=VideoPayload.from_path(spool_path))
+            await self.db_repo.register_video(video, status=STATUS_AGUARDANDO_UPLOAD)
+            registered = True
+            self.queue.submit(
+                BackgroundUploadJob(self.s3_repo, self.db_repo, self.scheduler, video, spool_path, blob=blob)
+            )
+        except Exception as e:
+            self.logger.error(f"Erro ao enfileirar o vídeo {file.filename}: {str(e)}")
+            if spool_path:
+                await asyncio.to_thread(_remove_spool_file, spool_path)
+            if registered:
+                try:
+                    await self.db_repo.update_video_status(video.video_id, STATUS_ERRO_UPLOAD)
+                except Exception:
+                    pass  # já registrado no log pelo repositório
+            await self._release(video, stored=blob)
+            error = "Fila de uploads cheia" if isinstance(e, UploadCapacityExceeded) else str(e)
+            return {"video": file.filename, "details": details, "status": f"Erro: {error}"}
+
+        return {
+            "video": file.filename,
+            "job_id": video.video_id,
+            "details": details,
+            "status": "Aceito"
+        }
+
+    async def _register_stored(self, video: Video, details: str):
+        """Registra diretamente como PENDENTE_PROCESSAMENTO um vídeo cujo blob já está no S3."""
+        try:
+            await self.db_repo.register_video(video)
+        except Exception as e:
+            self.logger.error(f"Erro ao registrar o vídeo {video.file_name}: {str(e)}")
+            await self._release(video, stored=True)
+            return {"video": video.file_name, "details": details, "status": f"Erro: {str(e)}"}
+        await _complete_reservations(self.db_repo, video)
+        return {"video": video.file_name, "job_id": video.video_id, "details": details, "status": "Sucesso"}
+
+    def _spool(self, file: UploadFile) -> str:
+        """Copia o upload para um arquivo temporário próprio (o do Starlette é fechado ao fim da requisição)."""
+        file.file.seek(0)
+        with tempfile.NamedTemporaryFile(prefix="upload-", dir=self.spool_dir, delete=False) as spool:
+            shutil.copyfileobj(file.file, spool, 1024 * 1024)
+            return spool.name
+
+    async def get_status(self, token, job_id):
+        _, user_id = await TokenService.authenticate_user(token)
+        item = await self.db_repo.get_video(job_id)
+        if item is None or item.get("ID_USUARIO") != user_id:
+            raise HTTPException(status_code=404, detail="Upload não encontrado")
+        return {
+            "job_id": job_id,
+            "video": item.get("NOME_VIDEO"),
+            "status": item.get("STATUS_PROCESSAMENTO"),
+            "url_download": item.get("URL_DOWNLOAD", "")
+        }
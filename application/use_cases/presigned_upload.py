@@ -0,0 +1,121 @@
+import logging
+import os
+import time
+
+from fastapi import HTTPException
+
+from domain.entities.video import Video
+from infrastructure.logging.logging_config import setup_logging
+from application.services.token_service import TokenService
+from application.services.video_validation import MAX_VIDEO_SIZE, ALLOWED_CONTENT_TYPES
+from adapters.repository.s3_repository import S3Repository
+from adapters.repository.db_repository import DBRepository
+
+# Validade da reserva do nome enquanto o cliente envia e conclui o upload (o dobro da validade
+# padrão das URLs); expirada, o nome volta a ficar livre para o usuário
+DEFAULT_PRESIGNED_RESERVATION_TTL_SECONDS = 7200
+
+
+class PresignedUploadUseCase:
+    """
+    Upload direto ao S3: a API apenas valida o pedido e emite URLs pré-assinadas; os bytes do
+    vídeo não passam pela aplicação. Na conclusão, o objeto é verificado e registrado.
+    """
+
+    def __init__(self, s3_repo: S3Repository, db_repo: DBRepository):
+        self.s3_repo = s3_repo
+        self.db_repo = db_repo
+        self.reservation_ttl = int(
+            os.getenv("PRESIGNED_RESERVATION_TTL_SECONDS", DEFAULT_PRESIGNED_RESERVATION_TTL_SECONDS)
+        )
+        setup_logging()
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def _validate(content_type, file_size):
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            return f"Tipo de mídia inválido: {content_type}"
+        if file_size > MAX_VIDEO_SIZE:
+            return "Tamanho máximo permitido é 50MB"
+        return None
+
+    async def start(self, token, file_name, content_type, file_size):
+        _, user_id = await TokenService.authenticate_user(token)
+
+        error = self._validate(content_type, file_size)
+        if error:
+            self.logger.error(f"Upload do vídeo {file_name} recusado: {error}")
+            raise HTTPException(status_code=400, detail=error)
+
+        try:
+            await self.db_repo.reserve_video_name(user_id, file_name, expires_at=time.time() + self.reservation_ttl)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        file_key = self.s3_repo.build_file_key(user_id, file_name)
+        try:
+            upload = await self.s3_repo.create_presigned_upload(file_key, content_type, file_size)
+        except Exception:
+            await self.db_repo.release_video_name(user_id, file_name)
+            raise
+
+        self.logger.info(f"URLs de upload direto emitidas para o vídeo {file_name} ({upload['mode']}).")
+        return {"video": file_name, **upload}
+
+    async def complete(self, token, file_name, upload_id=None, parts=None):
+        user_email, user_id = await TokenService.authenticate_user(token)
+        file_key = self.s3_repo.build_file_key(user_id, file_name)
+
+        if upload_id:
+            try:
+                await self.s3_repo.complete_multipart_upload(file_key, upload_id, [
+                    {"PartNumber": part["part_number"], "ETag": part["etag"]} for part in parts or []
+                ])
+            except Exception as e:
+                self.logger.error(f"Erro ao concluir upload multipart do vídeo {file_name}: {str(e)}")
+                await self._abort(file_key, upload_id)
+                await self.db_repo.release_video_name(user_id, file_name)
+                raise HTTPException(status_code=400, detail=f"Não foi possível concluir o upload: {str(e)}")
+
+        metadata = await self.s3_repo.get_video_metadata(file_key)
+        if metadata is None:
+            raise HTTPException(status_code=404, detail="Vídeo não encontrado no S3. Envie o arquivo antes de concluir.")
+
+        error = self._validate(metadata["content_type"], metadata["size"])
+        if error:
+            self.logger.error(f"Vídeo {file_name} enviado ao S3 é inválido: {error}")
+            await self.s3_repo.delete_video(file_key)
+            await self.db_repo.release_video_name(user_id, file_name)
+            raise HTTPException(status_code=400, detail=error)
+
+        # Garante que cada upload seja registrado uma única vez
+        try:
+            await self.db_repo.complete_reservation(user_id, file_name)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        video = Video(
+            file_name=file_name,
+            file_size=metadata["size"],
+            user_email=user_email,
+            user_id=user_id,
+            path_s3=file_key
+        )
+        try:
+            await self.db_repo.register_video(video)
+        except Exception:
+            await self.db_repo.reopen_reservation(user_id, file_name, expires_at=time.time() + self.reservation_ttl)
+            raise
+
+        return {
+            "video": file_name,
+            "details": f"Nome: {file_name}, Tamanho: {(metadata['size'] / (1024 * 1024)):.2f} MB, Usuário: {user_email}",
+            "status": "Sucesso"
+        }
+
+    async def _abort(self, file_key, upload_id):
+        """Descarta as partes já enviadas de um upload multipart que não pôde ser concluído."""
+        try:
+            await self.s3_repo.abort_multipart_upload(file_key, upload_id)
+        except Exception as e:
+            self.logger.error(f"Erro ao abortar upload multipart {upload_id}: {str(e)}")
@@ -0,0 +1,67 @@
+import base64
+import binascii
+import json
+import logging
+
+from fastapi import HTTPException
+
+from infrastructure.logging.logging_config import setup_logging
+from application.services.token_service import TokenService
+from adapters.repository.db_repository import DBRepository, USER_VIDEOS_INDEX_ATTRIBUTES
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class QueryVideosUseCase:
+    """
+    Consulta dos vídeos do usuário autenticado. A listagem usa o índice por usuário (uma Query
+    paginada, sem Scan) e o cursor devolvido ao cliente é a LastEvaluatedKey codificada.
+    """
+
+    def __init__(self, db_repo: DBRepository):
+        self.db_repo = db_repo
+        setup_logging()
+        self.logger = logging.getLogger(__name__)
+
+    async def list(self, token, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        _, user_id = await TokenService.authenticate_user(token)
+        start_key = self._decode_cursor(cursor, user_id) if cursor else None
+
+        items, last_key = await self.db_repo.list_user_videos(user_id, limit, start_key)
+        return {
+            "videos": [self._to_response(item) for item in items],
+            "next_cursor": self._encode_cursor(last_key) if last_key else None
+        }
+
+    async def get(self, token, video_id):
+        _, user_id = await TokenService.authenticate_user(token)
+        item = await self.db_repo.get_video(video_id, attributes=["ID_USUARIO", "CRIADO_EM", *USER_VIDEOS_INDEX_ATTRIBUTES])
+        if item is None or item.get("ID_USUARIO") != user_id:
+            raise HTTPException(status_code=404, detail="Vídeo não encontrado")
+        return self._to_response(item)
+
+    @staticmethod
+    def _to_response(item):
+        return {
+            "id": item["id"],
+            "video": item.get("NOME_VIDEO"),
+            "status": item.get("STATUS_PROCESSAMENTO"),
+            "url_download": item.get("URL_DOWNLOAD", ""),
+            "created_at": item.get("CRIADO_EM")
+        }
+
+    @staticmethod
+    def _encode_cursor(last_key):
+        return base64.urlsafe_b64encode(json.dumps(last_key, separators=(",", ":")).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor, user_id):
+        """Decodifica o cursor, recusando cursores inválidos ou de outro usuário."""
+        try:
+            start_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        if not isinstance(start_key, dict) or start_key.get("ID_USUARIO") != user_id:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        return start_key
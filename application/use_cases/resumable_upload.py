@@ -0,0 +1,239 @@
+import logging
+import os
+import time
+import uuid
+
+from fastapi import HTTPException
+
+from domain.entities.video import Video
+from infrastructure.logging.logging_config import setup_logging
+from application.services.token_service import TokenService
+from application.services.upload_scheduler import UploadCapacityExceeded, UploadScheduler, get_upload_scheduler
+from application.services.video_validation import ALLOWED_CONTENT_TYPES, SNIFF_BYTES, matches_content_type
+from adapters.repository.s3_repository import S3Repository
+from adapters.repository.db_repository import DBRepository
+
+DEFAULT_RESUMABLE_MAX_VIDEO_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+DEFAULT_RESUMABLE_SESSION_TTL_SECONDS = 24 * 60 * 60
+
+
+class ResumableUploadUseCase:
+    """
+    Upload retomável em blocos (no estilo do protocolo tus). Cada sessão corresponde a um upload
+    multipart no S3 e a um registro no DynamoDB com o offset já recebido; após uma queda de
+    conexão, o cliente consulta o offset e reenvia apenas os bytes que faltam.
+
+    Os bytes são aceitos em partes de `part_size`: um bloco que termina no meio de uma parte
+    (exceto a última) tem o trecho incompleto descartado, e o offset retornado indica de onde
+    o cliente deve continuar.
+    """
+
+    def __init__(self, s3_repo: S3Repository, db_repo: DBRepository, scheduler: UploadScheduler | None = None):
+        self.s3_repo = s3_repo
+        self.db_repo = db_repo
+        self.scheduler = scheduler or get_upload_scheduler()
+        self.max_video_size = int(os.getenv("RESUMABLE_MAX_VIDEO_SIZE", DEFAULT_RESUMABLE_MAX_VIDEO_SIZE))
+        self.session_ttl = int(os.getenv("RESUMABLE_SESSION_TTL_SECONDS", DEFAULT_RESUMABLE_SESSION_TTL_SECONDS))
+        setup_logging()
+        self.logger = logging.getLogger(__name__)
+
+    async def _get_open_session(self, token, session_id):
+        _, user_id = await TokenService.authenticate_user(token)
+        session = await self.db_repo.get_upload_session(session_id)
+        if session is None or session["USUARIO_SESSAO"] != user_id:
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+        if session["STATUS_SESSAO"] != "ABERTA":
+            raise HTTPException(status_code=410, detail="Sessão de upload encerrada")
+        if session["EXPIRA_EM"] < time.time():
+            await self._discard(session, "EXPIRADA")
+            raise HTTPException(status_code=410, detail="Sessão de upload expirada")
+        return session
+
+    async def _discard(self, session, status, object_created=False):
+        """
+        Encerra a sessão com `status` e desfaz o que ela reservou: as partes (ou o objeto, se o
+        upload multipart já foi concluído) no S3 e o nome do vídeo.
+        """
+        try:
+            await self.db_repo.close_upload_session(session["session_id"], status)
+        except ValueError:
+            return  # outra requisição já encerrou a sessão
+        try:
+            if object_created:
+                await self.s3_repo.delete_video(session["PATH_S3"])
+            else:
+                await self.s3_repo.abort_multipart_upload(session["PATH_S3"], session["UPLOAD_ID"])
+        except Exception as e:
+            self.logger.error(f"Erro ao descartar o upload da sessão {session['session_id']}: {str(e)}")
+        await self.db_repo.release_video_name(
+            session["USUARIO_SESSAO"], session["NOME_VIDEO"], owner=session["session_id"]
+        )
+        self.logger.info(f"Sessão de upload {session['session_id']} encerrada como {status}.")
+
+    async def create(self, token, file_name, content_type, file_size):
+        user_email, user_id = await TokenService.authenticate_user(token)
+
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise HTTPException(status_code=415, detail=f"Tipo de mídia inválido: {content_type}")
+        if file_size > self.max_video_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Tamanho máximo permitido é {self.max_video_size // (1024 * 1024)}MB"
+            )
+
+        # A reserva do nome expira junto com a sessão
+        expires_at = int(time.time()) + self.session_ttl
+        session_id = uuid.uuid4().hex
+        try:
+            await self.db_repo.reserve_video_name(user_id, file_name, expires_at=expires_at, owner=session_id)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        file_key = self.s3_repo.build_file_key(user_id, file_name)
+        try:
+            upload_id = await self.s3_repo.create_multipart_upload(file_key, content_type)
+            session = {
+                "session_id": session_id,
+                "USUARIO_SESSAO": user_id,
+                "EMAIL": user_email,
+                "NOME_VIDEO": file_name,
+                "CONTENT_TYPE": content_type,
+                "TAMANHO_TOTAL": file_size,
+                "TAMANHO_PARTE": self.s3_repo.part_size,
+                "OFFSET_ATUAL": 0,
+                "UPLOAD_ID": upload_id,
+                "PATH_S3": file_key,
+                "PARTES": [],
+                "STATUS_SESSAO": "ABERTA",
+                "EXPIRA_EM": expires_at
+            }
+            await self.db_repo.create_upload_session(session)
+        except Exception:
+            await self.db_repo.release_video_name(user_id, file_name, owner=session_id)
+            raise
+
+        self.logger.info(f"Sessão de upload {session['session_id']} criada para o vídeo {file_name}.")
+        return session
+
+    async def get_session(self, token, session_id):
+        return await self._get_open_session(token, session_id)
+
+    async def append(self, token, session_id, offset, chunks):
+        """
+        Recebe um bloco a partir de `offset` (deve ser o offset atual da sessão) e envia ao S3
+        cada parte completa. Retorna a sessão com o novo offset.
+        """
+        session = await self._get_open_session(token, session_id)
+        current_offset = session["OFFSET_ATUAL"]
+        if offset != current_offset:
+            raise HTTPException(status_code=409, detail=f"Offset inválido; offset atual: {current_offset}")
+
+        part_size = session["TAMANHO_PARTE"]
+        total_size = session["TAMANHO_TOTAL"]
+        buffer = bytearray()
+
+        async def flush_part(body):
+            nonlocal current_offset
+            if current_offset == 0 and not matches_content_type(session["CONTENT_TYPE"], body[:SNIFF_BYTES]):
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"Conteúdo do arquivo não corresponde a {session['CONTENT_TYPE']}"
+                )
+            part_number = current_offset // part_size + 1
+            part = await self.s3_repo.upload_part(session["PATH_S3"], session["UPLOAD_ID"], part_number, body)
+            new_offset = current_offset + len(body)
+            try:
+                await self.db_repo.append_upload_part(session_id, current_offset, new_offset, part)
+            except ValueError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            current_offset = new_offset
+
+        # Cada bloco mantém no máximo uma parte em memória e uma transferência ativa ao S3
+        try:
+            async with self.scheduler.reserve(part_size):
+                async for chunk in chunks:
+                    if current_offset + len(buffer) + len(chunk) > total_size:
+                        raise HTTPException(status_code=413, detail="Bloco ultrapassa o tamanho declarado do vídeo")
+                    buffer += chunk
+                    while len(buffer) >= part_size:
+                        await flush_part(bytes(memoryview(buffer)[:part_size]))
+                        del buffer[:part_size]
+
+                # A última parte pode ser menor que part_size
+                if buffer and current_offset + len(buffer) == total_size:
+                    await flush_part(bytes(buffer))
+                elif buffer:
+                    self.logger.info(f"Sessão {session_id}: {len(buffer)} bytes de parte incompleta descartados.")
+        except UploadCapacityExceeded as e:
+            raise HTTPException(
+                status_code=429,
+                detail="Capacidade de upload esgotada, tente novamente mais tarde",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
+        session["OFFSET_ATUAL"] = current_offset
+        return session
+
+    async def complete(self, token, session_id):
+        """
+        Conclui o upload multipart e registra o vídeo; a sessão só é encerrada depois disso. Se a
+        conclusão no S3 falhar, a sessão continua aberta (com as partes) para uma nova tentativa;
+        se o registro falhar, o objeto é removido, o nome liberado e a sessão cancelada.
+        """
+        session = await self._get_open_session(token, session_id)
+        if session["OFFSET_ATUAL"] != session["TAMANHO_TOTAL"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incompleto: {session['OFFSET_ATUAL']} de {session['TAMANHO_TOTAL']} bytes recebidos"
+            )
+
+        user_id = session["USUARIO_SESSAO"]
+        file_name = session["NOME_VIDEO"]
+        # Garante uma única conclusão mesmo com requisições concorrentes
+        try:
+            await self.db_repo.complete_reservation(user_id, file_name)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        try:
+            await self.s3_repo.complete_multipart_upload(session["PATH_S3"], session["UPLOAD_ID"], session["PARTES"])
+        except Exception:
+            await self.db_repo.reopen_reservation(user_id, file_name, expires_at=session["EXPIRA_EM"])
+            raise
+
+        video = Video(
+            file_name=file_name,
+            file_size=session["TAMANHO_TOTAL"],
+            user_email=session["EMAIL"],
+            user_id=user_id,
+            path_s3=session["PATH_S3"]
+        )
+        try:
+            await self.db_repo.register_video(video)
+        except Exception:
+            await self._discard(session, "CANCELADA", object_created=True)
+            raise
+
+        try:
+            await self.db_repo.close_upload_session(session_id, "CONCLUIDA")
+        except ValueError:
+            self.logger.warning(f"Sessão de upload {session_id} já encerrada; vídeo {file_name} registrado.")
+
+        self.logger.info(f"Sessão de upload {session_id} concluída.")
+        return {
+            "video": file_name,
+            "details": f"Nome: {file_name}, Tamanho: {(session['TAMANHO_TOTAL'] / (1024 * 1024)):.2f} MB, "
+                       f"Usuário: {session['EMAIL']}",
+            "status": "Sucesso"
+        }
+
+    async def cancel(self, token, session_id):
+        session = await self._get_open_session(token, session_id)
+        try:
+            await self.db_repo.close_upload_session(session_id, "CANCELADA")
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        await self.s3_repo.abort_multipart_upload(session["PATH_S3"], session["UPLOAD_ID"])
+        await self.db_repo.release_video_name(session["USUARIO_SESSAO"], session["NOME_VIDEO"], owner=session_id)
+        self.logger.info(f"Sessão de upload {session_id} cancelada.")
@@ -1,84 +1,107 @@
 import asyncio
 import logging
+import os
 
 from fastapi import HTTPException, UploadFile
-from domain.entities.video import Video
+from domain.entities.video import Video, VideoPayload
 from infrastructure.logging.logging_config import setup_logging
+from application.services.registration_batcher import RegistrationBatcher
 from application.services.token_service import TokenService
+from application.services.upload_scheduler import UploadCapacityExceeded, UploadScheduler, get_upload_scheduler
+from application.services.video_validation import MAX_VIDEO_SIZE, MAX_FILES_PER_REQUEST, ALLOWED_CONTENT_TYPES
 from adapters.repository.s3_repository import S3Repository
 from adapters.repository.db_repository import DBRepository
+from infrastructure.metrics.metrics import DEDUP_SKIPPED_BYTES
+
+# Armazenamento por conteúdo: vídeos com o mesmo SHA-256 compartilham um único objeto no S3
+CONTENT_ADDRESSED_STORAGE = os.getenv("S3_CONTENT_ADDRESSED_STORAGE", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+
+async def release_blob_reference(s3_repo: S3Repository, db_repo: DBRepository, checksum_sha256: str):
+    """
+    Remove uma referência ao blob do conteúdo; se era a última, apaga o objeto do S3 e o item
+    BLOB#. Uma falha no S3 só deixa o objeto órfão (registrado no log), sem bloquear novos envios.
+    """
+    path_s3 = await db_repo.release_blob(checksum_sha256)
+    if path_s3 is None:
+        return
+    try:
+        await s3_repo.delete_video(path_s3)
+        logger.info(f"Blob {path_s3} sem referências removido do S3.")
+    except Exception as e:
+        logger.error(f"Erro ao apagar o blob {path_s3} do S3: {str(e)}")
+    await db_repo.delete_blob(checksum_sha256)
 
 
 class UploadVideoUseCase:
-    def __init__(self, s3_repo: S3Repository, db_repo: DBRepository):
+    def __init__(self, s3_repo: S3Repository, db_repo: DBRepository, scheduler: UploadScheduler | None = None,
+                 content_addressed: bool | None = None):
         self.s3_repo = s3_repo
         self.db_repo = db_repo
+        self.scheduler = scheduler or get_upload_scheduler()
+        self.content_addressed = CONTENT_ADDRESSED_STORAGE if content_addressed is None else content_addressed
         setup_logging()
         self.logger = logging.getLogger(__name__)
 
-    async def execute(self, files: list[UploadFile], token):
+    async def execute(self, files: list[UploadFile], token, checksums: list[str] | None = None,
+                      part_checksums: list[tuple[str, ...] | None] | None = None):
+        """
+        checksums: SHA-256 (hex) de cada arquivo, na mesma ordem de `files`, calculados durante o
+        recebimento do corpo. Quando informados, o mesmo conteúdo já enviado pelo usuário (com
+        qualquer nome) é recusado sem novo envio ao S3.
+        part_checksums: SHA-256 (base64) das partes de cada arquivo, calculados no mesmo passo e
+        enviados ao S3 sem novo cálculo.
+        """
         try:
-            user_email, user_id = TokenService.extract_user_email_and_user_id(token)
-
-            if not user_email:
-                self.logger.error("E-mail não encontrado no Token.")
-                raise HTTPException(status_code=403, detail="E-mail não encontrado no Token")
-            if not user_id:
-                self.logger.error("Usuário não encontrado no Token.")
-                raise HTTPException(status_code=403, detail="Usuário não encontrado no Token")
-
-            self.logger.info("Files recebidos para upload: %s", files)
-            if not isinstance(files, list):
-                files = [files]
-            if len(files) > 5:
-                self.logger.error("Máximo de 5 vídeos permitidos.")
-                raise HTTPException(status_code=400, detail="Máximo de 5 vídeos permitidos")
-            if not files:
-                self.logger.error("Não há arquivos para upload.")
-                raise HTTPException(status_code=400, detail="Não há arquivos para upload.")
-
-            async def process_video(file: UploadFile):
-                global file_size
+            user_email, user_id = await TokenService.authenticate_user(token)
+            files = self._validate_files(files)
+            if checksums is not None and len(checksums) != len(files):
+                checksums = None
+            if part_checksums is not None and len(part_checksums) != len(files):
+                part_checksums = None
+
+            # Registros no DynamoDB agrupados em BatchWriteItem, gravados conforme os uploads terminam
+            registrations = RegistrationBatcher(self.db_repo, expected=len(files))
+            pending_registrations = []
+
+            async def process_video(file: UploadFile, checksum_sha256: str | None, file_part_checksums=None):
+                file_size = 0
+                registered = False
                 try:
-                    content = await file.read()
-                    file_size = len(content)
-
-                    max_size = 50 * 1024 * 1024  # 50MB
-                    if file_size > max_size:
-                        self.logger.error(f"Tamanho do vídeo {file.filename} excede 50MB.")
-                        return {
-                            "video": file.filename,
-                            "details": f"Nome: {file.filename}, Tamanho: {(file_size / (1024 * 1024)):.2f} MB",
-                            "status": "Erro: Tamanho máximo permitido é 50MB"
-                        }
-
-                    allowed_types = ["video/mp4", "video/mpeg", "video/quicktime"]
-                    if file.content_type not in allowed_types:
-                        self.logger.error(f"Tipo de mídia inválido: {file.content_type}")
-                        return {
-                            "video": file.filename,
-                            "details": f"Nome: {file.filename}, Tamanho: {(file_size / (1024 * 1024)):.2f} MB",
-                            "status": f"Erro: Tipo de mídia inválido: {file.content_type}"
-                        }
+                    file_size = self._get_file_size(file)
+                    invalid = self._validate_file(file, file_size)
+                    if invalid:
+                        return invalid
 
                     video = Video(
                         file_name=file.filename,
                         file_size=file_size,
-                        content=content,
                         user_email=user_email,
                         user_id=user_id,
-                        path_s3=""
+                        path_s3=self.s3_repo.build_file_key(user_id, file.filename),
+                        checksum_sha256=checksum_sha256,
+                        part_checksums=file_part_checksums,
+                        payload=VideoPayload.from_stream(file)
                     )
 
                     self.logger.info(f"Processando vídeo: {video.file_name}")
-                    await self.s3_repo.upload_video(video)
-                    await self.db_repo.register_video(video)
-
-                    return {
+                    await self._reserve(video)
+                    try:
+                        video = await self._store(video)
+                    except Exception:
+                        await self._release(video)
+                        raise
+
+                    response = {
                         "video": file.filename,
                         "details": f"Nome: {file.filename}, Tamanho: {(file_size / (1024 * 1024)):.2f} MB, Usuário: {user_email}",
                         "status": "Sucesso"
                     }
+                    pending_registrations.append((response, video, registrations.add(video)))
+                    registered = True
+                    return response
 
                 except Exception as e:
                     self.logger.error(f"Erro ao processar o vídeo {file.filename}: {str(e)}")
@@ -87,11 +110,39 @@ class UploadVideoUseCase:
                         "details": f"Nome: {file.filename}, Tamanho: {(file_size / (1024 * 1024)):.2f} MB, Usuário: {user_email}",
                         "status": f"Erro: {str(e)}"
                     }
+                finally:
+                    if not registered:
+                        registrations.discard()
+
+            # A capacidade é reservada para a requisição inteira: ou todos os arquivos entram, ou
+            # nenhum é processado e o cliente recebe 429 com Retry-After
+            total_size = sum(self._get_file_size(file) for file in files)
+            async with self.scheduler.reserve(total_size, transfers=len(files)):
+                video_responses = await asyncio.gather(*[
+                    process_video(
+                        file,
+                        checksums[index] if checksums else None,
+                        part_checksums[index] if part_checksums else None
+                    )
+                    for index, file in enumerate(files)
+                ])
 
-            video_responses = await asyncio.gather(*[process_video(file) for file in files])
+            await registrations.flush()
+            for response, video, registration in pending_registrations:
+                error = registration.exception()
+                if error is not None:
+                    self.logger.error(f"Erro ao registrar o vídeo {response['video']}: {str(error)}")
+                    response["status"] = f"Erro: {str(error)}"
+                    await self._release(video, stored=True)
 
             return video_responses
 
+        except UploadCapacityExceeded as e:
+            raise HTTPException(
+                status_code=429,
+                detail="Capacidade de upload esgotada, tente novamente mais tarde",
+                headers={"Retry-After": str(e.retry_after)}
+            )
         except HTTPException as http_exc:
             # Relevante para retornar o status code correto
             self.logger.error(f"Erro específico na execução do upload: {http_exc.detail}")
@@ -99,3 +150,106 @@ class UploadVideoUseCase:
         except Exception as e:
             self.logger.error(f"Erro geral na execução do upload: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
+
+    async def _reserve(self, video: Video, expires_at: float | None = None):
+        """
+        Reserva o nome e, quando conhecido, o conteúdo (SHA-256) do vídeo para o usuário; com
+        `expires_at`, as reservas não concluídas até lá deixam de valer.
+        """
+        await self.db_repo.reserve_video_name(video.user_id, video.file_name, expires_at=expires_at)
+        if video.checksum_sha256:
+            try:
+                await self.db_repo.reserve_content(
+                    video.user_id, video.checksum_sha256, video.file_name, expires_at=expires_at
+                )
+            except Exception:
+                await self.db_repo.release_video_name(video.user_id, video.file_name)
+                raise
+
+    async def _release(self, video: Video, stored: bool = False):
+        """Desfaz as reservas do vídeo e, se ele já foi armazenado como blob, a referência ao blob."""
+        await self.db_repo.release_video_name(video.user_id, video.file_name)
+        if video.checksum_sha256:
+            await self.db_repo.release_content(video.user_id, video.checksum_sha256)
+        if stored and self._uses_blob(video):
+            await release_blob_reference(self.s3_repo, self.db_repo, video.checksum_sha256)
+
+    def _uses_blob(self, video: Video) -> bool:
+        return self.content_addressed and bool(video.checksum_sha256)
+
+    async def _store(self, video: Video) -> Video:
+        """
+        Envia o vídeo ao S3 e retorna o vídeo com o PATH_S3 final. No armazenamento por conteúdo,
+        o vídeo aponta para o blob do seu SHA-256 e o envio é pulado quando o blob já existe.
+        """
+        if not self._uses_blob(video):
+            await self.s3_repo.upload_video(video)
+            return video
+
+        video = self._as_blob(video)
+        if await self._acquire_blob(video):
+            return video
+        try:
+            await self.s3_repo.upload_video(video)
+            await self.db_repo.mark_blob_available(video.checksum_sha256)
+        except Exception:
+            await release_blob_reference(self.s3_repo, self.db_repo, video.checksum_sha256)
+            raise
+        return video
+
+    def _as_blob(self, video: Video) -> Video:
+        return video.with_changes(path_s3=self.s3_repo.build_blob_key(video.checksum_sha256))
+
+    async def _acquire_blob(self, video: Video) -> bool:
+        """Referencia o blob do vídeo; retorna True quando ele já existe no S3 (sem envio)."""
+        available = await self.db_repo.acquire_blob(video.checksum_sha256, video.path_s3)
+        if available:
+            DEDUP_SKIPPED_BYTES.inc(video.file_size)
+            self.logger.info(f"Conteúdo de {video.file_name} já armazenado em {video.path_s3}; envio ao S3 dispensado.")
+        return available
+
+    def _validate_files(self, files) -> list[UploadFile]:
+        if not isinstance(files, list):
+            files = [files]
+        self.logger.info("%d arquivo(s) recebido(s) para upload.", len(files))
+        if len(files) > MAX_FILES_PER_REQUEST:
+            self.logger.error("Máximo de 5 vídeos permitidos.")
+            raise HTTPException(status_code=400, detail="Máximo de 5 vídeos permitidos")
+        if not files:
+            self.logger.error("Não há arquivos para upload.")
+            raise HTTPException(status_code=400, detail="Não há arquivos para upload.")
+        return files
+
+    def _validate_file(self, file: UploadFile, file_size: int) -> dict | None:
+        """Retorna a resposta de erro do arquivo, ou None se ele puder ser enviado."""
+        if file_size > MAX_VIDEO_SIZE:
+            self.logger.error(f"Tamanho do vídeo {file.filename} excede 50MB.")
+            return {
+                "video": file.filename,
+                "details": f"Nome: {file.filename}, Tamanho: {(file_size / (1024 * 1024)):.2f} MB",
+                "status": "Erro: Tamanho máximo permitido é 50MB"
+            }
+
+        if file.content_type not in ALLOWED_CONTENT_TYPES:
+            self.logger.error(f"Tipo de mídia inválido: {file.content_type}")
+            return {
+                "video": file.filename,
+                "details": f"Nome: {file.filename}, Tamanho: {(file_size / (1024 * 1024)):.2f} MB",
+                "status": f"Erro: Tipo de mídia inválido: {file.content_type}"
+            }
+        return None
+
+    @staticmethod
+    def _get_file_size(file: UploadFile) -> int:
+        """
+        Obtém o tamanho do arquivo sem carregá-lo em memória. O Starlette já informa o tamanho
+        após o parsing do multipart; caso contrário, mede o arquivo temporário via seek.
+        """
+        size = getattr(file, "size", None)
+        if size is not None:
+            return size
+
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+        file.file.seek(0)
+        return size
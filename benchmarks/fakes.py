@@ -0,0 +1,179 @@
+"""
+Substitutos em memória do S3 e do DynamoDB para o benchmark. Implementam apenas as operações
+usadas pelos repositórios e entram pelo mesmo ponto de extensão da aplicação (o client registry),
+de modo que S3Repository e DBRepository são exercitados sem alterações.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from botocore.exceptions import ClientError
+
+from infrastructure.aws.credentials_provider import AWSCredentials
+from adapters.repository.db_repository import USER_VIDEOS_INDEX, TTL_ATTRIBUTE
+
+
+class StaticCredentialsProvider:
+    async def get_credentials(self):
+        return AWSCredentials("bench", "bench")
+
+    def get_credentials_sync(self):
+        return AWSCredentials("bench", "bench")
+
+
+# Bloco lido por requisição pelo aiohttp ao enviar corpos file-like
+HTTP_CHUNK_SIZE = 64 * 1024
+
+
+class FakeS3Client:
+    """Cliente S3 assíncrono que descarta o conteúdo e guarda apenas o tamanho de cada objeto."""
+
+    def __init__(self, latency_seconds=0.0, bandwidth_bytes_per_second=None):
+        self.latency_seconds = latency_seconds
+        self.bandwidth_bytes_per_second = bandwidth_bytes_per_second
+        self.objects = {}
+        self._uploads = {}
+
+    async def _transfer(self, nbytes=0):
+        delay = self.latency_seconds
+        if self.bandwidth_bytes_per_second:
+            delay += nbytes / self.bandwidth_bytes_per_second
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _consume(body):
+        """Lê corpos file-like em blocos, como o cliente HTTP faria; devolve o tamanho enviado."""
+        if not hasattr(body, "read"):
+            return len(body)
+        size = 0
+        while chunk := body.read(HTTP_CHUNK_SIZE):
+            size += len(chunk)
+        return size
+
+    async def put_object(self, Bucket, Key, Body, **kwargs):
+        size = self._consume(Body)
+        await self._transfer(size)
+        self.objects[(Bucket, Key)] = size
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    async def create_multipart_upload(self, Bucket, Key, **kwargs):
+        await self._transfer()
+        upload_id = uuid.uuid4().hex
+        self._uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    async def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        size = self._consume(Body)
+        await self._transfer(size)
+        self._uploads[UploadId][PartNumber] = size
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        await self._transfer()
+        parts = self._uploads.pop(UploadId)
+        self.objects[(Bucket, Key)] = sum(parts.values())
+        return {}
+
+    async def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self._uploads.pop(UploadId, None)
+        return {}
+
+    async def list_buckets(self, **kwargs):
+        return {"Buckets": []}
+
+
+class FakeTable:
+    """Tabela DynamoDB síncrona (como o resource do boto3) com suporte às condições usadas pelo repositório."""
+
+    def __init__(self, name, latency_seconds=0.0):
+        self.name = name
+        self.latency_seconds = latency_seconds
+        self.items = {}
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def put_item(self, Item, ConditionExpression=None, **kwargs):
+        self._wait()
+        with self._lock:
+            if ConditionExpression == "attribute_not_exists(id)" and Item["id"] in self.items:
+                raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": ""}}, "PutItem")
+            self.items[Item["id"]] = dict(Item)
+        return {}
+
+    def delete_item(self, Key, **kwargs):
+        self._wait()
+        with self._lock:
+            self.items.pop(Key["id"], None)
+        return {}
+
+    def update_item(self, Key, **kwargs):
+        self._wait()
+        return {}
+
+    def get_item(self, Key, **kwargs):
+        self._wait()
+        with self._lock:
+            item = self.items.get(Key["id"])
+        return {"Item": dict(item)} if item else {}
+
+    def query(self, **kwargs):
+        self._wait()
+        return {"Items": []}
+
+
+class _FakeDynamoClient:
+    def describe_table(self, TableName):
+        return {"Table": {"TableName": TableName, "GlobalSecondaryIndexes": [{"IndexName": USER_VIDEOS_INDEX}]}}
+
+    def describe_time_to_live(self, TableName):
+        return {"TimeToLiveDescription": {"TimeToLiveStatus": "ENABLED", "AttributeName": TTL_ATTRIBUTE}}
+
+
+class _Meta:
+    def __init__(self):
+        self.client = _FakeDynamoClient()
+
+
+class FakeDynamoResource:
+    def __init__(self, latency_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.meta = _Meta()
+        self._tables = {}
+
+    def Table(self, name):
+        if name not in self._tables:
+            self._tables[name] = FakeTable(name, self.latency_seconds)
+        return self._tables[name]
+
+    def batch_write_item(self, RequestItems):
+        for table_name, requests in RequestItems.items():
+            table = self.Table(table_name)
+            table._wait()
+            with table._lock:
+                for request in requests:
+                    item = request["PutRequest"]["Item"]
+                    table.items[item["id"]] = dict(item)
+        return {"UnprocessedItems": {}}
+
+
+class FakeClientRegistry:
+    """Mesma interface do AWSClientRegistry, devolvendo os substitutos em memória."""
+
+    def __init__(self, s3_latency_seconds=0.0, s3_bandwidth_bytes_per_second=None, dynamodb_latency_seconds=0.0):
+        self.s3 = FakeS3Client(s3_latency_seconds, s3_bandwidth_bytes_per_second)
+        self.dynamodb_resource = FakeDynamoResource(dynamodb_latency_seconds)
+
+    @asynccontextmanager
+    async def s3_client(self, **client_kwargs):
+        yield self.s3
+
+    def get_dynamodb_resource(self, **resource_kwargs):
+        return self.dynamodb_resource
+
+    async def close(self):
+        pass
@@ -0,0 +1,106 @@
+"""
+Relatório de tempo de import da aplicação (principal componente do cold start da Lambda), a
+partir de `python -X importtime`. Cada medição roda em um interpretador novo.
+
+Também verifica que as dependências carregadas sob demanda (PyJWT, aioboto3/aiohttp, dotenv)
+não são importadas junto com `main`.
+
+Uso:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 10 --top 15
+    python -m benchmarks.import_time --compare benchmarks/import_time_baseline.json
+    python -m benchmarks.import_time --write-baseline benchmarks/import_time_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+DEFERRED_MODULES = ("jwt", "aioboto3", "aiohttp", "dotenv")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(output):
+    """Converte a saída de -X importtime em {módulo: (próprio_us, cumulativo_us)}."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_once(module):
+    script = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    env = dict(os.environ)
+    env.pop("AWS_LAMBDA_FUNCTION_NAME", None)  # sem pré-aquecimento: só o custo do import
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True, text=True, cwd=REPO_ROOT, env=env, check=True
+    )
+    return parse_importtime(completed.stderr), set(json.loads(completed.stdout.splitlines()[-1]))
+
+
+def run(module, runs):
+    totals = []
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        modules, loaded = measure_once(module)
+        totals.append(modules[module][1] / 1000)
+        samples.append(modules)
+    # Módulos de topo (sem ponto) ordenados pelo tempo cumulativo mediano
+    top_level = {name for name in samples[0] if "." not in name and name != module}
+    breakdown = sorted(
+        ((name, statistics.median(sample.get(name, (0, 0))[1] for sample in samples) / 1000) for name in top_level),
+        key=lambda item: item[1], reverse=True
+    )
+    return {
+        "module": module,
+        "runs": runs,
+        "import_ms_min": round(min(totals), 1),
+        "import_ms_median": round(statistics.median(totals), 1),
+        "top_level_ms": {name: round(value, 1) for name, value in breakdown},
+        "deferred_loaded": sorted(name for name in DEFERRED_MODULES if name in loaded)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de import da aplicação (cold start).")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Quantos módulos de topo listar")
+    parser.add_argument("--write-baseline", help="Grava o resultado como baseline")
+    parser.add_argument("--compare", help="Baseline para comparação; sai com código 1 se houver regressão")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Variação tolerada em relação ao baseline")
+    args = parser.parse_args(argv)
+
+    report = run(args.module, args.runs)
+    print(f"import {args.module}: mediana {report['import_ms_median']}ms, mínimo {report['import_ms_min']}ms "
+          f"({args.runs} execuções)")
+    for name, value in list(report["top_level_ms"].items())[:args.top]:
+        print(f"  {name:<30} {value:>8.1f}ms")
+
+    failures = [f"módulo carregado sob demanda foi importado: {name}" for name in report["deferred_loaded"]]
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as output:
+            json.dump({"meta": {"python": platform.python_version(), "platform": platform.platform()}, **report},
+                      output, indent=2)
+            output.write("\n")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if report["import_ms_min"] > baseline["import_ms_min"] * (1 + args.tolerance):
+            failures.append(f"import_ms_min {baseline['import_ms_min']} -> {report['import_ms_min']}")
+
+    for failure in failures:
+        print(f"REGRESSÃO {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""
+Benchmark do caminho de upload (`POST /upload`) contra substitutos locais do S3/DynamoDB.
+
+Varre quantidade de arquivos, tamanho e concorrência, reportando requisições/s, MB/s,
+latência p50/p95/p99 e pico de RSS. Os resultados podem ser gravados como baseline e
+comparados em execuções futuras para detectar regressões.
+
+Uso:
+    python -m benchmarks.upload_benchmark                        # in-process, fakes em memória
+    python -m benchmarks.upload_benchmark --transport uvicorn    # via HTTP real (uvicorn)
+    python -m benchmarks.upload_benchmark --backend moto         # S3/DynamoDB do moto (pip install "moto[server]")
+    python -m benchmarks.upload_benchmark --compare benchmarks/baseline.json
+    python -m benchmarks.upload_benchmark --write-baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import resource
+import socket
+import sys
+import threading
+import time
+import uuid
+from unittest.mock import patch
+
+import httpx
+
+MB = 1024 * 1024
+MP4_HEADER = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+MOTO_PORT = 4566  # DBRepository em modo dev aponta para localhost:4566
+
+# Métricas em que valores maiores são piores (as demais: maiores são melhores)
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")
+HIGHER_IS_BETTER = ("requests_per_second", "mb_per_second")
+
+
+async def authenticate_bench_user(token):
+    # Um usuário por token ("Bearer bench-<n>"): a reserva de conteúdo é por usuário
+    user_id = token.split()[-1]
+    return f"{user_id}@example.com", user_id
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Sem /proc (ex.: macOS): pico do processo inteiro (ru_maxrss em bytes no macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """Amostra o RSS periodicamente durante um cenário e guarda o pico."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self.peak = max(self.peak, current_rss_bytes())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.peak = current_rss_bytes()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def configure_app(backend, args):
+    """Prepara a aplicação com repositórios apontando para o backend escolhido."""
+    os.environ.setdefault("DYNAMODB_BOOTSTRAP_ON_STARTUP", "true")
+    # Os limites por usuário (e por IP, todas as requisições vêm do mesmo cliente) distorceriam a medição
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    import main
+    from adapters.repository.s3_repository import S3Repository
+    from adapters.repository.db_repository import DBRepository
+    from benchmarks.fakes import FakeClientRegistry, StaticCredentialsProvider
+
+    if backend == "fake":
+        registry = FakeClientRegistry(
+            s3_latency_seconds=args.s3_latency_ms / 1000,
+            s3_bandwidth_bytes_per_second=args.s3_bandwidth_mbps * MB if args.s3_bandwidth_mbps else None,
+            dynamodb_latency_seconds=args.dynamodb_latency_ms / 1000
+        )
+        cleanup = None
+    else:
+        registry, cleanup = start_moto_backend(main.S3_BUCKET_NAME)
+
+    main.app.state.s3_repo = S3Repository(
+        main.S3_BUCKET_NAME, client_registry=registry, credentials_provider=StaticCredentialsProvider()
+    )
+    main.app.state.db_repo = DBRepository(
+        main.DYNAMODB_TABLE_NAME, client_registry=registry, credentials_provider=StaticCredentialsProvider()
+    )
+    main.app.state.db_repo.ensure_table_exists()
+    return main.app, cleanup
+
+
+def start_moto_backend(bucket_name):
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        sys.exit('O backend "moto" requer o pacote moto: pip install "moto[server]"')
+    import boto3
+    from infrastructure.aws.client_registry import get_client_registry
+
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=MOTO_PORT)
+    server.start()
+    endpoint = f"http://127.0.0.1:{MOTO_PORT}"
+    os.environ.update({
+        "ENV": "dev", "ENDPOINT_URL": endpoint, "REGION_NAME": "us-east-1",
+        "AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench"
+    })
+    boto3.client("s3", endpoint_url=endpoint, region_name="us-east-1").create_bucket(Bucket=bucket_name)
+    return get_client_registry(), server.stop
+
+
+class UvicornServer:
+    """Executa a aplicação num uvicorn em thread própria, para medir também a pilha HTTP."""
+
+    def __init__(self, app):
+        import uvicorn
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def run_scenario(client, files, size_mb, concurrency, requests):
+    # Um conteúdo por posição na requisição, gerado uma vez: a reserva de conteúdo recusaria
+    # arquivos iguais na mesma requisição
+    payloads = [MP4_HEADER + bytes([index]) + bytes(size_mb * MB - len(MP4_HEADER) - 1) for index in range(files)]
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+
+    async def send_one():
+        nonlocal errors
+        # Um usuário por requisição: as reservas de nome e de conteúdo (por usuário) recusariam
+        # reenvios do mesmo vídeo, e reutilizar os payloads evita copiá-los a cada envio
+        request_files = [("file", (f"bench-{index}.mp4", payload, "video/mp4")) for index, payload in enumerate(payloads)]
+        token = f"Bearer bench-{uuid.uuid4().hex}"
+        started = time.perf_counter()
+        response = await client.post("/upload", files=request_files, headers={"authorization": token})
+        latencies.append(time.perf_counter() - started)
+        statuses = [detail.get("status") for detail in response.json().get("details", [])] \
+            if response.status_code == 200 else []
+        if response.status_code != 200 or any(status != "Sucesso" for status in statuses):
+            errors += 1
+
+    async def worker():
+        while next(counter) < requests:
+            await send_one()
+
+    sampler = RssSampler()
+    sampler.start()
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    await sampler.stop()
+
+    uploaded_mb = requests * files * size_mb
+    return {
+        "name": f"files={files},size_mb={size_mb},concurrency={concurrency}",
+        "files": files,
+        "size_mb": size_mb,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "requests_per_second": round(requests / elapsed, 2),
+        "mb_per_second": round(uploaded_mb / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_rss_mb": round(sampler.peak / MB, 1)
+    }
+
+
+async def run_benchmark(app, args):
+    results = []
+    scenarios = itertools.product(args.files, args.sizes_mb, args.concurrency)
+
+    async def sweep(client):
+        for files, size_mb, concurrency in scenarios:
+            result = await run_scenario(client, files, size_mb, concurrency, args.requests)
+            print(format_result(result), flush=True)
+            results.append(result)
+
+    timeout = httpx.Timeout(args.timeout)
+    if args.transport == "inprocess":
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     timeout=timeout) as client:
+            await sweep(client)
+    else:
+        with UvicornServer(app) as base_url:
+            async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+                await sweep(client)
+    return results
+
+
+def format_result(result):
+    return (
+        f"{result['name']:<40} {result['requests_per_second']:>8.2f} req/s {result['mb_per_second']:>9.2f} MB/s "
+        f"p50 {result['p50_ms']:>9.2f}ms p95 {result['p95_ms']:>9.2f}ms p99 {result['p99_ms']:>9.2f}ms "
+        f"rss {result['peak_rss_mb']:>7.1f}MB erros {result['errors']}"
+    )
+
+
+def compare(results, baseline, tolerance):
+    """Retorna as regressões (mensagens) em relação ao baseline, para os cenários em comum."""
+    baseline_by_name = {scenario["name"]: scenario for scenario in baseline["scenarios"]}
+    regressions = []
+    for result in results:
+        reference = baseline_by_name.get(result["name"])
+        if reference is None:
+            continue
+        if result["errors"] > reference["errors"]:
+            regressions.append(f"{result['name']}: erros {reference['errors']} -> {result['errors']}")
+        for metric in HIGHER_IS_BETTER:
+            if result[metric] < reference[metric] * (1 - tolerance):
+                regressions.append(f"{result['name']}: {metric} {reference[metric]} -> {result[metric]}")
+        for metric in LOWER_IS_BETTER:
+            if result[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{result['name']}: {metric} {reference[metric]} -> {result[metric]}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do POST /upload contra S3/DynamoDB locais.")
+    parser.add_argument("--backend", choices=("fake", "moto"), default="fake")
+    parser.add_argument("--transport", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--files", type=parse_int_list, default=[1, 5], help="Arquivos por requisição (1-5)")
+    parser.add_argument("--sizes-mb", type=parse_int_list, default=[1, 10, 50], help="Tamanho de cada arquivo (MB)")
+    parser.add_argument("--concurrency", type=parse_int_list, default=[1, 4], help="Requisições simultâneas")
+    parser.add_argument("--requests", type=int, default=8, help="Requisições por cenário")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout de cada requisição (s)")
+    parser.add_argument("--s3-latency-ms", type=float, default=0.0, help="Latência simulada por chamada ao S3 (fake)")
+    parser.add_argument("--s3-bandwidth-mbps", type=float, default=0.0, help="Banda simulada do S3 em MB/s (fake)")
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=0.0, help="Latência simulada do DynamoDB (fake)")
+    parser.add_argument("--log-level", default="WARNING", help="Nível de log da aplicação durante a medição")
+    parser.add_argument("--output", help="Grava os resultados em JSON")
+    parser.add_argument("--write-baseline", help="Grava os resultados como novo baseline")
+    parser.add_argument("--compare", help="Baseline para comparação; sai com código 1 se houver regressão")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Variação tolerada em relação ao baseline")
+    args = parser.parse_args(argv)
+
+    app, cleanup = configure_app(args.backend, args)
+    logging.getLogger().setLevel(args.log_level)
+    # Autenticação fora da medição: o benchmark isola o caminho de upload
+    token_patch = patch(
+        "application.services.token_service.TokenService.extract_user_email_and_user_id_async",
+        new=authenticate_bench_user
+    )
+    try:
+        with token_patch:
+            results = asyncio.run(run_benchmark(app, args))
+    finally:
+        if cleanup:
+            cleanup()
+
+    report = {
+        "meta": {
+            "backend": args.backend,
+            "transport": args.transport,
+            "requests_per_scenario": args.requests,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "scenarios": results
+    }
+    for path in filter(None, (args.output, args.write_baseline)):
+        with open(path, "w") as output:
+            json.dump(report, output, indent=2)
+            output.write("\n")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression}")
+        if regressions:
+            return 1
+        print("Sem regressões em relação ao baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+"""
+Provisionamento único dos recursos da aplicação (tabela DynamoDB). Cria a tabela ou, numa tabela
+existente, o índice de vídeos por usuário, aguarda o índice ficar ACTIVE e preenche CRIADO_EM nos
+registros antigos. Pode levar minutos: roda fora do startup da aplicação, e uma execução
+interrompida continua de onde parou.
+
+Uso:
+    python bootstrap.py --table fiapeatsdb
+"""
+import argparse
+import logging
+
+from adapters.repository.db_repository import DBRepository
+from infrastructure.logging.logging_config import setup_logging
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica/cria a tabela DynamoDB usada pela API.")
+    parser.add_argument("--table", default="fiapeatsdb", help="Nome da tabela DynamoDB")
+    parser.add_argument("--backfill-created-at", action="store_true",
+                        help="Refaz do início o preenchimento de CRIADO_EM, mesmo se já concluído")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    repository = DBRepository(args.table)
+    repository.ensure_table_exists()
+    repository.provision_user_videos_index()
+    repository.backfill_created_at(restart=args.backfill_created_at)
+    logging.getLogger(__name__).info(f"Bootstrap concluído para a tabela {args.table}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,79 @@
-from dataclasses import dataclass
+import io
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
 
 
-@dataclass
+class VideoPayload:
+    """
+    Handle para o conteúdo do vídeo, aberto apenas quando o upload vai ler os bytes. Guarda só a
+    referência ao stream recebido (ex.: UploadFile) ou o caminho de um arquivo temporário.
+    """
+
+    __slots__ = ("_stream", "_path")
+
+    def __init__(self, stream=None, path=None):
+        self._stream = stream
+        self._path = path
+
+    @classmethod
+    def from_stream(cls, stream):
+        return cls(stream=stream)
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(path=path)
+
+    @contextmanager
+    def open(self):
+        """
+        Produz o stream recebido (sem fechá-lo, pois pertence a quem o criou) ou o arquivo
+        temporário aberto em modo binário, fechado ao fim do bloco.
+        """
+        if self._path is None:
+            yield self._stream
+            return
+        with io.open(self._path, "rb") as stream:
+            yield stream
+
+    def __repr__(self):
+        return f"VideoPayload(path={self._path!r})" if self._path else "VideoPayload(stream)"
+
+
+@dataclass(frozen=True, slots=True)
 class Video:
-    def __init__(self, file_name, file_size, content, user_email,user_id, path_s3):
-        self.file_name = file_name
-        self.file_size = file_size
-        self.content = content
-        self.user_email = user_email
-        self.user_id = user_id
-        self_path_s3 = path_s3
-
-    def __str__(self):
-        return f"Video(file_name={self.file_name}, file_size={self.file_size}, content={self.content}, user_email={self.user_email}, user_id={self.user_id}, path_s3={self.path_s3})"
+    """
+    Metadados imutáveis de um vídeo. O conteúdo fica em `payload`, fora da comparação e da
+    representação em texto, para que o objeto seja pequeno e seguro para logs, filas e caches.
+    """
+
+    file_name: str
+    file_size: int
+    user_email: str
+    user_id: str
+    path_s3: str = ""
+    video_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    checksum_sha256: str | None = None
+    # SHA-256 (base64) de cada parte do upload multipart, calculados no recebimento do corpo
+    part_checksums: tuple[str, ...] | None = field(default=None, repr=False)
+    payload: VideoPayload | None = field(default=None, repr=False, compare=False)
+
+    def with_changes(self, **changes) -> "Video":
+        return replace(self, **changes)
+
+    def to_dynamo_item(self, status: str) -> dict:
+        """Item do registro do vídeo na tabela do DynamoDB."""
+        item = {
+            "id": self.video_id,
+            "ID_USUARIO": self.user_id,
+            "EMAIL": self.user_email,
+            "STATUS_PROCESSAMENTO": status,
+            "URL_DOWNLOAD": "",
+            "NOME_VIDEO": self.file_name,
+            "PATH_S3": self.path_s3,
+            "CRIADO_EM": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        }
+        if self.checksum_sha256:
+            item["CHECKSUM_SHA256"] = self.checksum_sha256
+        return item
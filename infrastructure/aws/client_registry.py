@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+import threading
+from contextlib import AsyncExitStack, asynccontextmanager
+
+import boto3
+
+from infrastructure.aws.resilience import botocore_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+# Parâmetros que mudam a cada renovação das credenciais: não fazem parte da chave do cache
+CREDENTIAL_KWARGS = ("aws_access_key_id", "aws_secret_access_key", "aws_session_token")
+
+
+def _split_credentials(kwargs):
+    """Separa a chave do cache (serviço/configuração) das credenciais usadas pelo cliente."""
+    key = tuple(sorted((name, value) for name, value in kwargs.items() if name not in CREDENTIAL_KWARGS))
+    return key, tuple(kwargs.get(name) for name in CREDENTIAL_KWARGS)
+
+
+class _SharedS3Client:
+    """Cliente S3 aberto com um conjunto de credenciais e quantos blocos o usam no momento."""
+
+    def __init__(self, credentials, client, exit_stack):
+        self.credentials = credentials
+        self.client = client
+        self.exit_stack = exit_stack
+        self.in_use = 0
+        self.retired = False
+
+
+class AWSClientRegistry:
+    """
+    Mantém os clientes AWS compartilhados pelo processo. Cada cliente é criado uma única vez
+    (por serviço e configuração) com seu próprio pool de conexões e reaproveitado entre
+    requisições e entre invocações "quentes" da Lambda. Quando as credenciais mudam, o cliente é
+    substituído e o antigo é fechado assim que deixa de ser usado.
+    """
+
+    def __init__(self, max_pool_connections: int | None = None):
+        self.max_pool_connections = max_pool_connections or int(
+            os.getenv("AWS_MAX_POOL_CONNECTIONS", DEFAULT_MAX_POOL_CONNECTIONS)
+        )
+        # aioboto3 (e aiohttp) só são importados quando o primeiro cliente S3 é criado
+        self._session = None
+        self._s3_clients = {}
+        # Clientes substituídos que ainda atendem blocos em andamento
+        self._retired_s3_clients = set()
+        self._dynamodb_resources = {}
+        self._loop = None
+        self._async_lock = None
+        self._thread_lock = threading.Lock()
+
+    def _client_config(self, service: str):
+        return botocore_config(service, max_pool_connections=self.max_pool_connections)
+
+    def _bind_to_running_loop(self):
+        """
+        Clientes aiobotocore ficam presos ao event loop em que foram criados. Se o loop mudar
+        (ex.: TestClient sem lifespan), os clientes antigos são descartados e recriados.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                logger.warning("Event loop alterado; recriando clientes S3 compartilhados.")
+            self._loop = loop
+            self._async_lock = asyncio.Lock()
+            self._s3_clients = {}
+            self._retired_s3_clients = set()
+
+    @asynccontextmanager
+    async def s3_client(self, **client_kwargs):
+        """
+        Empresta o cliente S3 assíncrono compartilhado para os parâmetros informados durante o
+        bloco; um cliente substituído por credenciais novas só é fechado quando o último bloco
+        que o usa termina.
+        """
+        shared = await self._acquire_s3_client(client_kwargs)
+        try:
+            yield shared.client
+        finally:
+            shared.in_use -= 1
+            if shared.retired and shared.in_use == 0:
+                await self._close_retired(shared)
+
+    async def _acquire_s3_client(self, client_kwargs) -> _SharedS3Client:
+        self._bind_to_running_loop()
+        key, credentials = _split_credentials(client_kwargs)
+        shared = self._s3_clients.get(key)
+        if shared is None or shared.credentials != credentials:
+            async with self._async_lock:
+                shared = self._s3_clients.get(key)
+                if shared is None or shared.credentials != credentials:
+                    previous = shared
+                    shared = self._s3_clients[key] = await self._open_s3_client(credentials, client_kwargs)
+                    if previous is not None:
+                        logger.info("Credenciais renovadas; substituindo o cliente S3 compartilhado.")
+                        previous.retired = True
+                        self._retired_s3_clients.add(previous)
+                        if previous.in_use == 0:
+                            await self._close_retired(previous)
+        shared.in_use += 1
+        return shared
+
+    async def _open_s3_client(self, credentials, client_kwargs) -> _SharedS3Client:
+        logger.info("Criando cliente S3 compartilhado.")
+        if self._session is None:
+            import aioboto3
+            self._session = aioboto3.Session()
+        exit_stack = AsyncExitStack()
+        client = await exit_stack.enter_async_context(
+            self._session.client("s3", config=self._client_config("s3"), **client_kwargs)
+        )
+        return _SharedS3Client(credentials, client, exit_stack)
+
+    async def _close_retired(self, shared: _SharedS3Client):
+        self._retired_s3_clients.discard(shared)
+        try:
+            await shared.exit_stack.aclose()
+        except Exception as e:
+            logger.warning(f"Falha ao fechar cliente S3 substituído: {str(e)}")
+
+    def get_dynamodb_resource(self, **resource_kwargs):
+        """
+        Retorna o resource DynamoDB (boto3) compartilhado para os parâmetros informados. Com
+        credenciais novas, o registry passa a entregar um resource novo; o antigo não é fechado
+        porque continua em uso pelo repositório que o recebeu e é liberado junto com ele.
+        """
+        key, credentials = _split_credentials(resource_kwargs)
+        cached = self._dynamodb_resources.get(key)
+        if cached is not None and cached[0] == credentials:
+            return cached[1]
+
+        with self._thread_lock:
+            cached = self._dynamodb_resources.get(key)
+            if cached is None or cached[0] != credentials:
+                logger.info("Criando resource DynamoDB compartilhado.")
+                resource = boto3.resource("dynamodb", config=self._client_config("dynamodb"), **resource_kwargs)
+                cached = self._dynamodb_resources[key] = (credentials, resource)
+        return cached[1]
+
+    async def close(self):
+        """Fecha todos os clientes e libera os pools de conexão."""
+        logger.info("Encerrando clientes AWS compartilhados.")
+        try:
+            async with AsyncExitStack() as exit_stack:
+                for shared in [*self._s3_clients.values(), *self._retired_s3_clients]:
+                    exit_stack.push_async_exit(shared.exit_stack)
+        finally:
+            for _, resource in self._dynamodb_resources.values():
+                resource.meta.client.close()
+            self._s3_clients = {}
+            self._retired_s3_clients = set()
+            self._dynamodb_resources = {}
+            self._loop = None
+            self._async_lock = None
+
+
+client_registry = AWSClientRegistry()
+
+
+def get_client_registry() -> AWSClientRegistry:
+    return client_registry
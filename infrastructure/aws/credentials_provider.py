@@ -0,0 +1,112 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import NamedTuple
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SECRET_ID = "my/aws/creds"
+DEFAULT_TTL_SECONDS = 900
+DEFAULT_REFRESH_MARGIN_SECONDS = 60
+
+
+class AWSCredentials(NamedTuple):
+    access_key_id: str
+    secret_access_key: str
+
+
+class SecretsCredentialsProvider:
+    """
+    Cache em memória das credenciais guardadas no Secrets Manager.
+
+    - As credenciais ficam válidas por `ttl_seconds`;
+    - dentro da margem de renovação, a renovação ocorre em background e as requisições seguem
+      usando as credenciais atuais;
+    - várias requisições concorrentes sem cache aguardam uma única chamada ao Secrets Manager.
+    """
+
+    def __init__(self, secret_id: str = DEFAULT_SECRET_ID, ttl_seconds: float | None = None,
+                 refresh_margin_seconds: float | None = None):
+        self.secret_id = secret_id
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("AWS_CREDENTIALS_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+        )
+        self.refresh_margin_seconds = refresh_margin_seconds if refresh_margin_seconds is not None else float(
+            os.getenv("AWS_CREDENTIALS_REFRESH_MARGIN_SECONDS", DEFAULT_REFRESH_MARGIN_SECONDS)
+        )
+        self._credentials = None
+        self._expires_at = 0.0
+        self._inflight = None
+        self._refresh_task = None
+
+    async def get_credentials(self) -> AWSCredentials:
+        now = time.monotonic()
+        if self._credentials is not None and now < self._expires_at:
+            if now >= self._expires_at - self.refresh_margin_seconds:
+                self._schedule_refresh()
+            return self._credentials
+        return await self._load_single_flight()
+
+    def get_credentials_sync(self) -> AWSCredentials:
+        """
+        Versão síncrona, para quem cria clientes boto3 fora do event loop (repositório DynamoDB,
+        Cognito, bootstrap): usa o cache e, sem credenciais válidas, busca no Secrets Manager.
+        """
+        if self.is_warm():
+            return self._credentials
+        return self._store(self._get_secret())
+
+    def is_warm(self) -> bool:
+        """Indica se há credenciais em cache ainda válidas."""
+        return self._credentials is not None and time.monotonic() < self._expires_at
+
+    def invalidate(self):
+        """Descarta o cache; a próxima chamada busca novamente no Secrets Manager."""
+        self._credentials = None
+        self._expires_at = 0.0
+
+    async def _load_single_flight(self) -> AWSCredentials:
+        loop = asyncio.get_running_loop()
+        if self._inflight is None or self._inflight.done() or self._inflight.get_loop() is not loop:
+            self._inflight = loop.create_task(self._load())
+        # shield: o cancelamento de uma requisição não cancela a busca compartilhada
+        return await asyncio.shield(self._inflight)
+
+    def _schedule_refresh(self):
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+
+    async def _refresh(self):
+        try:
+            await self._load_single_flight()
+        except Exception as e:
+            # As credenciais atuais continuam válidas até expirar
+            logger.warning(f"Falha ao renovar credenciais em background: {e}")
+
+    async def _load(self) -> AWSCredentials:
+        return self._store(await asyncio.to_thread(self._get_secret))
+
+    def _store(self, secret: dict) -> AWSCredentials:
+        # Os clientes recebem as credenciais explicitamente; nada é exportado para os.environ
+        credentials = AWSCredentials(secret["AWS_ACCESS_KEY_ID"], secret["AWS_SECRET_ACCESS_KEY"])
+        self._credentials = credentials
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        return credentials
+
+    def _get_secret(self) -> dict:
+        logger.info(f"Buscando credenciais no Secrets Manager ({self.secret_id}).")
+        client = boto3.client('secretsmanager')
+        response = client.get_secret_value(SecretId=self.secret_id)
+        return json.loads(response['SecretString'])
+
+
+credentials_provider = SecretsCredentialsProvider()
+
+
+def get_credentials_provider() -> SecretsCredentialsProvider:
+    return credentials_provider
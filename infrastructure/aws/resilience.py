@@ -0,0 +1,127 @@
+"""
+Política de resiliência das chamadas ao S3 e ao DynamoDB: retries adaptativos do botocore com
+timeouts por serviço, retry com backoff e jitter para operações cujo corpo está em memória (ex.:
+cada parte de um upload multipart) e requisições "hedged" para gravações pequenas e idempotentes.
+"""
+import asyncio
+import logging
+import os
+import random
+
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from infrastructure.metrics.metrics import AWS_HEDGED_REQUESTS, AWS_RETRIES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_MODE = "adaptive"
+DEFAULT_MAX_ATTEMPTS = 5
+# (connect, read) em segundos: o S3 transfere partes de vários MB; o DynamoDB grava itens pequenos
+DEFAULT_TIMEOUTS = {"s3": (2.0, 30.0), "dynamodb": (1.0, 3.0)}
+DEFAULT_RETRY_BASE_DELAY_SECONDS = 0.1
+DEFAULT_RETRY_MAX_DELAY_SECONDS = 2.0
+
+# Erros 4xx que indicam requisição inválida (e não instabilidade): repetir não adianta
+RETRYABLE_CLIENT_ERROR_CODES = {
+    "RequestTimeout", "RequestTimeoutException", "Throttling", "ThrottlingException", "SlowDown",
+    "ProvisionedThroughputExceededException", "RequestLimitExceeded", "TooManyRequestsException",
+    "BadDigest", "InvalidDigest", "XAmzContentSHA256Mismatch"
+}
+
+
+def botocore_config(service: str, **kwargs) -> Config:
+    """
+    Config do botocore para o serviço ("s3" ou "dynamodb"): modo de retry (adaptive por padrão,
+    que também limita a taxa de envio sob throttling) e timeouts de conexão/leitura próprios.
+    """
+    connect_timeout, read_timeout = DEFAULT_TIMEOUTS[service]
+    prefix = service.upper()
+    return Config(
+        retries={
+            "mode": os.getenv("AWS_RETRY_MODE", DEFAULT_RETRY_MODE),
+            "max_attempts": int(os.getenv("AWS_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+        },
+        connect_timeout=float(os.getenv(f"{prefix}_CONNECT_TIMEOUT_SECONDS", connect_timeout)),
+        read_timeout=float(os.getenv(f"{prefix}_READ_TIMEOUT_SECONDS", read_timeout)),
+        **kwargs
+    )
+
+
+def record_sdk_retries(service: str, operation: str, response):
+    """Contabiliza as novas tentativas feitas pelo botocore (ResponseMetadata.RetryAttempts)."""
+    if isinstance(response, dict):
+        attempts = response.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        if attempts:
+            AWS_RETRIES.inc(attempts, service=service, operation=operation, layer="sdk")
+    return response
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return status >= 500 or code in RETRYABLE_CLIENT_ERROR_CODES
+    # Timeouts e falhas de conexão (EndpointConnectionError, ReadTimeoutError, ...)
+    return isinstance(error, (BotoCoreError, OSError, asyncio.TimeoutError))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff exponencial com "full jitter" para a tentativa `attempt` (1 = primeira repetição)."""
+    base = float(os.getenv("AWS_RETRY_BASE_DELAY_SECONDS", DEFAULT_RETRY_BASE_DELAY_SECONDS))
+    cap = float(os.getenv("AWS_RETRY_MAX_DELAY_SECONDS", DEFAULT_RETRY_MAX_DELAY_SECONDS))
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+async def call_with_retry(operation, service: str, name: str, max_attempts: int):
+    """
+    Executa `operation()` (função que devolve uma coroutine) repetindo falhas transitórias que
+    o botocore já não repetiu. O corpo da requisição precisa estar em memória para ser reenviado.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return record_sdk_retries(service, name, await operation())
+        except Exception as e:
+            if attempt >= max_attempts or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt)
+            AWS_RETRIES.inc(service=service, operation=name, layer="app")
+            logger.warning(f"Falha em {service}.{name} (tentativa {attempt}/{max_attempts}): {e}; "
+                           f"nova tentativa em {delay:.2f}s.")
+            await asyncio.sleep(delay)
+
+
+async def hedged(call, name: str, hedge_after: float, service: str = "dynamodb"):
+    """
+    Executa `call` (síncrona, em thread) e, se não terminar em `hedge_after` segundos, dispara uma
+    segunda cópia; vale o primeiro resultado bem-sucedido. Só para gravações idempotentes (ex.:
+    put_item sem condição, SET de atributos). Com `hedge_after` <= 0, executa uma única vez.
+    """
+    first = asyncio.ensure_future(asyncio.to_thread(call))
+    if hedge_after <= 0:
+        return record_sdk_retries(service, name, await first)
+
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done:
+        return record_sdk_retries(service, name, first.result())
+
+    second = asyncio.ensure_future(asyncio.to_thread(call))
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                AWS_HEDGED_REQUESTS.inc(operation=name, winner="hedge" if task is second else "original")
+                for other in pending:
+                    # A thread da cópia perdedora termina sozinha; o resultado é descartado
+                    other.add_done_callback(_discard_result)
+                return record_sdk_retries(service, name, task.result())
+            error = task.exception()
+    AWS_HEDGED_REQUESTS.inc(operation=name, winner="nenhum")
+    raise error
+
+
+def _discard_result(task):
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,89 @@
+"""
+Acesso sem cópia ao conteúdo de uploads já recebidos: o arquivo temporário do multipart (em
+memória ou em disco) é exposto como memoryview e entregue ao cliente S3 como um file-like que
+lê direto dessa view.
+"""
+import io
+import logging
+import mmap
+import os
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryViewReader(io.RawIOBase):
+    """
+    File-like somente leitura sobre uma memoryview. Quem lê (botocore, aiohttp) copia apenas o
+    bloco que pediu para o seu próprio buffer; a view inteira nunca é materializada em bytes.
+    """
+
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def __len__(self):
+        return len(self._view)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, min(len(self._view), base + offset))
+        return self._position
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self._view) - self._position)
+        buffer[:size] = self._view[self._position:self._position + size]
+        self._position += size
+        return size
+
+
+def _underlying_file(stream):
+    """UploadFile -> SpooledTemporaryFile -> BytesIO (em memória) ou arquivo em disco."""
+    file = getattr(stream, "file", stream)
+    return getattr(file, "_file", file)
+
+
+@contextmanager
+def map_stream(stream):
+    """
+    Entrega o conteúdo completo de `stream` como memoryview, sem copiá-lo: `getbuffer()` para
+    arquivos em memória e mmap para arquivos em disco. Produz None quando o stream não pode ser
+    mapeado (ex.: leitura apenas assíncrona), e o chamador deve lê-lo em blocos.
+    """
+    file = _underlying_file(stream)
+    mapped = None
+    try:
+        if hasattr(file, "getbuffer"):
+            view = file.getbuffer()
+        else:
+            file.flush()
+            descriptor = file.fileno()
+            if os.fstat(descriptor).st_size == 0:
+                view = memoryview(b"")
+            else:
+                mapped = mmap.mmap(descriptor, 0, access=mmap.ACCESS_READ)
+                view = memoryview(mapped)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        yield None
+        return
+
+    try:
+        yield view
+    finally:
+        view.release()
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                # Alguma fatia ainda referenciada; o mapa é liberado quando ela for coletada
+                logger.debug("mmap do upload ainda em uso; liberação adiada.")
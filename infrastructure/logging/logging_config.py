@@ -1,5 +1,178 @@
+"""
+Logging da aplicação: o handler do logger raiz apenas enfileira o registro (QueueHandler) e uma
+thread dedicada (QueueListener) formata e escreve, tirando formatação e I/O do event loop. A saída
+é uma linha JSON compacta por registro, com o id da requisição corrente, e as linhas INFO/DEBUG
+podem ser amostradas para reduzir o volume sob carga.
+"""
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
+import sys
+import threading
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from infrastructure.metrics.metrics import LOG_RECORDS_DROPPED
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" (padrão) ou "text" para leitura humana no desenvolvimento local
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fração das linhas INFO/DEBUG mantidas; WARNING ou acima nunca são descartadas
+LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1"))
+# Registros aguardando a thread de escrita; com a fila cheia o registro é descartado
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", "10000"))
+
+# Valor de `request_id` nos registros feitos fora de uma requisição
+NO_REQUEST_ID = "-"
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+_request_id: ContextVar[str | None] = ContextVar("log_request_id", default=None)
+_listener: QueueListener | None = None
+_lock = threading.Lock()
+
+
+def bind_request_id(request_id: str | None):
+    """Associa `request_id` aos logs do contexto corrente; devolve o token para `reset_request_id`."""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def current_request_id() -> str | None:
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Copia o id da requisição para o registro ainda na task que logou (o contexto não cruza a fila)."""
+
+    def filter(self, record):
+        record.request_id = _request_id.get() or NO_REQUEST_ID
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém só uma fração `rate` das linhas abaixo de WARNING."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, só com os campos preenchidos."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", NO_REQUEST_ID)
+        if request_id != NO_REQUEST_ID:
+            entry["request_id"] = request_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enfileira uma cópia do registro sem formatá-la: só a mensagem é resolvida (os argumentos podem
+    mudar depois) e a exceção segue como está para ser formatada na thread de escrita; o registro
+    original continua intacto para os demais handlers. Com a fila cheia, descarta o registro em vez
+    de bloquear o event loop.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def _build_formatter():
+    if LOG_FORMAT == "text":
+        return logging.Formatter(TEXT_FORMAT)
+    return JsonFormatter()
 
 
 def setup_logging():
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    """
+    Configura o logger raiz uma única vez por processo; chamadas seguintes não fazem nada. Os handlers
+    já presentes no raiz (ex.: o do runtime da Lambda) são substituídos, para cada linha ser escrita
+    uma única vez. A thread de escrita é encerrada (esvaziando a fila) na saída do interpretador.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(_build_formatter())
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(LOG_INFO_SAMPLE_RATE))
+        queue_handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL)
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        # A thread de escrita não sobrevive a um fork (ex.: workers do server.py): é parada antes
+        # e recriada no processo pai e no filho
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(before=_stop_listener, after_in_parent=_start_listener, after_in_child=_start_listener)
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        # Com a fila cheia, espera a thread de escrita abrir espaço para o sentinela: se ela seguisse
+        # ativa, o filho nunca a recriaria e `flush_logs` aguardaria a fila para sempre
+        _listener.queue.put(_listener._sentinel)
+        _listener._thread.join()
+        _listener._thread = None
+
+
+def _start_listener():
+    if _listener is not None and _listener._thread is None:
+        _listener.start()
+
+
+def flush_logs():
+    """Aguarda a thread de escrita esvaziar a fila (ex.: ao fim de uma invocação da Lambda)."""
+    if _listener is not None:
+        _listener.queue.join()
+
+
+def shutdown_logging():
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        try:
+            _listener.stop()
+        except queue.Full:
+            pass  # fila cheia na saída: a thread de escrita é daemon e termina com o processo
+        for handler in logging.getLogger().handlers[:]:
+            if isinstance(handler, NonBlockingQueueHandler):
+                logging.getLogger().removeHandler(handler)
+        _listener = None
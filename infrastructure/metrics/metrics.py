@@ -0,0 +1,239 @@
+"""
+Métricas do pipeline de upload: histogramas e contadores em memória (por processo), expostos no
+formato texto do Prometheus em `/metrics` e, na Lambda, emitidos como linhas CloudWatch EMF ao
+fim de cada requisição. Nos workers do server.py cada série leva o label `worker` (o pid), já que
+cada scrape é atendido por um único worker.
+"""
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Buckets (segundos) cobrindo desde chamadas ao DynamoDB até uploads de vídeos inteiros
+DEFAULT_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+THROUGHPUT_BUCKETS = tuple(float(2 ** exponent) for exponent in range(16, 31, 2))  # 64KB/s a 1GB/s
+
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "FiapUploadVideo")
+EMF_ENABLED = os.getenv("METRICS_EMF_ENABLED", str(bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME")))).lower() == "true"
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key, const_labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def count(self, **labels):
+        series = self._series.get(tuple(str(labels[name]) for name in self.labelnames))
+        return series["count"] if series else 0
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, observations in zip(self.buckets, series["buckets"]):
+                    cumulative += observations
+                    le = ("le", _format_value(float(bound)))
+                    labels = _format_labels(self.labelnames, key, (*const_labels, le))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, const_labels)
+                lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._const_labels = ()
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def label_worker(self, worker: str):
+        """
+        Identifica as séries deste processo com o label `worker` e descarta os valores herdados do
+        processo mestre no fork: cada worker expõe só o que ele mesmo mediu.
+        """
+        self._const_labels = (("worker", worker),)
+        for metric in self._metrics:
+            metric.clear()
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(self._const_labels))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.register(Histogram(
+    "upload_stage_duration_seconds", "Duração de cada etapa do pipeline de upload", ["stage", "outcome"]
+))
+STAGE_BYTES = registry.register(Counter(
+    "upload_stage_bytes_total", "Bytes processados por etapa do pipeline de upload", ["stage"]
+))
+STAGE_THROUGHPUT = registry.register(Histogram(
+    "upload_stage_throughput_bytes_per_second", "Vazão (bytes/s) das etapas que transferem dados", ["stage"],
+    buckets=THROUGHPUT_BUCKETS
+))
+DEDUP_SKIPPED_BYTES = registry.register(Counter(
+    "upload_dedup_skipped_bytes_total", "Bytes não enviados ao S3 por já existirem no armazenamento por conteúdo"
+))
+AWS_RETRIES = registry.register(Counter(
+    "aws_retries_total", "Novas tentativas de chamadas ao S3/DynamoDB (sdk: botocore; app: retry por parte/operação)",
+    ["service", "operation", "layer"]
+))
+AWS_HEDGED_REQUESTS = registry.register(Counter(
+    "aws_hedged_requests_total", "Cópias extras disparadas para gravações pequenas acima do tempo de hedge",
+    ["operation", "winner"]
+))
+LOG_RECORDS_DROPPED = registry.register(Counter(
+    "log_records_dropped_total", "Registros de log descartados por fila de escrita cheia"
+))
+REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Duração total das requisições HTTP", ["method", "route", "status"]
+))
+
+
+class RequestMetrics:
+    """Etapas medidas durante uma requisição, usadas para a linha EMF."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        self.stages.setdefault(stage, []).append(seconds * 1000)
+
+
+_current_request: ContextVar[RequestMetrics | None] = ContextVar("current_request_metrics", default=None)
+
+
+def start_request() -> RequestMetrics:
+    request_metrics = RequestMetrics()
+    _current_request.set(request_metrics)
+    return request_metrics
+
+
+def record_stage(stage, seconds, outcome="ok", nbytes=None):
+    STAGE_DURATION.observe(seconds, stage=stage, outcome=outcome)
+    if nbytes is not None:
+        STAGE_BYTES.inc(nbytes, stage=stage)
+        if seconds > 0:
+            STAGE_THROUGHPUT.observe(nbytes / seconds, stage=stage)
+    request_metrics = _current_request.get()
+    if request_metrics is not None:
+        request_metrics.add(stage, seconds)
+
+
+class Span:
+    def __init__(self):
+        self.nbytes = None
+
+
+@contextmanager
+def span(stage):
+    """
+    Mede a etapa `stage`. Quem transfere dados informa `span.nbytes` para registrar bytes e vazão.
+    Funciona em código síncrono e assíncrono (`with span("s3_put") as s:`).
+    """
+    current = Span()
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield current
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started, outcome, current.nbytes)
+
+
+def emit_emf(request_metrics: RequestMetrics, route, method, status, total_seconds):
+    """Escreve a linha EMF da requisição no stdout (capturado pelo CloudWatch Logs na Lambda)."""
+    metrics = {"RequestDuration": total_seconds * 1000, **request_metrics.stages}
+    document = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [["Route"]],
+                "Metrics": [{"Name": name, "Unit": "Milliseconds"} for name in metrics]
+            }]
+        },
+        "Route": route,
+        "Method": method,
+        "StatusCode": status,
+        **metrics
+    }
+    sys.stdout.write(json.dumps(document) + "\n")
+    sys.stdout.flush()
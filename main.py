@@ -1,33 +1,162 @@
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, File, UploadFile, Header, HTTPException, Request
+from fastapi import FastAPI, File, UploadFile, Header, HTTPException, Request, Depends, Response, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
 from mangum import Mangum
 
+from adapters.api.schemas import PresignedUploadRequest, PresignedUploadCompleteRequest, ResumableUploadRequest
+from adapters.api.metrics_middleware import MetricsMiddleware
+from adapters.api.rate_limit_middleware import RateLimitMiddleware
+from adapters.api.request_id_middleware import RequestIdMiddleware
+from adapters.api.upload_guard import UploadGuardMiddleware
+from application.services.token_service import TokenService
+from application.services.rate_limiter import get_rate_limiter
+from application.services.upload_queue import get_upload_queue
+from application.use_cases.async_upload import AsyncUploadUseCase
+from application.use_cases.presigned_upload import PresignedUploadUseCase
+from application.use_cases.query_videos import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, QueryVideosUseCase
+from application.use_cases.resumable_upload import ResumableUploadUseCase
 from application.use_cases.upload_video import UploadVideoUseCase
-from infrastructure.logging.logging_config import setup_logging
-from adapters.repository.s3_repository import S3Repository
+from infrastructure.aws.client_registry import AWSClientRegistry, get_client_registry
+from infrastructure.logging.logging_config import flush_logs, setup_logging
+from infrastructure.metrics import metrics
+from adapters.repository.s3_repository import S3Repository, multipart_part_size
 from adapters.repository.db_repository import DBRepository
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+S3_BUCKET_NAME = "fiapeats-bucket-videos-s3"
+DYNAMODB_TABLE_NAME = "fiapeatsdb"
+
+# Na Lambda (Mangum) o lifespan roda a cada invocação; os clientes devem sobreviver entre elas
+RUNNING_ON_LAMBDA = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+# Verificação/criação da tabela no startup (memoizada por processo); desative quando o
+# provisionamento for feito via `python bootstrap.py`
+BOOTSTRAP_TABLES_ON_STARTUP = os.getenv("DYNAMODB_BOOTSTRAP_ON_STARTUP", "true").lower() == "true"
+# Tempo máximo para concluir os uploads em segundo plano ainda na fila durante o shutdown
+UPLOAD_QUEUE_DRAIN_TIMEOUT_SECONDS = float(os.getenv("UPLOAD_QUEUE_DRAIN_TIMEOUT_SECONDS", "30"))
+# Na Lambda, prepara clientes e credenciais na fase de init (fora do handler), antes da
+# primeira invocação; o lifespan por invocação deixa de ser necessário
+# A fila do /upload/async vive no processo: na Lambda ele é congelado entre invocações e os envios
+# pendentes atrasariam indefinidamente ou se perderiam, então o endpoint só existe fora dela
+ASYNC_UPLOAD_ENABLED = not RUNNING_ON_LAMBDA
+PREWARM_ON_LAMBDA_INIT = RUNNING_ON_LAMBDA and os.getenv("LAMBDA_PREWARM_ON_INIT", "true").lower() == "true"
+# Espera máxima da verificação de prontidão pela renovação das credenciais expiradas
+READINESS_CREDENTIALS_TIMEOUT_SECONDS = float(os.getenv("READINESS_CREDENTIALS_TIMEOUT_SECONDS", "2"))
+
+
+async def warm_up_resources(app: FastAPI):
+    """Cria os repositórios, verifica a tabela e aquece credenciais e clientes S3/Cognito."""
+    registry = get_client_registry()
+    s3_repo = get_s3_repository(app, registry)
+    # Credenciais antes do recurso DynamoDB, que as recebe explicitamente na criação
+    await s3_repo.credentials_provider.get_credentials()
+    db_repo = get_db_repository(app, registry)
+    if BOOTSTRAP_TABLES_ON_STARTUP:
+        await asyncio.to_thread(db_repo.ensure_table_exists)
+    # Contadores compartilhados dos limites por usuário entre as instâncias
+    get_rate_limiter().usage_store = db_repo
+    await asyncio.gather(s3_repo.warm_up(), asyncio.to_thread(TokenService.warm_up))
+    app.state.ready = True
+    return registry
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Application startup: Initializing resources.")
+    registry = await warm_up_resources(app)
     yield
     logger.info("Application shutdown: Cleaning up resources.")
+    # Deixa de receber tráfego do balanceador enquanto os uploads pendentes terminam
+    app.state.ready = False
+    if not RUNNING_ON_LAMBDA:
+        await get_upload_queue().drain(UPLOAD_QUEUE_DRAIN_TIMEOUT_SECONDS)
+        await registry.close()
+        app.state.s3_repo = None
+        app.state.db_repo = None
 
 app = FastAPI(lifespan=lifespan)
+# Recusa uploads grandes demais ou de tipo inválido antes de receber o corpo inteiro; no mesmo
+# passo calcula o SHA-256 de cada arquivo e de cada parte do upload ao S3 (mesmo tamanho de parte)
+app.add_middleware(UploadGuardMiddleware, paths=("/upload", "/upload/async"), checksum_part_size=multipart_part_size())
+# Limites por usuário aplicados antes do guard, ou seja, antes de qualquer leitura do corpo
+app.add_middleware(RateLimitMiddleware)
+# Mede a requisição inteira, inclusive o tempo gasto no guard
+app.add_middleware(MetricsMiddleware)
+# Mais externo: todos os logs da requisição (inclusive dos middlewares) levam o seu id
+app.add_middleware(RequestIdMiddleware)
+
+
+def get_s3_repository(app: FastAPI, registry: AWSClientRegistry) -> S3Repository:
+    s3_repo = getattr(app.state, "s3_repo", None)
+    if s3_repo is None:
+        s3_repo = app.state.s3_repo = S3Repository(S3_BUCKET_NAME, client_registry=registry)
+    return s3_repo
+
+
+def get_db_repository(app: FastAPI, registry: AWSClientRegistry) -> DBRepository:
+    db_repo = getattr(app.state, "db_repo", None)
+    if db_repo is None:
+        db_repo = app.state.db_repo = DBRepository(DYNAMODB_TABLE_NAME, client_registry=registry)
+    return db_repo
+
+
+def provide_s3_repository(
+        request: Request, registry: AWSClientRegistry = Depends(get_client_registry)
+) -> S3Repository:
+    try:
+        return get_s3_repository(request.app, registry)
+    except Exception as e:
+        logger.error(f"Error initializing S3 repository: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+def provide_db_repository(
+        request: Request, registry: AWSClientRegistry = Depends(get_client_registry)
+) -> DBRepository:
+    try:
+        return get_db_repository(request.app, registry)
+    except Exception as e:
+        logger.error(f"Error initializing DB repository: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas do processo no formato texto do Prometheus."""
+    return PlainTextResponse(metrics.registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Pronto para tráfego só depois do aquecimento (repositórios e clientes criados) e com credenciais
+    válidas. Credenciais expiradas por falta de tráfego são renovadas aqui mesmo; a resposta é 503
+    só se o Secrets Manager não as devolver.
+    """
+    s3_repo = getattr(app.state, "s3_repo", None)
+    if not getattr(app.state, "ready", False) or s3_repo is None:
+        return JSONResponse({"status": "aquecendo"}, status_code=503)
+    try:
+        await asyncio.wait_for(s3_repo.credentials_provider.get_credentials(), READINESS_CREDENTIALS_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"Credenciais indisponíveis na verificação de prontidão: {str(e)}")
+        return JSONResponse({"status": "sem credenciais"}, status_code=503)
+    return {"status": "pronto"}
 
 
 @app.post("/upload")
 async def upload_file(
         request: Request,
         file: list[UploadFile] = File(...),
-        authorization: str = Header(...)
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
 ):
     try:
         if not authorization.startswith("Bearer "):
@@ -37,22 +166,319 @@ async def upload_file(
         if not request.headers.get("content-type", "").startswith("multipart/form-data"):
             raise HTTPException(status_code=400, detail="Requisição deve ser multipart/form-data")
 
-        s3_repo = S3Repository("fiapeats-bucket-videos-s3")
-        db_repo = DBRepository("fiapeatsdb")
         upload_video_use_case = UploadVideoUseCase(s3_repo, db_repo)
 
         token = authorization.split("Bearer ")[1]
 
-        result = await upload_video_use_case.execute(file, token)
+        result = await upload_video_use_case.execute(
+            file, token, upload_checksums(request, file), upload_part_checksums(request, file)
+        )
         return {"details": result}
 
     except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid data format.")
     except Exception as e:
         logger.error(f"Error during upload: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error.")
 
+def _received_checksums(request: Request, files: list[UploadFile]) -> list[dict] | None:
+    """Checksums calculados pelo UploadGuardMiddleware, se correspondem aos arquivos recebidos."""
+    received = getattr(request.state, "upload_checksums", None)
+    if not received or len(received) != len(files):
+        return None
+    if any(entry["file_name"] != file.filename for entry, file in zip(received, files)):
+        return None
+    return received
+
+
+def upload_checksums(request: Request, files: list[UploadFile]) -> list[str] | None:
+    """SHA-256 calculados pelo UploadGuardMiddleware, na ordem dos arquivos recebidos."""
+    received = _received_checksums(request, files)
+    return [entry["sha256"] for entry in received] if received else None
+
+
+def upload_part_checksums(request: Request, files: list[UploadFile]) -> list[tuple[str, ...] | None] | None:
+    """SHA-256 de cada parte do upload multipart ao S3, calculados no mesmo passo."""
+    received = _received_checksums(request, files)
+    if not received:
+        return None
+    return [tuple(entry["part_sha256"]) if entry.get("part_sha256") is not None else None for entry in received]
+
+
+def extract_bearer_token(authorization: str) -> str:
+    if not authorization.startswith("Bearer "):
+        logger.warning("Invalid token format.")
+        raise HTTPException(status_code=401, detail="Token inválido")
+    return authorization.split("Bearer ")[1]
+
+
+@app.post("/upload/async", status_code=202)
+async def upload_file_async(
+        request: Request,
+        file: list[UploadFile] = File(...),
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Aceita os vídeos e os envia ao S3 em segundo plano; o status é consultado por job_id."""
+    if not ASYNC_UPLOAD_ENABLED:
+        raise HTTPException(
+            status_code=501,
+            detail="Upload assíncrono indisponível neste ambiente; use /upload/presigned"
+        )
+    try:
+        token = extract_bearer_token(authorization)
+        if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+            raise HTTPException(status_code=400, detail="Requisição deve ser multipart/form-data")
+
+        return {"details": await AsyncUploadUseCase(s3_repo, db_repo).execute(
+            file, token, upload_checksums(request, file), upload_part_checksums(request, file)
+        )}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during async upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.get("/upload/jobs/{job_id}")
+async def get_upload_job(
+        job_id: str,
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Consulta o STATUS_PROCESSAMENTO de um vídeo aceito pelo upload assíncrono."""
+    try:
+        token = extract_bearer_token(authorization)
+        return await AsyncUploadUseCase(s3_repo, db_repo).get_status(token, job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading upload job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.post("/upload/presigned")
+async def create_presigned_upload(
+        body: PresignedUploadRequest,
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Emite URLs pré-assinadas para o cliente enviar o vídeo diretamente ao S3."""
+    try:
+        token = extract_bearer_token(authorization)
+        use_case = PresignedUploadUseCase(s3_repo, db_repo)
+        return await use_case.start(token, body.file_name, body.content_type, body.file_size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating presigned upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.post("/upload/presigned/complete")
+async def complete_presigned_upload(
+        body: PresignedUploadCompleteRequest,
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Verifica o vídeo enviado diretamente ao S3 e o registra no DynamoDB."""
+    try:
+        token = extract_bearer_token(authorization)
+        use_case = PresignedUploadUseCase(s3_repo, db_repo)
+        parts = [part.model_dump() for part in body.parts]
+        return {"details": await use_case.complete(token, body.file_name, body.upload_id, parts)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error completing presigned upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+def upload_session_headers(session) -> dict:
+    return {
+        "Upload-Offset": str(session["OFFSET_ATUAL"]),
+        "Upload-Length": str(session["TAMANHO_TOTAL"]),
+        "Cache-Control": "no-store"
+    }
+
+
+@app.post("/upload/resumable", status_code=201)
+async def create_resumable_upload(
+        body: ResumableUploadRequest,
+        response: Response,
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Cria uma sessão de upload retomável; os bytes são enviados via PATCH na URL retornada."""
+    try:
+        token = extract_bearer_token(authorization)
+        session = await ResumableUploadUseCase(s3_repo, db_repo).create(
+            token, body.file_name, body.content_type, body.file_size
+        )
+        response.headers.update(upload_session_headers(session))
+        response.headers["Location"] = f"/upload/resumable/{session['session_id']}"
+        return {
+            "session_id": session["session_id"],
+            "upload_offset": session["OFFSET_ATUAL"],
+            "upload_length": session["TAMANHO_TOTAL"],
+            "part_size": session["TAMANHO_PARTE"],
+            "expires_at": session["EXPIRA_EM"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating resumable upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.head("/upload/resumable/{session_id}")
+async def get_resumable_upload_offset(
+        session_id: str,
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Informa o offset já recebido para que o cliente retome o envio."""
+    try:
+        token = extract_bearer_token(authorization)
+        session = await ResumableUploadUseCase(s3_repo, db_repo).get_session(token, session_id)
+        return Response(status_code=200, headers=upload_session_headers(session))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading resumable upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.patch("/upload/resumable/{session_id}")
+async def append_resumable_upload(
+        session_id: str,
+        request: Request,
+        upload_offset: int = Header(...),
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Recebe um bloco do vídeo a partir de `Upload-Offset`."""
+    try:
+        token = extract_bearer_token(authorization)
+        if request.headers.get("content-type") != "application/offset+octet-stream":
+            raise HTTPException(status_code=415, detail="Content-Type deve ser application/offset+octet-stream")
+
+        session = await ResumableUploadUseCase(s3_repo, db_repo).append(
+            token, session_id, upload_offset, request.stream()
+        )
+        return Response(status_code=204, headers=upload_session_headers(session))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error appending to resumable upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.post("/upload/resumable/{session_id}/complete")
+async def complete_resumable_upload(
+        session_id: str,
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Conclui o upload multipart e registra o vídeo."""
+    try:
+        token = extract_bearer_token(authorization)
+        return {"details": await ResumableUploadUseCase(s3_repo, db_repo).complete(token, session_id)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error completing resumable upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.delete("/upload/resumable/{session_id}", status_code=204)
+async def cancel_resumable_upload(
+        session_id: str,
+        authorization: str = Header(...),
+        s3_repo: S3Repository = Depends(provide_s3_repository),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Cancela a sessão e descarta as partes já enviadas ao S3."""
+    try:
+        token = extract_bearer_token(authorization)
+        await ResumableUploadUseCase(s3_repo, db_repo).cancel(token, session_id)
+        return Response(status_code=204)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling resumable upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@app.get("/videos")
+async def list_videos(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str | None = Query(None),
+        authorization: str = Header(...),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Lista os vídeos do usuário (mais recentes primeiro); use `next_cursor` para a próxima página."""
+    try:
+        token = extract_bearer_token(authorization)
+        return await QueryVideosUseCase(db_repo).list(token, limit, cursor)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing videos: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@app.get("/videos/{video_id}")
+async def get_video(
+        video_id: str,
+        authorization: str = Header(...),
+        db_repo: DBRepository = Depends(provide_db_repository)
+):
+    """Retorna o status de um vídeo do usuário."""
+    try:
+        token = extract_bearer_token(authorization)
+        return await QueryVideosUseCase(db_repo).get(token, video_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading video: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+def prewarm_lambda_init():
+    """
+    Executado no import do módulo durante o init da Lambda. O Mangum reutiliza o event loop
+    corrente em todas as invocações, então os clientes criados aqui continuam válidos.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(warm_up_resources(app))
+        logger.info("Recursos pré-aquecidos no init da Lambda.")
+        return True
+    except Exception as e:
+        logger.error(f"Falha no pré-aquecimento da Lambda; recursos serão criados sob demanda: {str(e)}")
+        return False
+
+
 # Adaptador para Lambda
-handler = Mangum(app)
\ No newline at end of file
+if PREWARM_ON_LAMBDA_INIT and prewarm_lambda_init():
+    lambda_adapter = Mangum(app, lifespan="off")
+else:
+    lambda_adapter = Mangum(app)
+
+
+def handler(event, context):
+    try:
+        return lambda_adapter(event, context)
+    finally:
+        # O ambiente da Lambda é congelado após a resposta: sem esperar a fila, as últimas linhas
+        # de log só seriam escritas na invocação seguinte
+        flush_logs()
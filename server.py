@@ -0,0 +1,186 @@
+"""
+Servidor de produção: N workers uvicorn (uvloop e httptools quando instalados) criados por fork
+a partir de um processo mestre que já importou a aplicação, verificou a tabela e carregou as
+credenciais, de modo que os workers herdam esse estado em vez de repeti-lo. Cada worker tem o
+próprio event loop e cria seus clientes AWS no lifespan; o mestre repõe workers que terminam.
+
+Uso:
+    python server.py --workers 4 --port 8000
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from infrastructure.logging.logging_config import setup_logging
+from infrastructure.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Módulos de importação lenta adiados pela aplicação (cold start da Lambda); no servidor são
+# importados uma vez no mestre e compartilhados pelos workers (copy-on-write)
+PRELOAD_MODULES = ("aioboto3", "aiohttp", "jwt")
+# Worker que termina com erro antes disso falhou no startup: repor só repetiria a falha
+WORKER_BOOT_GRACE_SECONDS = 5
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Executa a API com vários workers uvicorn.")
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVER_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("SERVER_BACKLOG", "2048")),
+                        help="Conexões pendentes aceitas pelo socket compartilhado")
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "75")),
+                        help="Tempo (s) de uma conexão ociosa; acima do idle timeout do balanceador")
+    parser.add_argument("--limit-concurrency", type=int, default=int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0")),
+                        help="Conexões simultâneas por worker antes de responder 503 (0: sem limite)")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("SERVER_MAX_REQUESTS_PER_WORKER", "0")),
+                        help="Requisições atendidas antes de o worker ser reposto (0: sem limite)")
+    parser.add_argument("--max-header-bytes", type=int, default=int(os.getenv("SERVER_MAX_HEADER_BYTES", "0")),
+                        help="Tamanho máximo dos cabeçalhos de uma requisição; usa o parser h11 em vez do "
+                             "httptools, que não aplica o limite (0: sem limite)")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30")),
+                        help="Espera pelas requisições em andamento no encerramento")
+    parser.add_argument("--access-log", action="store_true", default=os.getenv("SERVER_ACCESS_LOG", "false") == "true")
+    return parser.parse_args(argv)
+
+
+def build_config(app, args) -> uvicorn.Config:
+    # O limite de cabeçalhos só existe no parser h11; sem ele, httptools (mais rápido) se instalado
+    http = "h11" if args.max_header_bytes else "auto"
+    return uvicorn.Config(
+        app,
+        loop="auto",  # uvloop se instalado
+        http=http,
+        lifespan="on",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        limit_concurrency=args.limit_concurrency or None,
+        limit_max_requests=args.max_requests or None,
+        h11_max_incomplete_event_size=args.max_header_bytes or None,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+        # Mantém o logging da aplicação (JSON, fora do event loop) em vez do padrão do uvicorn
+        log_config=None,
+    )
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Socket aberto pelo mestre e herdado por todos os workers (o kernel distribui as conexões)."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def warm_up_before_fork():
+    """
+    Trabalho feito uma única vez, antes do fork: importações pesadas, verificação da tabela e
+    credenciais do Secrets Manager. Nada aqui deixa threads ou event loops abertos; clientes com
+    conexões (S3, DynamoDB, Cognito) são criados por cada worker no lifespan.
+    """
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    import main
+    from adapters.repository.db_repository import DBRepository
+    from infrastructure.aws.credentials_provider import get_credentials_provider
+
+    try:
+        asyncio.run(get_credentials_provider().get_credentials())
+        if main.BOOTSTRAP_TABLES_ON_STARTUP:
+            DBRepository(main.DYNAMODB_TABLE_NAME).ensure_table_exists()
+    except Exception as e:
+        logger.warning(f"Pré-aquecimento no processo mestre falhou; cada worker tentará no startup: {str(e)}")
+    return main.app
+
+
+def serve_worker(app, sock: socket.socket, args):
+    """Executa um worker até o encerramento; roda no processo filho."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(build_config(app, args))
+    server.run(sockets=[sock])
+    return 0 if server.started else 3
+
+
+class Supervisor:
+    """Processo mestre: cria os workers por fork, repõe os que terminam e repassa os sinais de parada."""
+
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers = {}
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                metrics.registry.label_worker(str(os.getpid()))
+                code = serve_worker(self.app, self.sock, self.args)
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        logger.info(f"Worker {pid} iniciado.")
+
+    def stop(self, signum, frame):
+        if not self.stopping:
+            logger.info(f"Sinal {signum} recebido; encerrando {len(self.workers)} workers.")
+        self.stopping = True
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        exit_code = 0
+        while self.workers:
+            pid, status = os.wait()
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0 and time.monotonic() - started < WORKER_BOOT_GRACE_SECONDS:
+                logger.error(f"Worker {pid} falhou no startup (código {code}); encerrando o servidor.")
+                exit_code = 1
+                self.stop(signal.SIGTERM, None)
+                continue
+            logger.warning(f"Worker {pid} terminou (código {code}); iniciando outro.")
+            self.spawn()
+        return exit_code
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+    sock = bind_socket(args.host, args.port, args.backlog)
+    app = warm_up_before_fork()
+    logger.info(f"Servidor em {args.host}:{args.port} com {args.workers} workers.")
+
+    # Sem fork (Windows) ou com um único worker, atende no próprio processo
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        return serve_worker(app, sock, args)
+    return Supervisor(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
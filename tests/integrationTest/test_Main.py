@@ -1,10 +1,24 @@
+import base64
+import hashlib
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, patch
-from main import app
+from unittest.mock import AsyncMock, MagicMock, patch
+from main import app, provide_s3_repository, provide_db_repository
 
 client = TestClient(app)
 
+# Cabeçalho ISO BMFF ("ftyp") para que o conteúdo seja reconhecido como MP4
+MP4_HEADER = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+
+
+@pytest.fixture(autouse=True)
+def override_repositories():
+    app.dependency_overrides[provide_s3_repository] = lambda: MagicMock()
+    app.dependency_overrides[provide_db_repository] = lambda: MagicMock()
+    yield
+    app.dependency_overrides.clear()
+
 
 @pytest.fixture()
 def mock_upload_video():
@@ -17,7 +31,7 @@ def mock_upload_video():
 # Positive Test Cases
 def test_upload_file_valid(mock_upload_video):
     files = {
-        "file": ("test_video.mp4", b"video content", "video/mp4")
+        "file": ("test_video.mp4", MP4_HEADER + b"video content", "video/mp4")
     }
     headers = {
         "authorization": "Bearer valid_token"
@@ -29,8 +43,8 @@ def test_upload_file_valid(mock_upload_video):
 
 def test_upload_multiple_files_valid(mock_upload_video):
     files = [
-        ("file", ("test_video1.mp4", b"video content 1", "video/mp4")),
-        ("file", ("test_video2.mp4", b"video content 2", "video/mp4"))
+        ("file", ("test_video1.mp4", MP4_HEADER + b"video content 1", "video/mp4")),
+        ("file", ("test_video2.mp4", MP4_HEADER + b"video content 2", "video/mp4"))
     ]
     headers = {
         "authorization": "Bearer valid_token"
@@ -40,10 +54,25 @@ def test_upload_multiple_files_valid(mock_upload_video):
     assert response.json() == {"details": {"status": "success"}}
 
 
+def test_upload_passes_checksums_computed_while_receiving(mock_upload_video):
+    content = MP4_HEADER + b"video content"
+    files = {
+        "file": ("test_video.mp4", content, "video/mp4")
+    }
+    headers = {
+        "authorization": "Bearer valid_token"
+    }
+    response = client.post("/upload", files=files, headers=headers)
+    assert response.status_code == 200
+    assert mock_upload_video.execute.await_args.args[2] == [hashlib.sha256(content).hexdigest()]
+    # Arquivo menor que uma parte: uma única parte, com o mesmo conteúdo do arquivo
+    assert mock_upload_video.execute.await_args.args[3] == [(base64.b64encode(hashlib.sha256(content).digest()).decode(),)]
+
+
 # Negative Test Cases
 def test_upload_missing_authorization_header():
     files = {
-        "file": ("test_video.mp4", b"video content", "video/mp4")
+        "file": ("test_video.mp4", MP4_HEADER + b"video content", "video/mp4")
     }
     headers = {
         "authorization": ""
@@ -55,7 +84,7 @@ def test_upload_missing_authorization_header():
 
 def test_upload_invalid_token_format():
     files = {
-        "file": ("test_video.mp4", b"video content", "video/mp4")
+        "file": ("test_video.mp4", MP4_HEADER + b"video content", "video/mp4")
     }
     headers = {
         "authorization": "InvalidToken"
@@ -99,7 +128,7 @@ def test_upload_missing_file(mock_upload_video):
 
 def test_upload_invalid_content_type():
     files = {
-        "file": ("test_video.mp4", b"video content", "video/mp4")
+        "file": ("test_video.mp4", MP4_HEADER + b"video content", "video/mp4")
     }
     headers = {
         "authorization": "Bearer valid_token",
@@ -111,11 +140,7 @@ def test_upload_invalid_content_type():
 
 
 def test_upload_file_exceeds_max_size(mock_upload_video):
-    # Simulate the use case returning an error for large files
-    mock_upload_video.execute.return_value = {
-        "status": "Erro: Tamanho máximo permitido é 50MB"
-    }
-    large_file_content = b"a" * ((50 * 1024 * 1024) + 10000)  # 50MB + 1 byte
+    large_file_content = MP4_HEADER + b"a" * ((50 * 1024 * 1024) + 10000)  # 50MB + 10KB
     files = {
         "file": ("large_video.mp4", large_file_content, "video/mp4")
     }
@@ -123,15 +148,23 @@ def test_upload_file_exceeds_max_size(mock_upload_video):
         "authorization": "Bearer valid_token"
     }
     response = client.post("/upload", files=files, headers=headers)
-    assert response.status_code == 200
-    assert "Erro: Tamanho máximo permitido é 50MB" in response.json()["details"]["status"]
+    assert response.status_code == 413
+    assert "excede o máximo permitido" in response.json()["detail"]
+    mock_upload_video.execute.assert_not_called()
 
 
-def test_upload_file_invalid_media_type(mock_upload_video):
-    # Simulate the use case returning an error for invalid media types
-    mock_upload_video.execute.return_value = {
-        "status": "Erro: Tipo de mídia inválido"
+def test_upload_request_exceeds_content_length(mock_upload_video):
+    headers = {
+        "authorization": "Bearer valid_token",
+        "content-type": "multipart/form-data; boundary=x",
+        "content-length": str(300 * 1024 * 1024)
     }
+    response = client.post("/upload", content=b"--x--", headers=headers)
+    assert response.status_code == 413
+    mock_upload_video.execute.assert_not_called()
+
+
+def test_upload_file_invalid_media_type(mock_upload_video):
     files = {
         "file": ("test_video.avi", b"video content", "video/avi")
     }
@@ -139,14 +172,27 @@ def test_upload_file_invalid_media_type(mock_upload_video):
         "authorization": "Bearer valid_token"
     }
     response = client.post("/upload", files=files, headers=headers)
-    assert response.status_code == 200
-    assert "Erro: Tipo de mídia inválido" in response.json()["details"]["status"]
+    assert response.status_code == 415
+    assert "Tipo de mídia inválido: video/avi" in response.json()["detail"]
+    mock_upload_video.execute.assert_not_called()
+
+
+def test_upload_file_content_does_not_match_type(mock_upload_video):
+    files = {
+        "file": ("fake_video.mp4", b"plain text pretending to be a video", "video/mp4")
+    }
+    headers = {
+        "authorization": "Bearer valid_token"
+    }
+    response = client.post("/upload", files=files, headers=headers)
+    assert response.status_code == 415
+    mock_upload_video.execute.assert_not_called()
 
 
 def test_upload_internal_server_error(mock_upload_video):
     mock_upload_video.execute.side_effect = Exception("Unexpected error")
     files = {
-        "file": ("test_video.mp4", b"video content", "video/mp4")
+        "file": ("test_video.mp4", MP4_HEADER + b"video content", "video/mp4")
     }
     headers = {
         "authorization": "Bearer valid_token"
@@ -157,9 +203,11 @@ def test_upload_internal_server_error(mock_upload_video):
 
 
 def test_upload_repository_initialization_error():
+    app.dependency_overrides.clear()
+    app.state.s3_repo = None
     with patch("main.S3Repository", side_effect=Exception("S3 initialization error")):
         files = {
-            "file": ("test_video.mp4", b"video content", "video/mp4")
+            "file": ("test_video.mp4", MP4_HEADER + b"video content", "video/mp4")
         }
         headers = {
             "authorization": "Bearer valid_token"
@@ -167,3 +215,162 @@ def test_upload_repository_initialization_error():
         response = client.post("/upload", files=files, headers=headers)
         assert response.status_code == 500
         assert response.json() == {"detail": "Internal server error."}
+
+
+def test_presigned_upload_returns_urls():
+    with patch("main.PresignedUploadUseCase") as mock:
+        mock.return_value.start = AsyncMock(return_value={"video": "video.mp4", "mode": "single", "url": "https://s3"})
+        response = client.post(
+            "/upload/presigned",
+            json={"file_name": "video.mp4", "content_type": "video/mp4", "file_size": 1024},
+            headers={"authorization": "Bearer valid_token"}
+        )
+    assert response.status_code == 200
+    assert response.json()["url"] == "https://s3"
+    mock.return_value.start.assert_awaited_once_with("valid_token", "video.mp4", "video/mp4", 1024)
+
+
+def test_presigned_upload_rejects_file_name_with_path():
+    response = client.post(
+        "/upload/presigned",
+        json={"file_name": "../video.mp4", "content_type": "video/mp4", "file_size": 1024},
+        headers={"authorization": "Bearer valid_token"}
+    )
+    assert response.status_code == 422
+
+
+def test_presigned_upload_complete_invalid_token():
+    response = client.post(
+        "/upload/presigned/complete",
+        json={"file_name": "video.mp4"},
+        headers={"authorization": "InvalidToken"}
+    )
+    assert response.status_code == 401
+
+
+def test_resumable_upload_head_returns_offset():
+    with patch("main.ResumableUploadUseCase") as mock:
+        mock.return_value.get_session = AsyncMock(return_value={"OFFSET_ATUAL": 16, "TAMANHO_TOTAL": 38})
+        response = client.head("/upload/resumable/abc", headers={"authorization": "Bearer valid_token"})
+    assert response.status_code == 200
+    assert response.headers["Upload-Offset"] == "16"
+    assert response.headers["Upload-Length"] == "38"
+
+
+def test_resumable_upload_patch_requires_offset_content_type():
+    response = client.patch(
+        "/upload/resumable/abc",
+        content=b"data",
+        headers={"authorization": "Bearer valid_token", "Upload-Offset": "0", "Content-Type": "video/mp4"}
+    )
+    assert response.status_code == 415
+
+
+def test_resumable_upload_patch_returns_new_offset():
+    with patch("main.ResumableUploadUseCase") as mock:
+        mock.return_value.append = AsyncMock(return_value={"OFFSET_ATUAL": 4, "TAMANHO_TOTAL": 38})
+        response = client.patch(
+            "/upload/resumable/abc",
+            content=b"data",
+            headers={
+                "authorization": "Bearer valid_token",
+                "Upload-Offset": "0",
+                "Content-Type": "application/offset+octet-stream"
+            }
+        )
+    assert response.status_code == 204
+    assert response.headers["Upload-Offset"] == "4"
+
+
+def test_async_upload_returns_202_with_job_ids():
+    with patch("main.AsyncUploadUseCase") as mock:
+        mock.return_value.execute = AsyncMock(return_value=[{"video": "video.mp4", "job_id": "job-1", "status": "Aceito"}])
+        response = client.post(
+            "/upload/async",
+            files={"file": ("video.mp4", MP4_HEADER + b"video content", "video/mp4")},
+            headers={"authorization": "Bearer valid_token"}
+        )
+    assert response.status_code == 202
+    assert response.json()["details"][0]["job_id"] == "job-1"
+
+
+def test_async_upload_is_rejected_on_lambda():
+    with patch("main.AsyncUploadUseCase") as mock, patch("main.ASYNC_UPLOAD_ENABLED", False):
+        response = client.post(
+            "/upload/async",
+            files={"file": ("video.mp4", MP4_HEADER + b"video content", "video/mp4")},
+            headers={"authorization": "Bearer valid_token"}
+        )
+    assert response.status_code == 501
+    mock.return_value.execute.assert_not_called()
+
+
+def test_async_upload_is_checked_by_the_upload_guard():
+    with patch("main.AsyncUploadUseCase") as mock:
+        response = client.post(
+            "/upload/async",
+            files={"file": ("video.avi", b"video content", "video/avi")},
+            headers={"authorization": "Bearer valid_token"}
+        )
+    assert response.status_code == 415
+    mock.return_value.execute.assert_not_called()
+
+
+def test_upload_job_status():
+    with patch("main.AsyncUploadUseCase") as mock:
+        mock.return_value.get_status = AsyncMock(return_value={"job_id": "job-1", "status": "AGUARDANDO_UPLOAD"})
+        response = client.get("/upload/jobs/job-1", headers={"authorization": "Bearer valid_token"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "AGUARDANDO_UPLOAD"
+
+
+def test_list_videos_validates_page_size():
+    response = client.get("/videos?limit=1000", headers={"authorization": "Bearer valid_token"})
+    assert response.status_code == 422
+
+
+def test_list_videos_returns_page():
+    with patch("main.QueryVideosUseCase") as mock:
+        mock.return_value.list = AsyncMock(return_value={"videos": [], "next_cursor": None})
+        response = client.get("/videos?limit=10", headers={"authorization": "Bearer valid_token"})
+    assert response.status_code == 200
+    mock.return_value.list.assert_awaited_once_with("valid_token", 10, None)
+
+
+def test_metrics_endpoint_exposes_request_durations():
+    client.get("/videos?limit=1000", headers={"authorization": "Bearer valid_token"})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/videos",status="422"}' in response.text
+
+
+def test_readiness_fails_until_warm_up_completes():
+    app.state.ready = False
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+
+
+def test_readiness_succeeds_with_warm_clients_and_credentials():
+    s3_repo = MagicMock()
+    s3_repo.credentials_provider.get_credentials = AsyncMock()
+    with patch.object(app.state, "s3_repo", s3_repo, create=True), patch.object(app.state, "ready", True, create=True):
+        response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "pronto"}
+    # Credenciais expiradas sem tráfego são renovadas pela própria verificação
+    s3_repo.credentials_provider.get_credentials.assert_awaited_once()
+
+
+def test_readiness_fails_when_credentials_cannot_be_loaded():
+    s3_repo = MagicMock()
+    s3_repo.credentials_provider.get_credentials = AsyncMock(side_effect=Exception("Secrets Manager indisponível"))
+    with patch.object(app.state, "s3_repo", s3_repo, create=True), patch.object(app.state, "ready", True, create=True):
+        response = client.get("/health/ready")
+
+    assert response.status_code == 503
@@ -0,0 +1,163 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import HTTPException, UploadFile
+
+from application.services.upload_queue import UploadWorkQueue
+from application.services.upload_scheduler import UploadScheduler
+from application.use_cases.async_upload import AsyncUploadUseCase
+from adapters.repository.s3_repository import S3Repository
+from adapters.repository.db_repository import DBRepository
+
+MP4_HEADER = b"\x00\x00\x00\x18ftypmp42"
+
+
+def build_upload_file(filename, content):
+    return UploadFile(file=io.BytesIO(content), size=len(content), filename=filename,
+                      headers={"content-type": "video/mp4"})
+
+
+class TestAsyncUploadUseCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.env_patcher = patch.dict(os.environ, {"UPLOAD_SPOOL_DIR": self.spool_dir})
+        self.env_patcher.start()
+
+        self.uploaded = []
+        self.s3_repo = AsyncMock(spec=S3Repository)
+        self.s3_repo.build_file_key = S3Repository.build_file_key
+        self.s3_repo.upload_video.side_effect = self._upload_video
+        self.db_repo = AsyncMock(spec=DBRepository)
+        self.queue = UploadWorkQueue(max_size=10, workers=2, max_attempts=2, backoff_seconds=0)
+        self.use_case = AsyncUploadUseCase(
+            self.s3_repo, self.db_repo, scheduler=UploadScheduler(queue_timeout=1), queue=self.queue
+        )
+
+        self.token_patcher = patch(
+            "application.services.token_service.TokenService.extract_user_email_and_user_id_async",
+            new=AsyncMock(return_value=("user@example.com", "user-1"))
+        )
+        self.token_patcher.start()
+
+    async def asyncTearDown(self):
+        await self.queue.drain(1)
+
+    def tearDown(self):
+        self.token_patcher.stop()
+        self.env_patcher.stop()
+
+    async def _upload_video(self, video):
+        with video.payload.open() as stream:
+            self.uploaded.append(stream.read())
+        return video.path_s3, None
+
+    async def test_accepts_and_uploads_in_background(self):
+        content = MP4_HEADER + b"a" * 100
+
+        response = await self.use_case.execute([build_upload_file("video.mp4", content)], "token")
+        await self.queue.drain(1)
+
+        job_id = response[0]["job_id"]
+        self.assertEqual(response[0]["status"], "Aceito")
+        registered_video = self.db_repo.register_video.await_args.args[0]
+        self.assertEqual(registered_video.video_id, job_id)
+        self.assertEqual(self.db_repo.register_video.await_args.kwargs, {"status": "AGUARDANDO_UPLOAD"})
+        self.assertEqual(self.uploaded, [content])
+        self.db_repo.update_video_status.assert_awaited_once_with(
+            job_id, "PENDENTE_PROCESSAMENTO", path_s3="user-1/video.mp4/video.mp4"
+        )
+        # O arquivo temporário é removido após o envio
+        self.assertEqual(os.listdir(self.spool_dir), [])
+        # A reserva expira se o job se perder; concluído o envio, deixa de expirar
+        self.assertIsNotNone(self.db_repo.reserve_video_name.await_args.kwargs["expires_at"])
+        self.db_repo.complete_reservation.assert_awaited_once_with("user-1", "video.mp4")
+
+    async def test_jobs_interrupted_by_shutdown_mark_error_and_release_names(self):
+        async def never_finishes(video):
+            await asyncio.sleep(60)
+
+        self.s3_repo.upload_video.side_effect = never_finishes
+        files = [build_upload_file(f"video-{index}.mp4", MP4_HEADER) for index in range(3)]
+
+        response = await self.use_case.execute(files, "token")
+        await asyncio.sleep(0)
+        await self.queue.drain(0.01)
+
+        # Dois jobs em andamento (um por worker) e um ainda na fila
+        self.assertEqual(
+            sorted(call.args for call in self.db_repo.update_video_status.await_args_list),
+            sorted((item["job_id"], "ERRO_UPLOAD") for item in response)
+        )
+        self.assertEqual(self.db_repo.release_video_name.await_count, 3)
+        self.db_repo.complete_reservation.assert_not_called()
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    async def test_existing_blob_is_registered_without_queueing(self):
+        self.s3_repo.build_blob_key = S3Repository.build_blob_key
+        self.db_repo.acquire_blob.return_value = True
+        use_case = AsyncUploadUseCase(
+            self.s3_repo, self.db_repo, scheduler=UploadScheduler(queue_timeout=1), queue=self.queue,
+            content_addressed=True
+        )
+
+        response = await use_case.execute(
+            [build_upload_file("video.mp4", MP4_HEADER + b"a" * 100)], "token", checksums=["ab" * 32]
+        )
+
+        self.assertEqual(response[0]["status"], "Sucesso")
+        self.assertEqual(self.db_repo.register_video.await_args.args[0].path_s3, f"blobs/ab/{'ab' * 32}")
+        self.assertEqual(self.db_repo.register_video.await_args.kwargs, {})
+        self.s3_repo.upload_video.assert_not_called()
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    async def test_retries_then_marks_error_and_releases_name(self):
+        self.s3_repo.upload_video.side_effect = Exception("S3 indisponível")
+
+        response = await self.use_case.execute([build_upload_file("video.mp4", MP4_HEADER)], "token")
+        await self.queue.drain(1)
+
+        self.assertEqual(self.s3_repo.upload_video.await_count, 2)
+        self.db_repo.update_video_status.assert_awaited_once_with(response[0]["job_id"], "ERRO_UPLOAD")
+        self.db_repo.release_video_name.assert_awaited_once_with("user-1", "video.mp4")
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    async def test_duplicate_name_is_not_queued(self):
+        self.db_repo.reserve_video_name.side_effect = ValueError("O vídeo 'video.mp4' já está carregado.")
+
+        response = await self.use_case.execute([build_upload_file("video.mp4", MP4_HEADER)], "token")
+
+        self.assertIn("já está carregado", response[0]["status"])
+        self.assertNotIn("job_id", response[0])
+        self.db_repo.register_video.assert_not_called()
+
+    async def test_full_queue_returns_429(self):
+        self.queue.has_capacity = MagicMock(return_value=False)
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.execute([build_upload_file("video.mp4", MP4_HEADER)], "token")
+
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertIn("Retry-After", context.exception.headers)
+
+    async def test_status_is_read_from_the_video_record(self):
+        self.db_repo.get_video.return_value = {
+            "id": "job-1", "ID_USUARIO": "user-1", "NOME_VIDEO": "video.mp4",
+            "STATUS_PROCESSAMENTO": "PENDENTE_PROCESSAMENTO", "URL_DOWNLOAD": ""
+        }
+
+        status = await self.use_case.get_status("token", "job-1")
+
+        self.assertEqual(status["status"], "PENDENTE_PROCESSAMENTO")
+
+    async def test_status_of_another_user_is_not_found(self):
+        self.db_repo.get_video.return_value = {"id": "job-1", "ID_USUARIO": "user-2"}
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.get_status("token", "job-1")
+
+        self.assertEqual(context.exception.status_code, 404)
@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+
+from fastapi import UploadFile
+
+from infrastructure.io.buffers import MemoryViewReader, map_stream
+
+
+def spooled_upload(content, max_size):
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(content)
+    spool.seek(0)
+    return UploadFile(file=spool, size=len(content), filename="video.mp4")
+
+
+class TestMapStream(unittest.TestCase):
+
+    def test_in_memory_upload_is_exposed_without_copy(self):
+        upload = spooled_upload(b"video em memoria", max_size=1024)
+
+        with map_stream(upload) as view:
+            self.assertEqual(bytes(view), b"video em memoria")
+            # A view compartilha a memória do arquivo: ele não pode ser alterado enquanto mapeado
+            with self.assertRaises(BufferError):
+                upload.file.write(b"!")
+
+        # A view é liberada: o arquivo pode voltar a crescer
+        upload.file.write(b"!")
+
+    def test_disk_spooled_upload_is_memory_mapped(self):
+        content = b"a" * 4096
+        upload = spooled_upload(content, max_size=16)
+        self.assertTrue(upload.file._rolled)
+
+        with map_stream(upload) as view:
+            self.assertEqual(type(view.obj).__name__, "mmap")
+            self.assertEqual(bytes(view[:10]), content[:10])
+            self.assertEqual(len(view), len(content))
+
+    def test_streams_that_cannot_be_mapped_produce_none(self):
+        class AsyncOnlyStream:
+            async def read(self, size=-1):
+                return b""
+
+        with map_stream(AsyncOnlyStream()) as view:
+            self.assertIsNone(view)
+
+
+class TestMemoryViewReader(unittest.TestCase):
+
+    def test_reads_in_chunks_and_rewinds(self):
+        reader = MemoryViewReader(memoryview(b"0123456789"))
+
+        self.assertEqual(len(reader), 10)
+        self.assertEqual(reader.read(4), b"0123")
+        self.assertEqual(reader.read(), b"456789")
+        reader.seek(0)
+        self.assertEqual(reader.read(3), b"012")
+        self.assertEqual(reader.tell(), 3)
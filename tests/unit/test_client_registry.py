@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from infrastructure.aws.client_registry import AWSClientRegistry
+
+
+def s3_context_factory():
+    """Cada chamada a Session.client devolve um context manager com um cliente distinto."""
+    contexts = []
+
+    def create(*args, **kwargs):
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=AsyncMock())
+        context.__aexit__ = AsyncMock(return_value=False)
+        contexts.append(context)
+        return context
+
+    return create, contexts
+
+
+class TestAWSClientRegistry(unittest.IsolatedAsyncioTestCase):
+
+    @patch("aioboto3.Session.client")
+    async def test_s3_client_reuses_client_for_same_parameters(self, mock_client):
+        s3_client_mock = AsyncMock()
+        mock_client.return_value.__aenter__.return_value = s3_client_mock
+        registry = AWSClientRegistry(max_pool_connections=10)
+
+        async with registry.s3_client(region_name="us-east-1") as first:
+            pass
+        async with registry.s3_client(region_name="us-east-1") as second:
+            pass
+
+        self.assertIs(first, s3_client_mock)
+        self.assertIs(first, second)
+        mock_client.assert_called_once()
+        self.assertEqual(mock_client.call_args.kwargs["config"].max_pool_connections, 10)
+
+    @patch("aioboto3.Session.client")
+    async def test_close_exits_clients(self, mock_client):
+        mock_client.return_value.__aenter__.return_value = AsyncMock()
+        registry = AWSClientRegistry()
+
+        async with registry.s3_client(region_name="us-east-1"):
+            pass
+        await registry.close()
+
+        mock_client.return_value.__aexit__.assert_awaited_once()
+        async with registry.s3_client(region_name="us-east-1"):
+            pass
+        self.assertEqual(mock_client.call_count, 2)
+
+    @patch("aioboto3.Session.client")
+    async def test_rotated_credentials_replace_client_and_close_the_old_one(self, mock_client):
+        mock_client.side_effect, contexts = s3_context_factory()
+        registry = AWSClientRegistry()
+
+        async with registry.s3_client(region_name="us-east-1", aws_access_key_id="old"):
+            pass
+        async with registry.s3_client(region_name="us-east-1", aws_access_key_id="new") as client:
+            pass
+
+        self.assertEqual(len(contexts), 2)
+        self.assertIs(client, contexts[1].__aenter__.return_value)
+        contexts[0].__aexit__.assert_awaited_once()
+        contexts[1].__aexit__.assert_not_awaited()
+
+    @patch("aioboto3.Session.client")
+    async def test_replaced_client_is_closed_only_after_blocks_using_it_finish(self, mock_client):
+        mock_client.side_effect, contexts = s3_context_factory()
+        registry = AWSClientRegistry()
+
+        async with registry.s3_client(region_name="us-east-1", aws_access_key_id="old"):
+            async with registry.s3_client(region_name="us-east-1", aws_access_key_id="new"):
+                pass
+            contexts[0].__aexit__.assert_not_awaited()
+
+        contexts[0].__aexit__.assert_awaited_once()
+        await registry.close()
+        contexts[1].__aexit__.assert_awaited_once()
+
+    @patch("boto3.resource")
+    def test_get_dynamodb_resource_reuses_resource(self, mock_resource):
+        mock_resource.return_value = MagicMock()
+        registry = AWSClientRegistry()
+
+        first = registry.get_dynamodb_resource(region_name="us-east-1")
+        second = registry.get_dynamodb_resource(region_name="us-east-1")
+
+        self.assertIs(first, second)
+        mock_resource.assert_called_once()
+
+    @patch("boto3.resource")
+    def test_get_dynamodb_resource_is_replaced_when_credentials_change(self, mock_resource):
+        mock_resource.side_effect = lambda *args, **kwargs: MagicMock()
+        registry = AWSClientRegistry()
+
+        first = registry.get_dynamodb_resource(region_name="us-east-1", aws_access_key_id="old")
+        second = registry.get_dynamodb_resource(region_name="us-east-1", aws_access_key_id="new")
+
+        self.assertIsNot(first, second)
+        self.assertIs(registry.get_dynamodb_resource(region_name="us-east-1", aws_access_key_id="new"), second)
+        self.assertEqual(len(registry._dynamodb_resources), 1)
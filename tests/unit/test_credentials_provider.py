@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+from infrastructure.aws.credentials_provider import SecretsCredentialsProvider, AWSCredentials
+
+
+class TestSecretsCredentialsProvider(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.client_patcher = patch("boto3.client")
+        mock_client = self.client_patcher.start()
+        self.secrets_mock = MagicMock()
+        self.secrets_mock.get_secret_value.return_value = {
+            "SecretString": json.dumps({
+                "AWS_ACCESS_KEY_ID": "key",
+                "AWS_SECRET_ACCESS_KEY": "secret"
+            })
+        }
+        mock_client.return_value = self.secrets_mock
+        self.env_patcher = patch.dict(os.environ, {})
+        self.env_patcher.start()
+
+    def tearDown(self):
+        self.env_patcher.stop()
+        self.client_patcher.stop()
+
+    async def test_get_credentials_is_cached_within_ttl(self):
+        provider = SecretsCredentialsProvider(ttl_seconds=60, refresh_margin_seconds=0)
+
+        first = await provider.get_credentials()
+        second = await provider.get_credentials()
+
+        self.assertEqual(first, AWSCredentials("key", "secret"))
+        self.assertEqual(first, second)
+        self.secrets_mock.get_secret_value.assert_called_once_with(SecretId="my/aws/creds")
+        self.assertNotIn("AWS_ACCESS_KEY_ID", os.environ)
+
+    async def test_get_credentials_sync_shares_the_cache(self):
+        provider = SecretsCredentialsProvider(ttl_seconds=60, refresh_margin_seconds=0)
+
+        first = provider.get_credentials_sync()
+        second = await provider.get_credentials()
+
+        self.assertEqual(first, AWSCredentials("key", "secret"))
+        self.assertEqual(first, second)
+        self.secrets_mock.get_secret_value.assert_called_once()
+
+    async def test_concurrent_misses_share_a_single_lookup(self):
+        provider = SecretsCredentialsProvider(ttl_seconds=60, refresh_margin_seconds=0)
+
+        results = await asyncio.gather(*[provider.get_credentials() for _ in range(10)])
+
+        self.assertEqual(len(set(results)), 1)
+        self.secrets_mock.get_secret_value.assert_called_once()
+
+    async def test_is_warm_only_with_valid_cached_credentials(self):
+        provider = SecretsCredentialsProvider(ttl_seconds=60, refresh_margin_seconds=0)
+        self.assertFalse(provider.is_warm())
+
+        await provider.get_credentials()
+        self.assertTrue(provider.is_warm())
+
+        provider.invalidate()
+        self.assertFalse(provider.is_warm())
+
+    async def test_expired_credentials_are_fetched_again(self):
+        provider = SecretsCredentialsProvider(ttl_seconds=0, refresh_margin_seconds=0)
+
+        await provider.get_credentials()
+        await provider.get_credentials()
+
+        self.assertEqual(self.secrets_mock.get_secret_value.call_count, 2)
+
+    async def test_refresh_runs_in_background_inside_margin(self):
+        provider = SecretsCredentialsProvider(ttl_seconds=60, refresh_margin_seconds=120)
+
+        await provider.get_credentials()
+        credentials = await provider.get_credentials()
+        await provider._refresh_task
+
+        self.assertEqual(credentials, AWSCredentials("key", "secret"))
+        self.assertEqual(self.secrets_mock.get_secret_value.call_count, 2)
@@ -1,14 +1,25 @@
 import os
 import pytest
 from unittest import mock
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from adapters.repository import db_repository
 from adapters.repository.db_repository import DBRepository
+from domain.entities.video import Video
 
 
-class FakeVideo:
-    def __init__(self, user_email, file_name, user_id="fake_id"):
-        self.user_email = user_email
-        self.file_name = file_name
-        self.user_id = user_id
+def make_video(user_email, file_name, user_id="fake_id"):
+    return Video(
+        file_name=file_name, file_size=0, user_email=user_email, user_id=user_id,
+        path_s3=f"{user_id}/{file_name}"
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_verified_tables():
+    db_repository._verified_tables.clear()
+    yield
+    db_repository._verified_tables.clear()
 
 
 @pytest.fixture
@@ -26,6 +37,12 @@ def mock_dynamodb(mocker):
     mock_dynamodb_client.Table.return_value = mock_table
 
     mock_table.table_name = "Videos"
+    mock_dynamodb_client.meta.client.describe_table.return_value = {
+        "Table": {"GlobalSecondaryIndexes": [{"IndexName": db_repository.USER_VIDEOS_INDEX}]}
+    }
+    mock_dynamodb_client.meta.client.describe_time_to_live.return_value = {
+        "TimeToLiveDescription": {"TimeToLiveStatus": "ENABLED", "AttributeName": db_repository.TTL_ATTRIBUTE}
+    }
 
     # Mock do retorno de dados da tabela
     mock_table.scan.return_value = {
@@ -38,12 +55,25 @@ def mock_dynamodb(mocker):
     return mock_dynamodb_client
 
 
+def test_prod_resource_receives_secret_credentials_explicitly(mock_dynamodb, monkeypatch):
+    from infrastructure.aws.credentials_provider import AWSCredentials
+    monkeypatch.setenv("ENV", "prod")
+    provider = mock.Mock()
+    provider.get_credentials_sync.return_value = AWSCredentials("key", "secret")
+
+    DBRepository("Videos", credentials_provider=provider)
+
+    kwargs = db_repository.boto3.resource.call_args.kwargs
+    assert kwargs["aws_access_key_id"] == "key"
+    assert kwargs["aws_secret_access_key"] == "secret"
+
+
 @pytest.mark.asyncio
 async def test_register_video_inserts_item(mock_dynamodb):
     os.environ["ENV"] = "dev"
     repo = DBRepository("Videos")
 
-    video = FakeVideo("user@example.com", "video.mp4", user_id="user-123")
+    video = make_video("user@example.com", "video.mp4", user_id="user-123")
     await repo.register_video(video)
 
     # Verifica se o item foi inserido na tabela corretamente
@@ -64,17 +94,384 @@ async def test_register_video_logs_error_on_failure(caplog, mock_dynamodb):
     # Simulando uma falha no put_item
     with mock.patch.object(repo.table, "put_item", side_effect=Exception("Erro")):
         with pytest.raises(Exception, match="Erro"):
-            await repo.register_video(FakeVideo("a@a.com", "b.mp4"))
+            await repo.register_video(make_video("a@a.com", "b.mp4"))
 
     # Verifica se o log de erro foi gerado
     assert "Erro ao registrar vídeo no DynamoDB" in caplog.text
 
 
-@pytest.mark.asyncio
-async def test_ensure_table_exists_raises_exception_on_error(mock_dynamodb, mocker):
-    # Simulando erro na listagem de tabelas
-    mock_dynamodb.meta.client.list_tables.side_effect = Exception("Falha")
+def test_ensure_table_exists_raises_exception_on_error(mock_dynamodb, mocker):
+    # Simulando erro na consulta da tabela
+    mock_dynamodb.meta.client.describe_table.side_effect = Exception("Falha")
 
     os.environ["ENV"] = "dev"
+    repo = DBRepository("AnyTable")
     with pytest.raises(Exception, match="Falha"):
-        DBRepository("AnyTable")
+        repo.ensure_table_exists()
+
+
+def test_init_does_not_call_control_plane(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    DBRepository("Videos")
+
+    mock_dynamodb.meta.client.describe_table.assert_not_called()
+    mock_dynamodb.meta.client.list_tables.assert_not_called()
+    mock_dynamodb.create_table.assert_not_called()
+
+
+def test_ensure_table_exists_is_memoized_per_table(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    DBRepository("Videos").ensure_table_exists()
+    DBRepository("Videos").ensure_table_exists()
+
+    mock_dynamodb.meta.client.describe_table.assert_called_once_with(TableName="Videos")
+    mock_dynamodb.create_table.assert_not_called()
+
+
+def test_ensure_table_exists_creates_missing_table(mock_dynamodb):
+    mock_dynamodb.meta.client.describe_table.side_effect = ClientError(
+        {"Error": {"Code": "ResourceNotFoundException", "Message": "not found"}}, "DescribeTable"
+    )
+
+    os.environ["ENV"] = "dev"
+    DBRepository("Videos").ensure_table_exists()
+
+    mock_dynamodb.create_table.assert_called_once()
+    assert mock_dynamodb.create_table.call_args.kwargs["TableName"] == "Videos"
+
+    assert mock_dynamodb.create_table.call_args.kwargs["GlobalSecondaryIndexes"][0]["IndexName"] == db_repository.USER_VIDEOS_INDEX
+
+
+def test_ensure_table_exists_enables_ttl_on_expiration_attribute(mock_dynamodb):
+    mock_dynamodb.meta.client.describe_time_to_live.return_value = {
+        "TimeToLiveDescription": {"TimeToLiveStatus": "DISABLED"}
+    }
+
+    os.environ["ENV"] = "dev"
+    DBRepository("Videos").ensure_table_exists()
+
+    mock_dynamodb.meta.client.update_time_to_live.assert_called_once_with(
+        TableName="Videos", TimeToLiveSpecification={"Enabled": True, "AttributeName": "EXPIRA_EM"}
+    )
+
+
+def test_ensure_table_exists_keeps_enabled_ttl(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    DBRepository("Videos").ensure_table_exists()
+
+    mock_dynamodb.meta.client.update_time_to_live.assert_not_called()
+
+
+def test_ensure_table_exists_only_warns_about_missing_user_index(mock_dynamodb, caplog):
+    mock_dynamodb.meta.client.describe_table.return_value = {"Table": {"TableName": "Videos"}}
+
+    os.environ["ENV"] = "dev"
+    with mock.patch("time.sleep") as sleep:
+        DBRepository("Videos").ensure_table_exists()
+
+    # Criar o índice e preencher os registros antigos fica com o bootstrap.py
+    mock_dynamodb.meta.client.update_table.assert_not_called()
+    mock_dynamodb.Table.return_value.scan.assert_not_called()
+    sleep.assert_not_called()
+    assert db_repository.USER_VIDEOS_INDEX in caplog.text
+    assert "Videos" in db_repository._verified_tables
+
+
+def test_provision_user_videos_index_creates_index_and_waits_until_active(mock_dynamodb):
+    mock_dynamodb.meta.client.describe_table.side_effect = [
+        {"Table": {"TableName": "Videos"}},
+        {"Table": {"GlobalSecondaryIndexes": [{"IndexName": db_repository.USER_VIDEOS_INDEX, "IndexStatus": "CREATING"}]}},
+        {"Table": {"GlobalSecondaryIndexes": [{"IndexName": db_repository.USER_VIDEOS_INDEX, "IndexStatus": "ACTIVE"}]}},
+    ]
+
+    os.environ["ENV"] = "dev"
+    with mock.patch("time.sleep") as sleep:
+        DBRepository("Videos").provision_user_videos_index()
+
+    update = mock_dynamodb.meta.client.update_table.call_args.kwargs
+    assert update["GlobalSecondaryIndexUpdates"][0]["Create"]["IndexName"] == db_repository.USER_VIDEOS_INDEX
+    sleep.assert_called_once_with(db_repository.INDEX_WAIT_POLL_SECONDS)
+
+
+def test_backfill_created_at_fills_records_written_before_the_index(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.get_item.return_value = {}
+    repo.table.scan.side_effect = [
+        {"Items": [{"id": "video-1"}], "LastEvaluatedKey": {"id": "video-1"}},
+        {"Items": [{"id": "video-2"}]},
+    ]
+
+    assert repo.backfill_created_at() == 2
+
+    assert repo.table.scan.call_args_list[1].kwargs["ExclusiveStartKey"] == {"id": "video-1"}
+    repo.table.update_item.assert_called_with(
+        Key={"id": "video-2"},
+        UpdateExpression="SET CRIADO_EM = :criado_em",
+        ConditionExpression="attribute_not_exists(CRIADO_EM)",
+        ExpressionAttributeValues={":criado_em": db_repository.LEGACY_CREATED_AT}
+    )
+    progress = [call.kwargs["Item"] for call in repo.table.put_item.call_args_list]
+    assert progress == [
+        {"id": db_repository.BACKFILL_CREATED_AT_ID, "ULTIMA_CHAVE": {"id": "video-1"}},
+        {"id": db_repository.BACKFILL_CREATED_AT_ID, "CONCLUIDO": True},
+    ]
+
+
+def test_backfill_created_at_resumes_from_saved_progress(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.get_item.return_value = {"Item": {"id": db_repository.BACKFILL_CREATED_AT_ID, "ULTIMA_CHAVE": {"id": "video-1"}}}
+    repo.table.scan.return_value = {"Items": [{"id": "video-2"}]}
+
+    assert repo.backfill_created_at() == 1
+
+    assert repo.table.scan.call_args.kwargs["ExclusiveStartKey"] == {"id": "video-1"}
+
+
+def test_backfill_created_at_is_skipped_once_completed(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.get_item.return_value = {"Item": {"id": db_repository.BACKFILL_CREATED_AT_ID, "CONCLUIDO": True}}
+
+    assert repo.backfill_created_at() == 0
+
+    repo.table.scan.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_list_user_videos_queries_the_user_index(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.query.return_value = {
+        "Items": [{"id": "video-1", "ID_USUARIO": "user-1", "NOME_VIDEO": "video.mp4"}],
+        "LastEvaluatedKey": {"id": "video-1", "ID_USUARIO": "user-1", "CRIADO_EM": "2025-01-01T00:00:00.000000Z"}
+    }
+
+    items, next_key = await repo.list_user_videos("user-1", 10, start_key={"id": "video-0"})
+
+    query = repo.table.query.call_args.kwargs
+    assert query["IndexName"] == db_repository.USER_VIDEOS_INDEX
+    assert query["Limit"] == 10
+    assert query["ScanIndexForward"] is False
+    assert query["ExclusiveStartKey"] == {"id": "video-0"}
+    assert "NOME_VIDEO" in query["ExpressionAttributeNames"].values()
+    assert items[0]["id"] == "video-1"
+    assert next_key["id"] == "video-1"
+
+
+@pytest.mark.asyncio
+async def test_register_videos_retries_unprocessed_items(mock_dynamodb, mocker):
+    mocker.patch("time.sleep")
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    videos = [make_video("a@a.com", f"{i}.mp4") for i in range(2)]
+
+    def batch_write(RequestItems):
+        requests = RequestItems["Videos"]
+        if len(requests) == 2:
+            return {"UnprocessedItems": {"Videos": requests[1:]}}
+        return {"UnprocessedItems": {}}
+
+    mock_dynamodb.batch_write_item.side_effect = batch_write
+
+    not_written = await repo.register_videos(videos)
+
+    assert not_written == []
+    assert mock_dynamodb.batch_write_item.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_register_videos_returns_items_left_unprocessed(mock_dynamodb, mocker):
+    mocker.patch("time.sleep")
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    video = make_video("a@a.com", "a.mp4")
+    mock_dynamodb.batch_write_item.side_effect = lambda RequestItems: {"UnprocessedItems": RequestItems}
+
+    not_written = await repo.register_videos([video])
+
+    assert not_written == [video]
+    assert mock_dynamodb.batch_write_item.call_count == repo.batch_max_attempts
+
+
+@pytest.mark.asyncio
+async def test_reserve_video_name_uses_conditional_put(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+
+    await repo.reserve_video_name("user-123", "video.mp4")
+
+    repo.table.put_item.assert_called_once_with(
+        Item={"id": "RESERVA#user-123#video.mp4", "TIPO_ITEM": "RESERVA_NOME"},
+        ConditionExpression="attribute_not_exists(id)"
+    )
+
+
+@pytest.mark.asyncio
+async def test_reserve_video_name_with_expiry_reclaims_expired_reservations(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+
+    with mock.patch("time.time", return_value=1000):
+        await repo.reserve_video_name("user-123", "video.mp4", expires_at=4600)
+
+    repo.table.put_item.assert_called_once_with(
+        Item={"id": "RESERVA#user-123#video.mp4", "TIPO_ITEM": "RESERVA_NOME", "EXPIRA_EM": 4600},
+        ConditionExpression="attribute_not_exists(id) OR (attribute_not_exists(CONCLUIDO) AND EXPIRA_EM < :agora)",
+        ExpressionAttributeValues={":agora": 1000}
+    )
+
+
+@pytest.mark.asyncio
+async def test_reserve_video_name_raises_when_already_reserved(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.put_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "exists"}}, "PutItem"
+    )
+
+    with pytest.raises(ValueError, match="já está carregado"):
+        await repo.reserve_video_name("user-123", "video.mp4")
+
+
+@pytest.mark.asyncio
+async def test_release_video_name_with_owner_keeps_reservation_taken_by_another_session(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.delete_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "owner"}}, "DeleteItem"
+    )
+
+    await repo.release_video_name("user-123", "video.mp4", owner="sessao-antiga")
+
+    repo.table.delete_item.assert_called_once_with(
+        Key={"id": "RESERVA#user-123#video.mp4"},
+        ConditionExpression="DONO_RESERVA = :dono",
+        ExpressionAttributeValues={":dono": "sessao-antiga"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_reserve_content_names_the_video_already_uploaded(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.put_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "exists"}}, "PutItem"
+    )
+    repo.table.get_item.return_value = {"Item": {"id": "CONTEUDO#user-123#abc", "NOME_VIDEO": "original.mp4"}}
+
+    with pytest.raises(ValueError, match="original.mp4"):
+        await repo.reserve_content("user-123", "abc", "copia.mp4")
+
+    assert repo.table.put_item.call_args.kwargs["Item"] == {
+        "id": "CONTEUDO#user-123#abc", "TIPO_ITEM": "RESERVA_CONTEUDO", "NOME_VIDEO": "copia.mp4"
+    }
+
+
+@pytest.mark.asyncio
+async def test_acquire_blob_counts_references_and_reports_availability(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.update_item.side_effect = [{}, {"Attributes": {"BLOB_STATUS": "DISPONIVEL", "REFERENCIAS": 1}}]
+
+    assert await repo.acquire_blob("abc", "blobs/ab/abc") is False
+    assert await repo.acquire_blob("abc", "blobs/ab/abc") is True
+
+    kwargs = repo.table.update_item.call_args.kwargs
+    assert kwargs["Key"] == {"id": "BLOB#abc"}
+    assert kwargs["UpdateExpression"].startswith("ADD REFERENCIAS :um")
+    assert kwargs["ReturnValues"] == "ALL_OLD"
+
+
+@pytest.mark.asyncio
+async def test_release_blob_marks_unreferenced_blob_for_removal(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.update_item.side_effect = [
+        {"Attributes": {"REFERENCIAS": Decimal(0)}},
+        {"Attributes": {"PATH_S3": "blobs/ab/abc", "REFERENCIAS": Decimal(0), "BLOB_STATUS": "REMOVENDO"}}
+    ]
+
+    assert await repo.release_blob("abc") == "blobs/ab/abc"
+
+    kwargs = repo.table.update_item.call_args.kwargs
+    assert kwargs["ConditionExpression"] == "REFERENCIAS = :zero"
+    assert kwargs["ExpressionAttributeValues"][":removendo"] == db_repository.BLOB_STATUS_REMOVENDO
+
+    await repo.delete_blob("abc")
+    assert repo.table.delete_item.call_args.kwargs["ConditionExpression"] == (
+        "BLOB_STATUS = :removendo AND REFERENCIAS = :zero"
+    )
+
+
+@pytest.mark.asyncio
+async def test_release_blob_keeps_blob_with_remaining_or_new_references(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.update_item.side_effect = [
+        {"Attributes": {"REFERENCIAS": Decimal(1)}},
+        {"Attributes": {"REFERENCIAS": Decimal(0)}},
+        ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "ref"}}, "UpdateItem")
+    ]
+
+    assert await repo.release_blob("abc") is None
+    # Zerado, mas referenciado de novo antes da marcação para remoção
+    assert await repo.release_blob("abc") is None
+    assert repo.table.update_item.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_acquire_blob_is_refused_while_blob_is_being_removed(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    conditional_failure = ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": ""}}, "X")
+    repo.table.update_item.side_effect = conditional_failure
+    repo.table.put_item.side_effect = [conditional_failure, {}]
+
+    with pytest.raises(ValueError, match="sendo removido"):
+        await repo.acquire_blob("abc", "blobs/ab/abc")
+
+    # Com o prazo da remoção vencido, o blob recomeça com esta referência e precisa de envio
+    assert await repo.acquire_blob("abc", "blobs/ab/abc") is False
+    assert repo.table.put_item.call_args.kwargs["Item"]["REFERENCIAS"] == 1
+
+
+@pytest.mark.asyncio
+async def test_update_video_status_sets_status_and_path(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+
+    await repo.update_video_status("video-1", "PENDENTE_PROCESSAMENTO", path_s3="user/video.mp4/video.mp4")
+
+    repo.table.update_item.assert_called_once_with(
+        Key={"id": "video-1"},
+        UpdateExpression="SET STATUS_PROCESSAMENTO = :status, PATH_S3 = :path",
+        ConditionExpression="attribute_exists(id)",
+        ExpressionAttributeValues={":status": "PENDENTE_PROCESSAMENTO", ":path": "user/video.mp4/video.mp4"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_video_ignores_non_video_items(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.get_item.return_value = {"Item": {"id": "RESERVA#u#v", "TIPO_ITEM": "RESERVA_NOME"}}
+
+    assert await repo.get_video("RESERVA#u#v") is None
+
+
+@pytest.mark.asyncio
+async def test_add_rate_usage_increments_window_counter(mock_dynamodb):
+    os.environ["ENV"] = "dev"
+    repo = DBRepository("Videos")
+    repo.table.update_item.return_value = {"Attributes": {"REQUISICOES": Decimal(7), "BYTES_ENVIADOS": Decimal(2048)}}
+
+    totals = await repo.add_rate_usage("user-1", 100, 2, 1024, expires_at=6120)
+
+    assert totals == (7, 2048)
+    kwargs = repo.table.update_item.call_args.kwargs
+    assert kwargs["Key"] == {"id": "LIMITE#user-1#100"}
+    assert kwargs["ExpressionAttributeValues"][":requisicoes"] == 2
+    assert kwargs["ExpressionAttributeValues"][":bytes"] == 1024
+    assert kwargs["ReturnValues"] == "UPDATED_NEW"
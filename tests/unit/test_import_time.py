@@ -0,0 +1,20 @@
+import unittest
+
+from benchmarks.import_time import DEFERRED_MODULES, measure_once, parse_importtime
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   jwt.exceptions\n"
+            "import time:      3500 |      42000 | main\n"
+        )
+
+        self.assertEqual(parse_importtime(output), {"jwt.exceptions": (120, 120), "main": (3500, 42000)})
+
+    def test_main_does_not_import_deferred_modules(self):
+        _, loaded = measure_once("main")
+
+        self.assertEqual([name for name in DEFERRED_MODULES if name in loaded], [])
@@ -0,0 +1,142 @@
+import json
+import logging
+import queue
+import threading
+import unittest
+from logging.handlers import QueueListener
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from adapters.api.request_id_middleware import RequestIdMiddleware
+from infrastructure.logging import logging_config
+from infrastructure.logging.logging_config import (
+    JsonFormatter, NonBlockingQueueHandler, RequestIdFilter, SamplingFilter, bind_request_id, reset_request_id,
+    setup_logging
+)
+from infrastructure.metrics.metrics import LOG_RECORDS_DROPPED
+
+
+def make_record(message="mensagem %s", args=("a",), level=logging.INFO):
+    return logging.LogRecord("teste", level, __file__, 1, message, args, None)
+
+
+class TestLoggingConfig(unittest.TestCase):
+
+    def test_json_line_carries_request_id_of_current_context(self):
+        token = bind_request_id("req-1")
+        try:
+            record = make_record()
+            RequestIdFilter().filter(record)
+        finally:
+            reset_request_id(token)
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(entry["msg"], "mensagem a")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["request_id"], "req-1")
+
+    def test_json_line_omits_request_id_outside_requests(self):
+        record = make_record()
+        RequestIdFilter().filter(record)
+
+        self.assertNotIn("request_id", json.loads(JsonFormatter().format(record)))
+
+    def test_sampling_drops_only_lines_below_warning(self):
+        sampling = SamplingFilter(0)
+
+        self.assertFalse(sampling.filter(make_record(level=logging.INFO)))
+        self.assertTrue(sampling.filter(make_record(level=logging.WARNING)))
+        self.assertTrue(SamplingFilter(1).filter(make_record(level=logging.DEBUG)))
+
+    def test_queue_handler_resolves_message_and_drops_when_full(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        before = LOG_RECORDS_DROPPED.value()
+
+        handler.handle(make_record())
+        handler.handle(make_record())
+
+        queued = handler.queue.get_nowait()
+        self.assertEqual((queued.msg, queued.args), ("mensagem a", None))
+        self.assertEqual(LOG_RECORDS_DROPPED.value(), before + 1)
+
+    def test_queue_handler_leaves_original_record_untouched(self):
+        handler = NonBlockingQueueHandler(queue.Queue())
+        record = make_record()
+
+        handler.handle(record)
+
+        self.assertEqual((record.msg, record.args), ("mensagem %s", ("a",)))
+        self.assertIsNot(handler.queue.get_nowait(), record)
+
+    def test_setup_logging_replaces_existing_root_handlers(self):
+        logging_config.shutdown_logging()
+        existing = logging.StreamHandler()
+        logging.getLogger().addHandler(existing)
+
+        setup_logging()
+
+        self.assertNotIn(existing, logging.getLogger().handlers)
+
+    def test_stop_listener_before_fork_waits_for_room_in_a_full_queue(self):
+        released = threading.Event()
+
+        class SlowHandler(logging.Handler):
+            def handle(self, record):
+                released.wait(1)
+
+        listener = QueueListener(queue.Queue(maxsize=1), SlowHandler())
+        listener.start()
+        listener.queue.put(make_record())
+        listener.queue.put(make_record())
+        threading.Timer(0.05, released.set).start()
+
+        with patch.object(logging_config, "_listener", listener):
+            logging_config._stop_listener()
+            self.assertIsNone(listener._thread)
+            listener.queue.join()
+            logging_config._start_listener()
+            self.assertIsNotNone(listener._thread)
+            logging_config._stop_listener()
+
+    def test_setup_logging_configures_root_only_once(self):
+        setup_logging()
+        setup_logging()
+
+        handlers = [handler for handler in logging.getLogger().handlers if isinstance(handler, NonBlockingQueueHandler)]
+        self.assertEqual(len(handlers), 1)
+        self.assertIsNotNone(logging_config._listener)
+
+
+class TestRequestIdMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        self.seen = []
+
+        @app.get("/ping")
+        async def ping():
+            self.seen.append(logging_config.current_request_id())
+            return {}
+
+        app.add_middleware(RequestIdMiddleware)
+        self.client = TestClient(app)
+
+    def test_generates_request_id_and_returns_it(self):
+        response = self.client.get("/ping")
+
+        self.assertEqual(response.headers["x-request-id"], self.seen[0])
+        self.assertEqual(len(self.seen[0]), 32)
+
+    def test_reuses_valid_client_request_id(self):
+        response = self.client.get("/ping", headers={"X-Request-Id": "abc-123"})
+
+        self.assertEqual(response.headers["x-request-id"], "abc-123")
+        self.assertEqual(self.seen, ["abc-123"])
+
+    def test_ignores_invalid_client_request_id(self):
+        response = self.client.get("/ping", headers={"X-Request-Id": "x" * 200})
+
+        self.assertNotEqual(response.headers["x-request-id"], "x" * 200)
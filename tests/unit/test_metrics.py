@@ -0,0 +1,81 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from infrastructure.metrics import metrics
+from infrastructure.metrics.metrics import Counter, Histogram, MetricsRegistry, emit_emf, span, start_request
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = MetricsRegistry()
+        histogram = registry.register(Histogram("stage_seconds", "Duração", ["stage"], buckets=(0.1, 1)))
+
+        histogram.observe(0.05, stage="s3_put")
+        histogram.observe(0.5, stage="s3_put")
+        histogram.observe(5, stage="s3_put")
+
+        output = registry.render_prometheus()
+        self.assertIn('stage_seconds_bucket{stage="s3_put",le="0.1"} 1', output)
+        self.assertIn('stage_seconds_bucket{stage="s3_put",le="1.0"} 2', output)
+        self.assertIn('stage_seconds_bucket{stage="s3_put",le="+Inf"} 3', output)
+        self.assertIn('stage_seconds_count{stage="s3_put"} 3', output)
+        self.assertIn("# TYPE stage_seconds histogram", output)
+
+    def test_worker_label_marks_series_and_drops_inherited_values(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("requests_total", "Requisições", ["route"]))
+        histogram = registry.register(Histogram("stage_seconds", "Duração", buckets=(1,)))
+        counter.inc(route="/upload")
+
+        registry.label_worker("123")
+        counter.inc(route="/videos")
+        histogram.observe(0.5)
+
+        output = registry.render_prometheus()
+        self.assertNotIn('route="/upload"', output)
+        self.assertIn('requests_total{route="/videos",worker="123"} 1', output)
+        self.assertIn('stage_seconds_bucket{worker="123",le="1.0"} 1', output)
+        self.assertIn('stage_seconds_count{worker="123"} 1', output)
+
+    def test_counter_escapes_label_values(self):
+        counter = Counter("bytes_total", "Bytes", ["stage"])
+
+        counter.inc(10, stage='a"b')
+
+        self.assertIn('bytes_total{stage="a\\"b"} 10', counter.render())
+
+    def test_span_records_duration_bytes_and_request_stage(self):
+        request_metrics = start_request()
+        before = metrics.STAGE_BYTES.value(stage="test_stage")
+
+        with span("test_stage") as stage:
+            stage.nbytes = 1024
+
+        self.assertEqual(metrics.STAGE_BYTES.value(stage="test_stage") - before, 1024)
+        self.assertEqual(len(request_metrics.stages["test_stage"]), 1)
+
+    def test_span_marks_failed_stage(self):
+        before = metrics.STAGE_DURATION.count(stage="failing_stage", outcome="error")
+
+        with self.assertRaises(RuntimeError):
+            with span("failing_stage"):
+                raise RuntimeError("falha")
+
+        self.assertEqual(metrics.STAGE_DURATION.count(stage="failing_stage", outcome="error") - before, 1)
+
+    def test_emit_emf_writes_cloudwatch_document(self):
+        request_metrics = start_request()
+        request_metrics.add("s3_put", 0.25)
+
+        with patch("sys.stdout", new=io.StringIO()) as stdout:
+            emit_emf(request_metrics, "/upload", "POST", 200, 0.5)
+
+        document = json.loads(stdout.getvalue())
+        self.assertEqual(document["Route"], "/upload")
+        self.assertEqual(document["s3_put"], [250.0])
+        self.assertEqual(document["RequestDuration"], 500.0)
+        declared = [metric["Name"] for metric in document["_aws"]["CloudWatchMetrics"][0]["Metrics"]]
+        self.assertEqual(declared, ["RequestDuration", "s3_put"])
@@ -0,0 +1,98 @@
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi import HTTPException
+
+from application.use_cases.presigned_upload import PresignedUploadUseCase
+from adapters.repository.s3_repository import S3Repository
+from adapters.repository.db_repository import DBRepository
+
+
+class TestPresignedUploadUseCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.s3_repo = AsyncMock(spec=S3Repository)
+        self.s3_repo.build_file_key = S3Repository.build_file_key
+        self.db_repo = AsyncMock(spec=DBRepository)
+        self.use_case = PresignedUploadUseCase(self.s3_repo, self.db_repo)
+
+        self.token_patcher = patch(
+            "application.services.token_service.TokenService.extract_user_email_and_user_id_async",
+            new=AsyncMock(return_value=("user@example.com", "user-1"))
+        )
+        self.token_patcher.start()
+
+    def tearDown(self):
+        self.token_patcher.stop()
+
+    async def test_start_reserves_name_and_returns_urls(self):
+        self.s3_repo.create_presigned_upload.return_value = {"mode": "single", "url": "https://s3/put"}
+
+        result = await self.use_case.start("token", "video.mp4", "video/mp4", 1024)
+
+        self.assertEqual(result, {"video": "video.mp4", "mode": "single", "url": "https://s3/put"})
+        self.db_repo.reserve_video_name.assert_awaited_once()
+        self.assertEqual(self.db_repo.reserve_video_name.call_args.args, ("user-1", "video.mp4"))
+        self.assertGreater(self.db_repo.reserve_video_name.call_args.kwargs["expires_at"], time.time())
+        self.s3_repo.create_presigned_upload.assert_awaited_once_with("user-1/video.mp4/video.mp4", "video/mp4", 1024)
+
+    async def test_start_rejects_invalid_type_without_reserving(self):
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.start("token", "video.avi", "video/avi", 1024)
+
+        self.assertEqual(context.exception.status_code, 400)
+        self.db_repo.reserve_video_name.assert_not_called()
+
+    async def test_start_duplicate_name_returns_conflict(self):
+        self.db_repo.reserve_video_name.side_effect = ValueError("já está carregado")
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.start("token", "video.mp4", "video/mp4", 1024)
+
+        self.assertEqual(context.exception.status_code, 409)
+
+    async def test_complete_multipart_verifies_and_registers(self):
+        self.s3_repo.get_video_metadata.return_value = {"size": 1024, "content_type": "video/mp4"}
+
+        result = await self.use_case.complete(
+            "token", "video.mp4", upload_id="upload-1", parts=[{"part_number": 1, "etag": "etag-1"}]
+        )
+
+        self.assertEqual(result["status"], "Sucesso")
+        self.s3_repo.complete_multipart_upload.assert_awaited_once_with(
+            "user-1/video.mp4/video.mp4", "upload-1", [{"PartNumber": 1, "ETag": "etag-1"}]
+        )
+        self.db_repo.complete_reservation.assert_awaited_once_with("user-1", "video.mp4")
+        registered_video = self.db_repo.register_video.call_args.args[0]
+        self.assertEqual(registered_video.path_s3, "user-1/video.mp4/video.mp4")
+
+    async def test_complete_multipart_failure_aborts_upload_and_releases_name(self):
+        self.s3_repo.complete_multipart_upload.side_effect = Exception("InvalidPart")
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.complete("token", "video.mp4", upload_id="upload-1", parts=[])
+
+        self.assertEqual(context.exception.status_code, 400)
+        self.s3_repo.abort_multipart_upload.assert_awaited_once_with("user-1/video.mp4/video.mp4", "upload-1")
+        self.db_repo.release_video_name.assert_awaited_once_with("user-1", "video.mp4")
+        self.db_repo.register_video.assert_not_called()
+
+    async def test_complete_rejects_oversized_object(self):
+        self.s3_repo.get_video_metadata.return_value = {"size": 60 * 1024 * 1024, "content_type": "video/mp4"}
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.complete("token", "video.mp4")
+
+        self.assertEqual(context.exception.status_code, 400)
+        self.s3_repo.delete_video.assert_awaited_once_with("user-1/video.mp4/video.mp4")
+        self.db_repo.release_video_name.assert_awaited_once_with("user-1", "video.mp4")
+        self.db_repo.register_video.assert_not_called()
+
+    async def test_complete_missing_object_returns_not_found(self):
+        self.s3_repo.get_video_metadata.return_value = None
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.complete("token", "video.mp4")
+
+        self.assertEqual(context.exception.status_code, 404)
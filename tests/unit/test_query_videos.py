@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi import HTTPException
+
+from application.use_cases.query_videos import QueryVideosUseCase
+from adapters.repository.db_repository import DBRepository
+
+
+class TestQueryVideosUseCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.db_repo = AsyncMock(spec=DBRepository)
+        self.use_case = QueryVideosUseCase(self.db_repo)
+        self.token_patcher = patch(
+            "application.services.token_service.TokenService.extract_user_email_and_user_id_async",
+            new=AsyncMock(return_value=("user@example.com", "user-1"))
+        )
+        self.token_patcher.start()
+
+    def tearDown(self):
+        self.token_patcher.stop()
+
+    async def test_list_returns_page_and_cursor_for_next_page(self):
+        last_key = {"id": "video-2", "ID_USUARIO": "user-1", "CRIADO_EM": "2025-01-02T00:00:00.000000Z"}
+        self.db_repo.list_user_videos.return_value = (
+            [{"id": "video-2", "NOME_VIDEO": "b.mp4", "STATUS_PROCESSAMENTO": "PENDENTE_PROCESSAMENTO"}],
+            last_key
+        )
+
+        page = await self.use_case.list("token", limit=1)
+
+        self.assertEqual(page["videos"][0]["video"], "b.mp4")
+        self.db_repo.list_user_videos.assert_awaited_once_with("user-1", 1, None)
+
+        self.db_repo.list_user_videos.return_value = ([], None)
+        last_page = await self.use_case.list("token", limit=1, cursor=page["next_cursor"])
+
+        self.db_repo.list_user_videos.assert_awaited_with("user-1", 1, last_key)
+        self.assertIsNone(last_page["next_cursor"])
+
+    async def test_cursor_of_another_user_is_rejected(self):
+        cursor = QueryVideosUseCase._encode_cursor({"id": "video-1", "ID_USUARIO": "user-2"})
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.list("token", cursor=cursor)
+
+        self.assertEqual(context.exception.status_code, 400)
+        self.db_repo.list_user_videos.assert_not_called()
+
+    async def test_malformed_cursor_is_rejected(self):
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.list("token", cursor="not-a-cursor")
+
+        self.assertEqual(context.exception.status_code, 400)
+
+    async def test_get_returns_only_videos_of_the_user(self):
+        self.db_repo.get_video.return_value = {"id": "video-1", "ID_USUARIO": "user-2"}
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.get("token", "video-1")
+
+        self.assertEqual(context.exception.status_code, 404)
@@ -0,0 +1,180 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from adapters.api.rate_limit_middleware import RateLimitMiddleware
+from application.services.rate_limiter import RateLimitExceeded, UserRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestUserRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = UserRateLimiter(
+            requests_per_second=1, request_burst=2, bytes_per_minute=600, enabled=True, clock=self.clock
+        )
+
+    async def test_burst_then_refill(self):
+        self.limiter.acquire("user-1")
+        self.limiter.acquire("user-1")
+
+        with self.assertRaises(RateLimitExceeded) as error:
+            self.limiter.acquire("user-1")
+        self.assertEqual(error.exception.retry_after, 1)
+
+        self.clock.now += 1
+        self.limiter.acquire("user-1")
+
+    async def test_users_are_limited_independently(self):
+        self.limiter.acquire("user-1")
+        self.limiter.acquire("user-1")
+
+        self.limiter.acquire("user-2")
+
+    async def test_bytes_per_minute(self):
+        self.limiter.acquire("user-1", 500)
+
+        with self.assertRaises(RateLimitExceeded) as error:
+            self.limiter.acquire("user-1", 200)
+        self.assertEqual(error.exception.retry_after, 10)
+
+    async def test_request_larger_than_budget_runs_with_full_bucket(self):
+        self.limiter.acquire("user-1", 1000)
+
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire("user-1", 1)
+
+    async def test_received_bytes_delay_next_requests(self):
+        self.limiter.acquire("user-1")
+        self.limiter.charge_bytes("user-1", 700)
+
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire("user-1", 1)
+
+    async def test_disabled_limiter_never_rejects(self):
+        self.limiter.enabled = False
+
+        for _ in range(10):
+            self.limiter.acquire("user-1", 10 ** 9)
+
+    async def test_sync_publishes_local_usage_and_charges_remote_usage(self):
+        store = AsyncMock()
+        # Outra instância já consumiu 1 requisição e 300 bytes na janela
+        store.add_rate_usage.return_value = (2, 400)
+        self.limiter.usage_store = store
+        self.limiter.acquire("user-1", 100)
+
+        await self.limiter.sync()
+
+        args = store.add_rate_usage.await_args.args
+        self.assertEqual(args[:1] + args[2:], ("user-1", 1, 100))
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire("user-1")
+        self.clock.now += 1
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire("user-1", 300)
+        self.limiter.acquire("user-1", 200)
+
+    async def test_failed_sync_keeps_usage_pending(self):
+        store = AsyncMock()
+        store.add_rate_usage.side_effect = [Exception("throttled"), (1, 100)]
+        self.limiter.usage_store = store
+        self.limiter.acquire("user-1", 100)
+
+        await self.limiter.sync()
+        await self.limiter.sync()
+
+        self.assertEqual(store.add_rate_usage.await_args.args[2:], (1, 100))
+
+    async def test_acquire_schedules_sync_after_interval(self):
+        store = AsyncMock()
+        store.add_rate_usage.return_value = (1, 0)
+        self.limiter.usage_store = store
+        self.limiter.sync_interval = 5
+
+        self.limiter.acquire("user-1")
+        self.assertIsNone(self.limiter._sync_task)
+
+        self.clock.now += 5
+        self.limiter.acquire("user-1")
+        await self.limiter._sync_task
+        store.add_rate_usage.assert_awaited_once()
+
+
+class TestRateLimitMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = UserRateLimiter(
+            requests_per_second=1, request_burst=1, bytes_per_minute=600, enabled=True, clock=FakeClock()
+        )
+        self.bodies_read = 0
+        app = FastAPI()
+
+        @app.post("/upload")
+        async def upload(request: Request):
+            await request.body()
+            self.bodies_read += 1
+            return {}
+
+        @app.get("/upload/jobs/{job_id}")
+        async def job_status(job_id: str):
+            return {}
+
+        app.add_middleware(RateLimitMiddleware, limiter=self.limiter)
+        self.client = TestClient(app)
+        self.token_patcher = patch(
+            "application.services.token_service.TokenService.extract_user_email_and_user_id_async",
+            new=AsyncMock(return_value=("user@example.com", "user-1"))
+        )
+        self.token_patcher.start()
+
+    def tearDown(self):
+        self.token_patcher.stop()
+
+    def test_rejects_with_429_before_reading_body(self):
+        headers = {"Authorization": "Bearer token"}
+
+        self.assertEqual(self.client.post("/upload", content=b"a" * 10, headers=headers).status_code, 200)
+        response = self.client.post("/upload", content=b"a" * 10, headers=headers)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertEqual(self.bodies_read, 1)
+
+    def test_content_length_counts_against_byte_budget(self):
+        response = self.client.post("/upload", content=b"a" * 700, headers={"Authorization": "Bearer token"})
+        self.assertEqual(response.status_code, 200)
+
+        self.limiter.clock.now += 1
+        response = self.client.post("/upload", content=b"a", headers={"Authorization": "Bearer token"})
+        self.assertEqual(response.status_code, 429)
+
+    def test_chunked_body_counts_received_bytes(self):
+        chunks = iter([b"a" * 350, b"a" * 350])
+        response = self.client.post("/upload", content=chunks, headers={"Authorization": "Bearer token"})
+        self.assertEqual(response.status_code, 200)
+
+        self.limiter.clock.now += 1
+        response = self.client.post("/upload", content=b"a", headers={"Authorization": "Bearer token"})
+        self.assertEqual(response.status_code, 429)
+
+    def test_requests_without_token_reach_the_route(self):
+        for _ in range(3):
+            self.assertEqual(self.client.post("/upload", content=b"a").status_code, 200)
+
+    def test_status_polling_is_not_rate_limited(self):
+        headers = {"Authorization": "Bearer token"}
+        self.assertEqual(self.client.post("/upload", content=b"a", headers=headers).status_code, 200)
+
+        for _ in range(3):
+            self.assertEqual(self.client.get("/upload/jobs/job-1", headers=headers).status_code, 200)
@@ -0,0 +1,43 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+
+from application.services.registration_batcher import RegistrationBatcher
+
+
+class TestRegistrationBatcher(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.db_repo = AsyncMock()
+        self.db_repo.register_videos.return_value = []
+
+    async def test_writes_one_batch_when_all_expected_videos_report(self):
+        batcher = RegistrationBatcher(self.db_repo, expected=3, linger_seconds=60)
+
+        first, second = batcher.add("a"), batcher.add("b")
+        batcher.discard()
+        await batcher.flush()
+
+        self.db_repo.register_videos.assert_awaited_once_with(["a", "b"])
+        self.assertEqual((first.result(), second.result()), ("a", "b"))
+
+    async def test_early_uploads_are_registered_while_others_still_run(self):
+        batcher = RegistrationBatcher(self.db_repo, expected=2, linger_seconds=0.01)
+
+        early = batcher.add("a")
+        await asyncio.wait_for(early, 1)
+
+        self.db_repo.register_videos.assert_awaited_once_with(["a"])
+        batcher.add("b")
+        await batcher.flush()
+        self.assertEqual(self.db_repo.register_videos.await_args.args[0], ["b"])
+
+    async def test_failed_items_fail_their_registration(self):
+        self.db_repo.register_videos.side_effect = lambda videos: [videos[1]]
+        batcher = RegistrationBatcher(self.db_repo, expected=2)
+
+        ok, failed = batcher.add("a"), batcher.add("b")
+        await batcher.flush()
+
+        self.assertEqual(ok.result(), "a")
+        self.assertIsInstance(failed.exception(), RuntimeError)
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from infrastructure.aws.resilience import botocore_config, call_with_retry, hedged, record_sdk_retries
+from infrastructure.metrics.metrics import AWS_HEDGED_REQUESTS, AWS_RETRIES
+
+
+def client_error(code, status):
+    return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "PutObject")
+
+
+class TestBotocoreConfig(unittest.TestCase):
+
+    @patch.dict(os.environ, {"AWS_MAX_ATTEMPTS": "7", "DYNAMODB_READ_TIMEOUT_SECONDS": "0.5"})
+    def test_uses_adaptive_retries_and_per_service_timeouts(self):
+        config = botocore_config("dynamodb", max_pool_connections=10)
+
+        self.assertEqual(config.retries, {"mode": "adaptive", "max_attempts": 7})
+        self.assertEqual(config.read_timeout, 0.5)
+        self.assertEqual(config.connect_timeout, 1.0)
+        self.assertEqual(config.max_pool_connections, 10)
+
+    def test_counts_retries_reported_by_botocore(self):
+        before = AWS_RETRIES.value(service="s3", operation="teste_sdk", layer="sdk")
+
+        record_sdk_retries("s3", "teste_sdk", {"ResponseMetadata": {"RetryAttempts": 2}})
+
+        self.assertEqual(AWS_RETRIES.value(service="s3", operation="teste_sdk", layer="sdk"), before + 2)
+
+
+@patch.dict(os.environ, {"AWS_RETRY_BASE_DELAY_SECONDS": "0"})
+class TestCallWithRetry(unittest.IsolatedAsyncioTestCase):
+
+    async def test_retries_transient_failures(self):
+        attempts = []
+
+        async def operation():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise EndpointConnectionError(endpoint_url="http://s3")
+            return {"ETag": "etag"}
+
+        before = AWS_RETRIES.value(service="s3", operation="teste_retry", layer="app")
+        response = await call_with_retry(operation, "s3", "teste_retry", max_attempts=3)
+
+        self.assertEqual(response, {"ETag": "etag"})
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(AWS_RETRIES.value(service="s3", operation="teste_retry", layer="app"), before + 2)
+
+    async def test_does_not_retry_invalid_requests(self):
+        attempts = []
+
+        async def operation():
+            attempts.append(1)
+            raise client_error("AccessDenied", 403)
+
+        with self.assertRaises(ClientError):
+            await call_with_retry(operation, "s3", "teste_retry", max_attempts=3)
+        self.assertEqual(len(attempts), 1)
+
+    async def test_retries_throttling(self):
+        attempts = []
+
+        async def operation():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise client_error("SlowDown", 503)
+            return {}
+
+        await call_with_retry(operation, "s3", "teste_retry", max_attempts=2)
+        self.assertEqual(len(attempts), 2)
+
+
+class TestHedged(unittest.IsolatedAsyncioTestCase):
+
+    async def test_second_copy_wins_when_the_first_is_slow(self):
+        calls = []
+        release_first = threading.Event()
+
+        def write():
+            calls.append(1)
+            if len(calls) == 1:
+                release_first.wait(1)
+                return "original"
+            return "hedge"
+
+        before = AWS_HEDGED_REQUESTS.value(operation="teste_hedge", winner="hedge")
+        started = time.perf_counter()
+        result = await hedged(write, "teste_hedge", hedge_after=0.01)
+        elapsed = time.perf_counter() - started
+        release_first.set()
+
+        self.assertEqual(result, "hedge")
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(AWS_HEDGED_REQUESTS.value(operation="teste_hedge", winner="hedge"), before + 1)
+
+    async def test_runs_once_when_hedging_is_disabled(self):
+        calls = []
+
+        result = await hedged(lambda: calls.append(1) or "ok", "teste_hedge", hedge_after=0)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(calls), 1)
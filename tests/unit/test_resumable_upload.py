@@ -0,0 +1,177 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi import HTTPException
+
+from application.use_cases.resumable_upload import ResumableUploadUseCase
+from adapters.repository.s3_repository import S3Repository
+from adapters.repository.db_repository import DBRepository
+
+MP4_HEADER = b"\x00\x00\x00\x18ftypmp42"
+PART_SIZE = 16
+
+
+async def chunks_of(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestResumableUploadUseCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.s3_repo = AsyncMock(spec=S3Repository)
+        self.s3_repo.build_file_key = S3Repository.build_file_key
+        self.s3_repo.part_size = PART_SIZE
+        self.s3_repo.create_multipart_upload.return_value = "upload-1"
+        self.s3_repo.upload_part.side_effect = lambda key, upload_id, number, body: {
+            "PartNumber": number, "ETag": f"etag-{number}", "ChecksumSHA256": f"sha-{number}"
+        }
+
+        # Sessões em memória simulando o DynamoDB
+        self.sessions = {}
+        self.db_repo = AsyncMock(spec=DBRepository)
+        self.db_repo.create_upload_session.side_effect = self._create_session
+        self.db_repo.get_upload_session.side_effect = lambda session_id: dict(self.sessions[session_id])
+        self.db_repo.append_upload_part.side_effect = self._append_part
+        self.use_case = ResumableUploadUseCase(self.s3_repo, self.db_repo)
+
+        self.token_patcher = patch(
+            "application.services.token_service.TokenService.extract_user_email_and_user_id_async",
+            new=AsyncMock(return_value=("user@example.com", "user-1"))
+        )
+        self.token_patcher.start()
+
+    def tearDown(self):
+        self.token_patcher.stop()
+
+    async def _create_session(self, session):
+        self.sessions[session["session_id"]] = dict(session, PARTES=[])
+
+    async def _append_part(self, session_id, expected_offset, new_offset, part):
+        session = self.sessions[session_id]
+        assert session["OFFSET_ATUAL"] == expected_offset
+        session["OFFSET_ATUAL"] = new_offset
+        session["PARTES"] = session["PARTES"] + [part]
+
+    async def test_interrupted_upload_resumes_from_last_full_part(self):
+        content = MP4_HEADER + b"a" * 30  # 38 bytes: partes de 16, 16 e 6
+        session = await self.use_case.create("token", "video.mp4", "video/mp4", len(content))
+        session_id = session["session_id"]
+
+        # Conexão cai no meio da segunda parte
+        session = await self.use_case.append("token", session_id, 0, chunks_of(content[:10], content[10:25]))
+        self.assertEqual(session["OFFSET_ATUAL"], PART_SIZE)
+
+        # O cliente retoma a partir do offset informado
+        session = await self.use_case.append("token", session_id, PART_SIZE, chunks_of(content[PART_SIZE:]))
+        self.assertEqual(session["OFFSET_ATUAL"], len(content))
+
+        result = await self.use_case.complete("token", session_id)
+
+        self.assertEqual(result["status"], "Sucesso")
+        self.assertEqual([call.args[2] for call in self.s3_repo.upload_part.await_args_list], [1, 2, 3])
+        self.s3_repo.complete_multipart_upload.assert_awaited_once_with(
+            "user-1/video.mp4/video.mp4", "upload-1",
+            [
+                {"PartNumber": 1, "ETag": "etag-1", "ChecksumSHA256": "sha-1"},
+                {"PartNumber": 2, "ETag": "etag-2", "ChecksumSHA256": "sha-2"},
+                {"PartNumber": 3, "ETag": "etag-3", "ChecksumSHA256": "sha-3"}
+            ]
+        )
+        self.db_repo.register_video.assert_awaited_once()
+
+    async def test_append_with_wrong_offset_returns_conflict(self):
+        session = await self.use_case.create("token", "video.mp4", "video/mp4", 100)
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.append("token", session["session_id"], 50, chunks_of(b"x"))
+
+        self.assertEqual(context.exception.status_code, 409)
+
+    async def test_append_rejects_content_that_is_not_a_video(self):
+        session = await self.use_case.create("token", "video.mp4", "video/mp4", 32)
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.append("token", session["session_id"], 0, chunks_of(b"not a video at all!!"))
+
+        self.assertEqual(context.exception.status_code, 415)
+        self.s3_repo.upload_part.assert_not_called()
+
+    async def test_complete_requires_all_bytes(self):
+        session = await self.use_case.create("token", "video.mp4", "video/mp4", 100)
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.complete("token", session["session_id"])
+
+        self.assertEqual(context.exception.status_code, 409)
+        self.s3_repo.complete_multipart_upload.assert_not_called()
+
+    async def test_session_of_another_user_is_not_found(self):
+        session = await self.use_case.create("token", "video.mp4", "video/mp4", 100)
+        self.sessions[session["session_id"]]["USUARIO_SESSAO"] = "other-user"
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.get_session("token", session["session_id"])
+
+        self.assertEqual(context.exception.status_code, 404)
+
+    async def test_create_rejects_size_above_limit(self):
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.create("token", "video.mp4", "video/mp4", self.use_case.max_video_size + 1)
+
+        self.assertEqual(context.exception.status_code, 413)
+        self.db_repo.reserve_video_name.assert_not_called()
+
+    async def _uploaded_session(self):
+        content = MP4_HEADER + b"a" * 8
+        session = await self.use_case.create("token", "video.mp4", "video/mp4", len(content))
+        await self.use_case.append("token", session["session_id"], 0, chunks_of(content))
+        return session["session_id"]
+
+    async def test_complete_closes_session_only_after_registering(self):
+        session_id = await self._uploaded_session()
+        calls = []
+        self.db_repo.register_video.side_effect = lambda video: calls.append("register")
+        self.db_repo.close_upload_session.side_effect = lambda *args: calls.append(args)
+
+        await self.use_case.complete("token", session_id)
+
+        self.assertEqual(calls, ["register", (session_id, "CONCLUIDA")])
+
+    async def test_failed_s3_completion_keeps_session_open_for_retry(self):
+        session_id = await self._uploaded_session()
+        self.s3_repo.complete_multipart_upload.side_effect = Exception("S3 indisponível")
+
+        with self.assertRaises(Exception):
+            await self.use_case.complete("token", session_id)
+
+        self.db_repo.reopen_reservation.assert_awaited_once_with(
+            "user-1", "video.mp4", expires_at=self.sessions[session_id]["EXPIRA_EM"]
+        )
+        self.db_repo.close_upload_session.assert_not_called()
+        self.s3_repo.abort_multipart_upload.assert_not_called()
+
+    async def test_failed_registration_discards_object_and_releases_name(self):
+        session_id = await self._uploaded_session()
+        self.db_repo.register_video.side_effect = Exception("DynamoDB indisponível")
+
+        with self.assertRaises(Exception):
+            await self.use_case.complete("token", session_id)
+
+        self.db_repo.close_upload_session.assert_awaited_once_with(session_id, "CANCELADA")
+        self.s3_repo.delete_video.assert_awaited_once_with("user-1/video.mp4/video.mp4")
+        self.db_repo.release_video_name.assert_awaited_once_with("user-1", "video.mp4", owner=session_id)
+
+    async def test_expired_session_aborts_upload_and_releases_name(self):
+        session = await self.use_case.create("token", "video.mp4", "video/mp4", 100)
+        self.sessions[session["session_id"]]["EXPIRA_EM"] = 0
+
+        with self.assertRaises(HTTPException) as context:
+            await self.use_case.get_session("token", session["session_id"])
+
+        self.assertEqual(context.exception.status_code, 410)
+        self.db_repo.close_upload_session.assert_awaited_once_with(session["session_id"], "EXPIRADA")
+        self.s3_repo.abort_multipart_upload.assert_awaited_once_with("user-1/video.mp4/video.mp4", "upload-1")
+        self.db_repo.release_video_name.assert_awaited_once_with("user-1", "video.mp4", owner=session["session_id"])
+        # A reserva do nome pertence à sessão: só ela pode liberá-la
+        self.assertEqual(self.db_repo.reserve_video_name.await_args.kwargs["owner"], session["session_id"])
@@ -1,12 +1,21 @@
+import hashlib
+import io
 import json
 import unittest
 from unittest.mock import patch, AsyncMock, MagicMock
 import os
+import tempfile
 import uuid
 
 import boto3
+from botocore.exceptions import EndpointConnectionError
 
-from adapters.repository.s3_repository import S3Repository
+from fastapi import UploadFile
+
+from adapters.repository.s3_repository import S3Repository, sha256_base64
+from infrastructure.io.buffers import MemoryViewReader
+from infrastructure.aws.credentials_provider import get_credentials_provider
+from domain.entities.video import Video, VideoPayload
 
 class TestS3RepositoryAsync(unittest.IsolatedAsyncioTestCase):
 
@@ -42,7 +51,9 @@ class TestS3RepositoryAsync(unittest.IsolatedAsyncioTestCase):
         self.video_mock.user_email = "user@example.com"
         self.video_mock.user_id = "123456"
         self.video_mock.file_name = "test.mp4"
-        self.video_mock.content = b"dummy_content"
+        self.video_mock.payload = VideoPayload.from_stream(b"dummy_content")
+        self.video_mock.path_s3 = ""
+        self.video_mock.checksum_sha256 = None
         # Mock SecretsManager
         self.secrets_patcher = patch("boto3.client")
         mock_client = self.secrets_patcher.start()
@@ -54,6 +65,8 @@ class TestS3RepositoryAsync(unittest.IsolatedAsyncioTestCase):
             })
         }
         mock_client.return_value = mock_instance
+        self.secrets_client_mock = mock_instance
+        get_credentials_provider().invalidate()
 
     def tearDown(self):
         self.secrets_patcher.stop()
@@ -70,9 +83,9 @@ class TestS3RepositoryAsync(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(repo.bucket_name, self.bucket_name)
         self.assertEqual(repo.env, "dev")
         self.assertEqual(repo.endpoint_url, "http://localhost:4566")
-        self.assertEqual(repo.aws_access_key_id, "test-key")
-        self.assertEqual(repo.aws_secret_access_key, "test-secret")
         self.assertEqual(repo.region_name, "us-east-1")
+        # As credenciais são buscadas sob demanda, não na construção do repositório
+        self.secrets_client_mock.get_secret_value.assert_not_called()
 
     @patch("aioboto3.Session.client")
     @patch("uuid.uuid4", return_value=uuid.UUID("12345678123456781234567812345678"))
@@ -88,20 +101,24 @@ class TestS3RepositoryAsync(unittest.IsolatedAsyncioTestCase):
         s3_client_mock = AsyncMock()
         mock_client.return_value.__aenter__.return_value = s3_client_mock
 
-        s3_client_mock.list_objects_v2.return_value = {}
 
         repo = S3Repository(self.bucket_name)
 
         # Act
         file_key, error = await repo.upload_video(self.video_mock)
+        await repo.upload_video(self.video_mock)
 
         # Assert
         expected_key = f"{self.video_mock.user_id}/{self.video_mock.file_name}/{self.video_mock.file_name}"
         self.assertEqual(file_key, expected_key)
         self.assertIsNone(error)
-        s3_client_mock.list_objects_v2.assert_called_once()
-        s3_client_mock.put_object.assert_any_await(Bucket=self.bucket_name, Key=f"{self.video_mock.user_id}/{self.video_mock.file_name}/")
-        s3_client_mock.put_object.assert_any_await(Bucket=self.bucket_name, Key=expected_key, Body=self.video_mock.content)
+        self.secrets_client_mock.get_secret_value.assert_called_once_with(SecretId='my/aws/creds')
+        self.assertEqual(mock_client.call_args.kwargs["aws_access_key_id"], "test-key")
+        self.assertEqual(mock_client.call_args.kwargs["aws_secret_access_key"], "test-secret")
+        s3_client_mock.put_object.assert_any_await(
+            Bucket=self.bucket_name, Key=expected_key, Body=b"dummy_content",
+            ChecksumSHA256=sha256_base64(b"dummy_content")
+        )
 
     @patch("aioboto3.Session.client")
     @patch.dict(os.environ, {
@@ -111,19 +128,17 @@ class TestS3RepositoryAsync(unittest.IsolatedAsyncioTestCase):
         "AWS_SECRET_ACCESS_KEY": "test-secret",
         "REGION_NAME": "us-east-1"
     })
-    async def test_upload_video_already_exists_should_raise(self, mock_client):
+    async def test_upload_video_makes_a_single_s3_request(self, mock_client):
         s3_client_mock = AsyncMock()
         mock_client.return_value.__aenter__.return_value = s3_client_mock
 
-        s3_client_mock.list_objects_v2.return_value = {"Contents": [{"Key": "some/key"}]}
-
         repo = S3Repository(self.bucket_name)
 
-        with self.assertRaises(ValueError) as context:
-            await repo.upload_video(self.video_mock)
+        await repo.upload_video(self.video_mock)
 
-        self.assertIn("já está carregado", str(context.exception))
-        s3_client_mock.list_objects_v2.assert_called_once()
+        # Sem listagem prévia nem chave de "pasta": a duplicidade é tratada no DynamoDB
+        s3_client_mock.list_objects_v2.assert_not_called()
+        s3_client_mock.put_object.assert_awaited_once()
 
     @patch("aioboto3.Session.client", side_effect=Exception("Falha no S3"))
     @patch.dict(os.environ, {
@@ -140,3 +155,262 @@ class TestS3RepositoryAsync(unittest.IsolatedAsyncioTestCase):
             await repo.upload_video(self.video_mock)
 
         self.assertIn("Falha no S3", str(context.exception))
+
+    @patch("aioboto3.Session.client")
+    @patch.dict(os.environ, {
+        "ENV": "dev",
+        "ENDPOINT_URL": "http://localhost:4566",
+        "AWS_ACCESS_KEY_ID": "test-key",
+        "AWS_SECRET_ACCESS_KEY": "test-secret",
+        "REGION_NAME": "us-east-1",
+        "S3_MULTIPART_PART_SIZE": str(5 * 1024 * 1024)
+    })
+    async def test_upload_video_stream_uses_multipart(self, mock_client):
+        s3_client_mock = AsyncMock()
+        mock_client.return_value.__aenter__.return_value = s3_client_mock
+        s3_client_mock.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        s3_client_mock.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+
+        part_size = 5 * 1024 * 1024
+        self.video_mock.payload = VideoPayload.from_stream(FakeStream(b"a" * (part_size * 2 + 10)))
+        full_part, last_part = sha256_base64(b"a" * part_size), sha256_base64(b"a" * 10)
+        repo = S3Repository(self.bucket_name)
+
+        file_key, _ = await repo.upload_video(self.video_mock)
+
+        self.assertEqual(s3_client_mock.upload_part.await_count, 3)
+        s3_client_mock.complete_multipart_upload.assert_awaited_once_with(
+            Bucket=self.bucket_name,
+            Key=file_key,
+            UploadId="upload-1",
+            MultipartUpload={"Parts": [
+                {"ETag": "etag-1", "PartNumber": 1, "ChecksumSHA256": full_part},
+                {"ETag": "etag-2", "PartNumber": 2, "ChecksumSHA256": full_part},
+                {"ETag": "etag-3", "PartNumber": 3, "ChecksumSHA256": last_part}
+            ]}
+        )
+        s3_client_mock.create_multipart_upload.assert_awaited_once_with(
+            Bucket=self.bucket_name, Key=file_key, ChecksumAlgorithm="SHA256"
+        )
+        s3_client_mock.abort_multipart_upload.assert_not_called()
+
+    @patch("aioboto3.Session.client")
+    @patch.dict(os.environ, {
+        "ENV": "dev",
+        "ENDPOINT_URL": "http://localhost:4566",
+        "AWS_ACCESS_KEY_ID": "test-key",
+        "AWS_SECRET_ACCESS_KEY": "test-secret",
+        "REGION_NAME": "us-east-1",
+        "S3_MULTIPART_PART_SIZE": str(5 * 1024 * 1024)
+    })
+    async def test_upload_video_stream_aborts_multipart_on_failure(self, mock_client):
+        s3_client_mock = AsyncMock()
+        mock_client.return_value.__aenter__.return_value = s3_client_mock
+        s3_client_mock.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        s3_client_mock.upload_part.side_effect = Exception("Falha na parte")
+
+        self.video_mock.payload = VideoPayload.from_stream(FakeStream(b"a" * (5 * 1024 * 1024 * 3)))
+        repo = S3Repository(self.bucket_name)
+
+        with self.assertRaises(Exception) as context:
+            await repo.upload_video(self.video_mock)
+
+        self.assertIn("Falha na parte", str(context.exception))
+        s3_client_mock.complete_multipart_upload.assert_not_called()
+        s3_client_mock.abort_multipart_upload.assert_awaited_once_with(
+            Bucket=self.bucket_name, Key=f"{self.video_mock.user_id}/{self.video_mock.file_name}/{self.video_mock.file_name}",
+            UploadId="upload-1"
+        )
+
+    @patch("aioboto3.Session.client")
+    @patch.dict(os.environ, {
+        "ENV": "dev",
+        "ENDPOINT_URL": "http://localhost:4566",
+        "AWS_ACCESS_KEY_ID": "test-key",
+        "AWS_SECRET_ACCESS_KEY": "test-secret",
+        "REGION_NAME": "us-east-1",
+        "S3_MULTIPART_PART_SIZE": str(5 * 1024 * 1024),
+        "AWS_RETRY_BASE_DELAY_SECONDS": "0"
+    })
+    async def test_upload_video_stream_retries_only_the_failed_part(self, mock_client):
+        s3_client_mock = AsyncMock()
+        mock_client.return_value.__aenter__.return_value = s3_client_mock
+        s3_client_mock.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        failures = {2: 1}
+
+        async def upload_part(**kwargs):
+            if failures.get(kwargs["PartNumber"]):
+                failures[kwargs["PartNumber"]] -= 1
+                raise EndpointConnectionError(endpoint_url="http://localhost:4566")
+            return {"ETag": f"etag-{kwargs['PartNumber']}"}
+
+        s3_client_mock.upload_part.side_effect = upload_part
+        self.video_mock.payload = VideoPayload.from_stream(FakeStream(b"a" * (5 * 1024 * 1024 * 2 + 10)))
+        repo = S3Repository(self.bucket_name)
+
+        await repo.upload_video(self.video_mock)
+
+        part_numbers = sorted(call.kwargs["PartNumber"] for call in s3_client_mock.upload_part.await_args_list)
+        self.assertEqual(part_numbers, [1, 2, 2, 3])
+        s3_client_mock.complete_multipart_upload.assert_awaited_once()
+        s3_client_mock.abort_multipart_upload.assert_not_called()
+
+    @patch("aioboto3.Session.client")
+    @patch.dict(os.environ, {
+        "ENV": "dev",
+        "ENDPOINT_URL": "http://localhost:4566",
+        "AWS_ACCESS_KEY_ID": "test-key",
+        "AWS_SECRET_ACCESS_KEY": "test-secret",
+        "REGION_NAME": "us-east-1"
+    })
+    async def test_upload_video_small_stream_uses_single_put(self, mock_client):
+        s3_client_mock = AsyncMock()
+        mock_client.return_value.__aenter__.return_value = s3_client_mock
+
+        self.video_mock.payload = VideoPayload.from_stream(FakeStream(b"small video"))
+        repo = S3Repository(self.bucket_name)
+
+        file_key, _ = await repo.upload_video(self.video_mock)
+
+        s3_client_mock.put_object.assert_any_await(
+            Bucket=self.bucket_name, Key=file_key, Body=b"small video", ChecksumSHA256=sha256_base64(b"small video")
+        )
+        s3_client_mock.create_multipart_upload.assert_not_called()
+
+    @patch("aioboto3.Session.client")
+    @patch.dict(os.environ, {
+        "ENV": "dev",
+        "ENDPOINT_URL": "http://localhost:4566",
+        "AWS_ACCESS_KEY_ID": "test-key",
+        "AWS_SECRET_ACCESS_KEY": "test-secret",
+        "REGION_NAME": "us-east-1"
+    })
+    async def test_upload_video_reuses_checksum_computed_on_receive(self, mock_client):
+        s3_client_mock = AsyncMock()
+        mock_client.return_value.__aenter__.return_value = s3_client_mock
+
+        self.video_mock.payload = VideoPayload.from_stream(FakeStream(b"small video"))
+        self.video_mock.checksum_sha256 = hashlib.sha256(b"small video").hexdigest()
+        repo = S3Repository(self.bucket_name)
+
+        await repo.upload_video(self.video_mock)
+
+        checksum = s3_client_mock.put_object.await_args.kwargs["ChecksumSHA256"]
+        self.assertEqual(checksum, sha256_base64(b"small video"))
+
+
+class TestS3RepositoryZeroCopy(unittest.IsolatedAsyncioTestCase):
+
+    @patch("aioboto3.Session.client")
+    @patch.dict(os.environ, {
+        "ENV": "dev",
+        "ENDPOINT_URL": "http://localhost:4566",
+        "AWS_ACCESS_KEY_ID": "test-key",
+        "AWS_SECRET_ACCESS_KEY": "test-secret",
+        "REGION_NAME": "us-east-1",
+        "S3_MULTIPART_PART_SIZE": str(5 * 1024 * 1024)
+    })
+    async def test_spooled_upload_parts_are_sent_as_views_of_the_file(self, mock_client):
+        s3_client_mock = AsyncMock()
+        mock_client.return_value.__aenter__.return_value = s3_client_mock
+        s3_client_mock.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        received = {}
+
+        async def upload_part(**kwargs):
+            self.assertIsInstance(kwargs["Body"], MemoryViewReader)
+            received[kwargs["PartNumber"]] = kwargs["Body"].read()
+            return {"ETag": f"etag-{kwargs['PartNumber']}"}
+
+        s3_client_mock.upload_part.side_effect = upload_part
+        content = bytes(range(256)) * (11 * 1024 * 1024 // 256)
+        spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        spool.write(content)
+        spool.seek(0)
+        video = MagicMock()
+        video.user_id, video.file_name, video.path_s3, video.checksum_sha256 = "123456", "test.mp4", "", None
+        video.payload = VideoPayload.from_stream(UploadFile(file=spool, size=len(content), filename="test.mp4"))
+
+        await S3Repository("test-bucket", credentials_provider=StaticCredentials()).upload_video(video)
+
+        self.assertEqual(b"".join(received[number] for number in sorted(received)), content)
+        parts = s3_client_mock.complete_multipart_upload.await_args.kwargs["MultipartUpload"]["Parts"]
+        self.assertEqual(
+            [part["ChecksumSHA256"] for part in parts],
+            [sha256_base64(received[number]) for number in sorted(received)]
+        )
+
+    @patch("aioboto3.Session.client")
+    @patch.dict(os.environ, {
+        "ENV": "dev",
+        "ENDPOINT_URL": "http://localhost:4566",
+        "AWS_ACCESS_KEY_ID": "test-key",
+        "AWS_SECRET_ACCESS_KEY": "test-secret",
+        "REGION_NAME": "us-east-1",
+        "S3_MULTIPART_PART_SIZE": str(5 * 1024 * 1024)
+    })
+    async def test_part_checksums_computed_on_receive_are_not_recomputed(self, mock_client):
+        s3_client_mock = AsyncMock()
+        mock_client.return_value.__aenter__.return_value = s3_client_mock
+        s3_client_mock.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        s3_client_mock.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+        content = b"a" * (11 * 1024 * 1024)
+        spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        spool.write(content)
+        spool.seek(0)
+        video = Video(
+            file_name="test.mp4", file_size=len(content), user_email="user@example.com", user_id="123456",
+            part_checksums=("sha-1", "sha-2", "sha-3"),
+            payload=VideoPayload.from_stream(UploadFile(file=spool, size=len(content), filename="test.mp4"))
+        )
+
+        with patch("adapters.repository.s3_repository.sha256_base64", side_effect=AssertionError("recalculado")):
+            await S3Repository("test-bucket", credentials_provider=StaticCredentials()).upload_video(video)
+
+        parts = s3_client_mock.complete_multipart_upload.await_args.kwargs["MultipartUpload"]["Parts"]
+        self.assertEqual([part["ChecksumSHA256"] for part in parts], ["sha-1", "sha-2", "sha-3"])
+
+
+class StaticCredentials:
+    async def get_credentials(self):
+        return MagicMock(access_key_id="test-key", secret_access_key="test-secret")
+
+
+class FakeStream:
+    """Simula a leitura assíncrona em blocos de um UploadFile."""
+
+    def __init__(self, data):
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self._buffer.read(size)
+
+
+class TestS3RepositoryPresigned(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.repo = S3Repository("test-bucket", credentials_provider=AsyncMock())
+        self.repo.part_size = 5 * 1024 * 1024
+        self.s3_client_mock = AsyncMock()
+        self.s3_client_mock.generate_presigned_url.side_effect = lambda operation, Params, ExpiresIn: f"https://s3/{operation}"
+        self.client_patcher = patch("aioboto3.Session.client")
+        mock_client = self.client_patcher.start()
+        mock_client.return_value.__aenter__.return_value = self.s3_client_mock
+
+    def tearDown(self):
+        self.client_patcher.stop()
+
+    async def test_small_file_gets_single_put_url(self):
+        result = await self.repo.create_presigned_upload("key", "video/mp4", 1024)
+
+        self.assertEqual(result["mode"], "single")
+        self.assertEqual(result["url"], "https://s3/put_object")
+        self.s3_client_mock.create_multipart_upload.assert_not_called()
+
+    async def test_large_file_gets_one_url_per_part(self):
+        self.s3_client_mock.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+
+        result = await self.repo.create_presigned_upload("key", "video/mp4", 12 * 1024 * 1024)
+
+        self.assertEqual(result["mode"], "multipart")
+        self.assertEqual(result["upload_id"], "upload-1")
+        self.assertEqual([part["part_number"] for part in result["parts"]], [1, 2, 3])
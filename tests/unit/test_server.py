@@ -0,0 +1,49 @@
+import os
+import socket
+import unittest
+
+import server
+
+
+async def failing_startup_app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await receive()
+        await send({"type": "lifespan.startup.failed", "message": "sem credenciais"})
+
+
+class TestServer(unittest.TestCase):
+
+    def test_build_config_applies_limits(self):
+        args = server.parse_args(["--keep-alive", "75", "--limit-concurrency", "200", "--max-requests", "0"])
+
+        config = server.build_config(failing_startup_app, args)
+
+        self.assertEqual(config.timeout_keep_alive, 75)
+        self.assertEqual(config.limit_concurrency, 200)
+        self.assertIsNone(config.limit_max_requests)
+        self.assertEqual(config.backlog, args.backlog)
+        self.assertEqual(config.lifespan, "on")
+        self.assertIsNone(config.log_config)
+
+    def test_header_limit_uses_the_h11_parser(self):
+        default = server.build_config(failing_startup_app, server.parse_args([]))
+        limited = server.build_config(failing_startup_app, server.parse_args(["--max-header-bytes", "8192"]))
+
+        self.assertEqual(default.http, "auto")
+        self.assertEqual(limited.http, "h11")
+        self.assertEqual(limited.h11_max_incomplete_event_size, 8192)
+
+    def test_bind_socket_is_shared_with_workers(self):
+        sock = server.bind_socket("127.0.0.1", 0, 16)
+        self.addCleanup(sock.close)
+
+        self.assertTrue(sock.get_inheritable())
+        self.assertEqual(sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR), 1)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requer fork")
+    def test_supervisor_stops_when_workers_fail_to_boot(self):
+        sock = server.bind_socket("127.0.0.1", 0, 16)
+        self.addCleanup(sock.close)
+        args = server.parse_args(["--workers", "2"])
+
+        self.assertEqual(server.Supervisor(failing_startup_app, sock, args).run(), 1)
@@ -0,0 +1,66 @@
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+import jwt
+
+from application.services.token_cache import JWKSCache, TokenResultCache
+
+
+class TestJWKSCache(unittest.TestCase):
+
+    @patch('jwt.PyJWKClient.get_jwk_set')
+    def test_keys_are_cached_by_kid(self, mock_get_jwk_set):
+        key = MagicMock(key_id="kid-1")
+        mock_get_jwk_set.return_value = MagicMock(keys=[key])
+        cache = JWKSCache("https://example.com/jwks.json", ttl_seconds=60)
+
+        self.assertIs(cache.get_signing_key("kid-1"), key)
+        self.assertIs(cache.get_signing_key("kid-1"), key)
+        mock_get_jwk_set.assert_called_once()
+
+    @patch('jwt.PyJWKClient.get_jwk_set')
+    def test_unknown_kid_triggers_refetch(self, mock_get_jwk_set):
+        old_key = MagicMock(key_id="kid-1")
+        new_key = MagicMock(key_id="kid-2")
+        mock_get_jwk_set.side_effect = [MagicMock(keys=[old_key]), MagicMock(keys=[old_key, new_key])]
+        cache = JWKSCache("https://example.com/jwks.json", ttl_seconds=60, min_refetch_seconds=0)
+
+        cache.get_signing_key("kid-1")
+        self.assertIs(cache.get_signing_key("kid-2"), new_key)
+        self.assertEqual(mock_get_jwk_set.call_count, 2)
+
+    @patch('jwt.PyJWKClient.get_jwk_set')
+    def test_unknown_kid_raises_after_refetch(self, mock_get_jwk_set):
+        mock_get_jwk_set.return_value = MagicMock(keys=[MagicMock(key_id="kid-1")])
+        cache = JWKSCache("https://example.com/jwks.json", ttl_seconds=60, min_refetch_seconds=60)
+
+        cache.get_signing_key("kid-1")
+        with self.assertRaises(jwt.PyJWKClientError):
+            cache.get_signing_key("unknown")
+        # Dentro do intervalo mínimo não há nova busca
+        mock_get_jwk_set.assert_called_once()
+
+
+class TestTokenResultCache(unittest.TestCase):
+
+    def test_entries_expire_with_token_exp(self):
+        cache = TokenResultCache(max_entries=10, ttl_seconds=300)
+
+        cache.set("expired", ("a@a.com", "1"), exp=time.time() - 1)
+        cache.set("valid", ("b@b.com", "2"), exp=time.time() + 60)
+
+        self.assertIsNone(cache.get("expired"))
+        self.assertEqual(cache.get("valid"), ("b@b.com", "2"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TokenResultCache(max_entries=2, ttl_seconds=300)
+
+        cache.set("t1", "r1")
+        cache.set("t2", "r2")
+        cache.get("t1")
+        cache.set("t3", "r3")
+
+        self.assertEqual(cache.get("t1"), "r1")
+        self.assertIsNone(cache.get("t2"))
+        self.assertEqual(cache.get("t3"), "r3")
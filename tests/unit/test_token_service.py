@@ -1,8 +1,12 @@
+import os
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 import jwt
 from fastapi import HTTPException
+from application.services import token_service
 from application.services.token_service import TokenService
+from infrastructure.aws.credentials_provider import AWSCredentials
 import base64
 import json
 
@@ -10,6 +14,11 @@ import json
 class TestTokenService(unittest.TestCase):
 
     def setUp(self):
+        TokenService.clear_caches()
+        self.credentials = AWSCredentials("key", "secret")
+        provider_patcher = patch('application.services.token_service.get_credentials_provider')
+        provider_patcher.start().return_value.get_credentials_sync.side_effect = lambda: self.credentials
+        self.addCleanup(provider_patcher.stop)
         self.test_email = "test@example.com"
         self.valid_payload = {"email": self.test_email, "exp": 9999999999}
         self.expired_payload = {"email": self.test_email, "exp": 0}
@@ -21,7 +30,7 @@ class TestTokenService(unittest.TestCase):
         self.logger_mock = MagicMock()
 
     def _generate_mock_jwt(self, payload):
-        header = {"alg": "HS256", "typ": "JWT"}
+        header = {"alg": "HS256", "typ": "JWT", "kid": "kid-1"}
         header_encoded = base64.urlsafe_b64encode(json.dumps(header).encode()).decode().rstrip("=")
         payload_encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
         signature = base64.urlsafe_b64encode(b"signature").decode().rstrip("=")
@@ -173,11 +182,84 @@ class TestTokenService(unittest.TestCase):
         self.assertEqual(context.exception.status_code, 401)
         self.assertIn("Token inválido", context.exception.detail)
 
-    @patch('jwt.PyJWKClient.get_signing_key_from_jwt')
+    @patch('jwt.PyJWKClient.get_jwk_set')
     @patch('application.services.token_service.obter_user_pool_id')
-    def test_extract_signature_success(self, mock_obter_user_pool_id, mock_get_signing_key):
+    def test_extract_signature_success(self, mock_obter_user_pool_id, mock_get_jwk_set):
         mock_obter_user_pool_id.return_value = "user_pool_id"
-        mock_get_signing_key.return_value = "signing_key"
+        signing_key = MagicMock(key_id="kid-1")
+        mock_get_jwk_set.return_value = MagicMock(keys=[signing_key])
 
         result = TokenService.extract_signature(self.valid_token)
-        self.assertEqual(result, "signing_key")
+        self.assertEqual(result, signing_key)
+
+    @patch('jwt.PyJWKClient.get_jwk_set')
+    @patch('application.services.token_service.obter_user_pool_id')
+    def test_extract_signature_reuses_user_pool_and_jwks(self, mock_obter_user_pool_id, mock_get_jwk_set):
+        mock_obter_user_pool_id.return_value = "user_pool_id"
+        mock_get_jwk_set.return_value = MagicMock(keys=[MagicMock(key_id="kid-1")])
+
+        TokenService.extract_signature(self.valid_token)
+        TokenService.extract_signature(self.valid_token)
+
+        mock_obter_user_pool_id.assert_called_once()
+        mock_get_jwk_set.assert_called_once()
+
+    @patch('boto3.client')
+    @patch('jwt.decode')
+    def test_extract_user_email_from_cognito_is_cached(self, mock_decode, mock_boto_client):
+        mock_decode.return_value = {"client_id": "user-1", "exp": 9999999999}
+        mock_boto_client.return_value.get_user.return_value = {
+            'UserAttributes': [{'Name': 'email', 'Value': self.test_email}]
+        }
+
+        first = TokenService.extract_user_email_and_user_id(self.valid_token)
+        second = TokenService.extract_user_email_and_user_id(self.valid_token)
+
+        self.assertEqual(first, (self.test_email, "user-1"))
+        self.assertEqual(second, first)
+        mock_boto_client.assert_called_once()
+        mock_boto_client.return_value.get_user.assert_called_once()
+
+    @patch('boto3.client')
+    def test_cognito_client_uses_provider_credentials_and_is_replaced_on_rotation(self, mock_boto_client):
+        first = token_service.get_cognito_client()
+        self.assertIs(token_service.get_cognito_client(), first)
+        mock_boto_client.assert_called_once_with(
+            'cognito-idp', region_name=os.getenv("REGION_NAME"), aws_access_key_id="key", aws_secret_access_key="secret"
+        )
+
+        self.credentials = AWSCredentials("rotated-key", "rotated-secret")
+        token_service.get_cognito_client()
+
+        self.assertEqual(mock_boto_client.call_count, 2)
+        self.assertEqual(mock_boto_client.call_args.kwargs["aws_access_key_id"], "rotated-key")
+
+
+class TestTokenServiceAsync(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        TokenService.clear_caches()
+
+    @patch('application.services.token_service.TokenService.extract_user_email_and_user_id')
+    async def test_extract_async_runs_validation_off_the_event_loop(self, mock_extract):
+        caller_threads = []
+
+        def fake_extract(token):
+            caller_threads.append(threading.current_thread().name)
+            return "user@example.com", "user-1"
+
+        mock_extract.side_effect = fake_extract
+
+        result = await TokenService.extract_user_email_and_user_id_async("token")
+
+        self.assertEqual(result, ("user@example.com", "user-1"))
+        self.assertTrue(caller_threads[0].startswith("token-validation"))
+
+    @patch('application.services.token_service.TokenService.extract_user_email_and_user_id')
+    async def test_extract_async_returns_cached_result_without_validation(self, mock_extract):
+        token_service._token_results.set("token", ("user@example.com", "user-1"))
+
+        result = await TokenService.extract_user_email_and_user_id_async("token")
+
+        self.assertEqual(result, ("user@example.com", "user-1"))
+        mock_extract.assert_not_called()
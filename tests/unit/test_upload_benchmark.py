@@ -0,0 +1,38 @@
+import unittest
+
+from benchmarks.upload_benchmark import compare, percentile
+
+
+def scenario(**overrides):
+    result = {
+        "name": "files=1,size_mb=1,concurrency=1", "errors": 0, "requests_per_second": 100.0,
+        "mb_per_second": 100.0, "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "peak_rss_mb": 100.0
+    }
+    result.update(overrides)
+    return result
+
+
+class TestUploadBenchmark(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 51)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.95), 0.0)
+
+    def test_compare_accepts_variation_within_tolerance(self):
+        baseline = {"scenarios": [scenario()]}
+
+        self.assertEqual(compare([scenario(requests_per_second=80.0, p95_ms=24.0)], baseline, 0.25), [])
+
+    def test_compare_reports_throughput_and_latency_regressions(self):
+        baseline = {"scenarios": [scenario()]}
+
+        regressions = compare([scenario(mb_per_second=50.0, p99_ms=60.0, errors=1)], baseline, 0.25)
+
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(any("mb_per_second" in regression for regression in regressions))
+        self.assertTrue(any("p99_ms" in regression for regression in regressions))
+
+    def test_compare_ignores_scenarios_missing_from_baseline(self):
+        self.assertEqual(compare([scenario(name="novo")], {"scenarios": [scenario()]}, 0.25), [])
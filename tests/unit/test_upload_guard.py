@@ -0,0 +1,61 @@
+import base64
+import hashlib
+import unittest
+
+from adapters.api.upload_guard import _MultipartInspector
+
+BOUNDARY = b"limite"
+MP4_HEADER = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+
+
+def multipart_body(file_name: str, content: bytes) -> bytes:
+    return (
+        b"--" + BOUNDARY + b"\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="' + file_name.encode() + b'"\r\n'
+        b"Content-Type: video/mp4\r\n\r\n" + content + b"\r\n"
+        b"--" + BOUNDARY + b"--\r\n"
+    )
+
+
+def sha256_base64(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+class TestMultipartInspector(unittest.TestCase):
+
+    def inspect(self, content: bytes, checksum_part_size=None, chunk_size=7):
+        inspector = _MultipartInspector(BOUNDARY, 1024 * 1024, ["video/mp4"], checksum_part_size)
+        body = multipart_body("video.mp4", content)
+        for offset in range(0, len(body), chunk_size):
+            inspector.feed(body[offset:offset + chunk_size])
+        return inspector.files
+
+    def test_file_and_part_checksums_are_computed_in_one_pass(self):
+        content = MP4_HEADER + bytes(range(256)) * 2  # 536 bytes: partes de 200, 200 e 136
+        [received] = self.inspect(content, checksum_part_size=200)
+
+        self.assertEqual(received["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertEqual(received["part_sha256"], [
+            sha256_base64(content[:200]), sha256_base64(content[200:400]), sha256_base64(content[400:])
+        ])
+
+    def test_file_smaller_than_a_part_has_a_single_part_checksum(self):
+        content = MP4_HEADER + b"video"
+        [received] = self.inspect(content, checksum_part_size=200)
+
+        self.assertEqual(received["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertEqual(received["part_sha256"], [sha256_base64(content)])
+
+    def test_file_that_fills_whole_parts_has_no_empty_last_part(self):
+        content = MP4_HEADER + b"a" * (400 - len(MP4_HEADER))
+        [received] = self.inspect(content, checksum_part_size=200, chunk_size=200)
+
+        self.assertEqual(received["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertEqual(received["part_sha256"], [sha256_base64(content[:200]), sha256_base64(content[200:])])
+
+    def test_without_part_size_only_the_file_checksum_is_computed(self):
+        content = MP4_HEADER + b"video"
+        [received] = self.inspect(content)
+
+        self.assertEqual(received["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertIsNone(received["part_sha256"])
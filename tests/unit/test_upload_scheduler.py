@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+
+from application.services.upload_scheduler import UploadCapacityExceeded, UploadScheduler
+
+
+class TestUploadScheduler(unittest.IsolatedAsyncioTestCase):
+
+    def build_scheduler(self, **kwargs):
+        options = {"max_inflight_bytes": 100, "max_concurrent_transfers": 2, "queue_timeout": 0.05, "retry_after": 7}
+        options.update(kwargs)
+        return UploadScheduler(**options)
+
+    async def test_reserve_tracks_and_releases_capacity(self):
+        scheduler = self.build_scheduler()
+
+        async with scheduler.reserve(60, transfers=2):
+            self.assertEqual(scheduler.inflight_bytes, 60)
+            self.assertEqual(scheduler.active_transfers, 2)
+
+        self.assertEqual(scheduler.inflight_bytes, 0)
+        self.assertEqual(scheduler.active_transfers, 0)
+
+    async def test_saturated_scheduler_raises_with_retry_after(self):
+        scheduler = self.build_scheduler()
+
+        async with scheduler.reserve(80):
+            with self.assertRaises(UploadCapacityExceeded) as context:
+                async with scheduler.reserve(30):
+                    pass
+
+        self.assertEqual(context.exception.retry_after, 7)
+        self.assertEqual(scheduler.inflight_bytes, 0)
+
+    async def test_transfer_limit_is_enforced(self):
+        scheduler = self.build_scheduler()
+
+        async with scheduler.reserve(10, transfers=2):
+            with self.assertRaises(UploadCapacityExceeded):
+                async with scheduler.reserve(10):
+                    pass
+
+    async def test_queued_request_runs_when_capacity_is_released(self):
+        scheduler = self.build_scheduler(queue_timeout=1)
+        order = []
+
+        async def first():
+            async with scheduler.reserve(100):
+                order.append("first")
+                await asyncio.sleep(0.01)
+
+        async def second():
+            await asyncio.sleep(0)
+            async with scheduler.reserve(50):
+                order.append("second")
+
+        await asyncio.gather(first(), second())
+
+        self.assertEqual(order, ["first", "second"])
+
+    async def test_oversized_request_is_capped_to_the_limit(self):
+        scheduler = self.build_scheduler()
+
+        async with scheduler.reserve(1000, transfers=5):
+            self.assertEqual(scheduler.inflight_bytes, 100)
+            self.assertEqual(scheduler.active_transfers, 2)
@@ -1,7 +1,10 @@
+import io
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi import HTTPException, UploadFile
 from application.use_cases.upload_video import UploadVideoUseCase
+from application.services.upload_scheduler import UploadScheduler
 from adapters.repository.s3_repository import S3Repository
 from adapters.repository.db_repository import DBRepository
 
@@ -13,6 +16,7 @@ class TestUploadVideoUseCase:
     def setup_use_case(self):
         s3_repo = AsyncMock(spec=S3Repository)
         db_repo = AsyncMock(spec=DBRepository)
+        db_repo.register_videos.return_value = []
         use_case = UploadVideoUseCase(s3_repo=s3_repo, db_repo=db_repo)
         return use_case, s3_repo, db_repo
 
@@ -27,7 +31,8 @@ class TestUploadVideoUseCase:
             file = MagicMock(spec=UploadFile)
             file.filename = filename
             file.content_type = content_type
-            file.read = AsyncMock(return_value=b"a" * size)
+            file.size = size
+            file.read = AsyncMock(side_effect=io.BytesIO(b"a" * size).read)
             return file
         return create_mocked_file
 
@@ -40,7 +45,7 @@ class TestUploadVideoUseCase:
 
         assert response[0]["status"] == "Sucesso"
         s3_repo.upload_video.assert_called_once()
-        db_repo.register_video.assert_called_once()
+        db_repo.register_videos.assert_called_once()
 
     async def test_execute_no_email_in_token(self, setup_use_case, mock_token_service, mock_upload_file):
         use_case, _, _ = setup_use_case
@@ -117,12 +122,35 @@ class TestUploadVideoUseCase:
         use_case, _, db_repo = setup_use_case
         mock_token_service.return_value = ("user@example.com", "12345")
         file = mock_upload_file("video.mp4", "video/mp4", 10 * 1024 * 1024)
-        db_repo.register_video.side_effect = Exception("DB register failed")
+        db_repo.register_videos.side_effect = Exception("DB register failed")
 
         response = await use_case.execute([file], token="mock_token")
 
         assert "Erro: DB register failed" in response[0]["status"]
 
+    async def test_execute_registers_all_videos_in_one_batch(self, setup_use_case, mock_token_service, mock_upload_file):
+        use_case, s3_repo, db_repo = setup_use_case
+        mock_token_service.return_value = ("user@example.com", "12345")
+        files = [mock_upload_file(f"video_{i}.mp4", "video/mp4", 1024) for i in range(3)]
+
+        response = await use_case.execute(files, token="mock_token")
+
+        assert [item["status"] for item in response] == ["Sucesso"] * 3
+        db_repo.register_videos.assert_awaited_once()
+        assert len(db_repo.register_videos.call_args.args[0]) == 3
+        db_repo.register_video.assert_not_called()
+
+    async def test_execute_marks_unprocessed_registration_as_error(self, setup_use_case, mock_token_service, mock_upload_file):
+        use_case, _, db_repo = setup_use_case
+        mock_token_service.return_value = ("user@example.com", "12345")
+        files = [mock_upload_file(f"video_{i}.mp4", "video/mp4", 1024) for i in range(2)]
+        db_repo.register_videos.side_effect = lambda videos: [videos[1]]
+
+        response = await use_case.execute(files, token="mock_token")
+
+        assert response[0]["status"] == "Sucesso"
+        assert response[1]["status"] == "Erro: Registro não processado pelo DynamoDB"
+
     async def test_execute_general_exception(self, setup_use_case, mock_token_service):
         use_case, _, _ = setup_use_case
         mock_token_service.side_effect = Exception("General error")
@@ -131,4 +159,135 @@ class TestUploadVideoUseCase:
             await use_case.execute([], token="mock_token")
 
         assert exc.value.status_code == 500
-        assert "General error" in exc.value.detail
\ No newline at end of file
+        assert "General error" in exc.value.detail
+    async def test_execute_duplicate_name_is_rejected_before_upload(self, setup_use_case, mock_token_service, mock_upload_file):
+        use_case, s3_repo, db_repo = setup_use_case
+        mock_token_service.return_value = ("user@example.com", "12345")
+        file = mock_upload_file("video.mp4", "video/mp4", 1024)
+        db_repo.reserve_video_name.side_effect = ValueError("O vídeo 'video.mp4' já está carregado.")
+
+        response = await use_case.execute([file], token="mock_token")
+
+        assert "já está carregado" in response[0]["status"]
+        s3_repo.upload_video.assert_not_called()
+
+    async def test_execute_releases_reservation_when_upload_fails(self, setup_use_case, mock_token_service, mock_upload_file):
+        use_case, s3_repo, db_repo = setup_use_case
+        mock_token_service.return_value = ("user@example.com", "12345")
+        file = mock_upload_file("video.mp4", "video/mp4", 1024)
+        s3_repo.upload_video.side_effect = Exception("S3 upload failed")
+
+        await use_case.execute([file], token="mock_token")
+
+        db_repo.reserve_video_name.assert_awaited_once_with("12345", "video.mp4", expires_at=None)
+        db_repo.release_video_name.assert_awaited_once_with("12345", "video.mp4")
+
+    async def test_execute_returns_429_when_upload_capacity_is_exhausted(self, mock_token_service, mock_upload_file):
+        s3_repo = AsyncMock(spec=S3Repository)
+        db_repo = AsyncMock(spec=DBRepository)
+        scheduler = UploadScheduler(max_inflight_bytes=1024, max_concurrent_transfers=1, queue_timeout=0, retry_after=3)
+        use_case = UploadVideoUseCase(s3_repo=s3_repo, db_repo=db_repo, scheduler=scheduler)
+        mock_token_service.return_value = ("user@example.com", "12345")
+        file = mock_upload_file("video.mp4", "video/mp4", 1024)
+
+        async with scheduler.reserve(1024):
+            with pytest.raises(HTTPException) as exc:
+                await use_case.execute([file], token="mock_token")
+
+        assert exc.value.status_code == 429
+        assert exc.value.headers == {"Retry-After": "3"}
+        db_repo.reserve_video_name.assert_not_called()
+
+    async def test_execute_skips_upload_of_content_already_sent_under_another_name(
+            self, setup_use_case, mock_token_service, mock_upload_file):
+        use_case, s3_repo, db_repo = setup_use_case
+        mock_token_service.return_value = ("user@example.com", "12345")
+        db_repo.reserve_content.side_effect = ValueError("Conteúdo idêntico ao vídeo 'original.mp4' já carregado.")
+        file = mock_upload_file("copia.mp4", "video/mp4", 1024)
+
+        response = await use_case.execute([file], token="mock_token", checksums=["abc"])
+
+        assert "original.mp4" in response[0]["status"]
+        s3_repo.upload_video.assert_not_called()
+        db_repo.reserve_content.assert_awaited_once_with("12345", "abc", "copia.mp4", expires_at=None)
+        db_repo.release_video_name.assert_awaited_once_with("12345", "copia.mp4")
+
+    async def test_execute_stores_checksum_and_releases_it_when_upload_fails(
+            self, setup_use_case, mock_token_service, mock_upload_file):
+        use_case, s3_repo, db_repo = setup_use_case
+        mock_token_service.return_value = ("user@example.com", "12345")
+        s3_repo.upload_video.side_effect = Exception("S3 upload failed")
+        file = mock_upload_file("video.mp4", "video/mp4", 1024)
+
+        await use_case.execute([file], token="mock_token", checksums=["abc"])
+
+        assert s3_repo.upload_video.await_args.args[0].checksum_sha256 == "abc"
+        db_repo.release_content.assert_awaited_once_with("12345", "abc")
+
+    async def test_content_addressed_storage_skips_transfer_of_existing_blob(self, mock_token_service, mock_upload_file):
+        s3_repo = AsyncMock(spec=S3Repository)
+        s3_repo.build_blob_key = S3Repository.build_blob_key
+        db_repo = AsyncMock(spec=DBRepository)
+        db_repo.register_videos.return_value = []
+        db_repo.acquire_blob.return_value = True
+        use_case = UploadVideoUseCase(s3_repo=s3_repo, db_repo=db_repo, content_addressed=True)
+        mock_token_service.return_value = ("user@example.com", "12345")
+        file = mock_upload_file("video.mp4", "video/mp4", 1024)
+
+        response = await use_case.execute([file], token="mock_token", checksums=["ab" * 32])
+
+        assert response[0]["status"] == "Sucesso"
+        s3_repo.upload_video.assert_not_called()
+        db_repo.acquire_blob.assert_awaited_once_with("ab" * 32, f"blobs/ab/{'ab' * 32}")
+        registered_video = db_repo.register_videos.await_args.args[0][0]
+        assert registered_video.path_s3 == f"blobs/ab/{'ab' * 32}"
+
+    async def test_content_addressed_storage_uploads_new_blob_once(self, mock_token_service, mock_upload_file):
+        s3_repo = AsyncMock(spec=S3Repository)
+        s3_repo.build_blob_key = S3Repository.build_blob_key
+        db_repo = AsyncMock(spec=DBRepository)
+        db_repo.register_videos.return_value = []
+        db_repo.acquire_blob.return_value = False
+        use_case = UploadVideoUseCase(s3_repo=s3_repo, db_repo=db_repo, content_addressed=True)
+        mock_token_service.return_value = ("user@example.com", "12345")
+        file = mock_upload_file("video.mp4", "video/mp4", 1024)
+
+        await use_case.execute([file], token="mock_token", checksums=["ab" * 32])
+
+        s3_repo.upload_video.assert_awaited_once()
+        assert s3_repo.upload_video.await_args.args[0].path_s3 == f"blobs/ab/{'ab' * 32}"
+        db_repo.mark_blob_available.assert_awaited_once_with("ab" * 32)
+        db_repo.release_blob.assert_not_called()
+
+    async def test_failed_blob_upload_deletes_unreferenced_blob(self, mock_token_service, mock_upload_file):
+        s3_repo = AsyncMock(spec=S3Repository)
+        s3_repo.build_blob_key = S3Repository.build_blob_key
+        s3_repo.upload_video.side_effect = Exception("S3 indisponível")
+        db_repo = AsyncMock(spec=DBRepository)
+        db_repo.acquire_blob.return_value = False
+        db_repo.release_blob.return_value = f"blobs/ab/{'ab' * 32}"
+        use_case = UploadVideoUseCase(s3_repo=s3_repo, db_repo=db_repo, content_addressed=True)
+        mock_token_service.return_value = ("user@example.com", "12345")
+        file = mock_upload_file("video.mp4", "video/mp4", 1024)
+
+        response = await use_case.execute([file], token="mock_token", checksums=["ab" * 32])
+
+        assert response[0]["status"].startswith("Erro")
+        s3_repo.delete_video.assert_awaited_once_with(f"blobs/ab/{'ab' * 32}")
+        db_repo.delete_blob.assert_awaited_once_with("ab" * 32)
+
+    async def test_released_blob_with_other_references_is_kept(self, mock_token_service, mock_upload_file):
+        s3_repo = AsyncMock(spec=S3Repository)
+        s3_repo.build_blob_key = S3Repository.build_blob_key
+        s3_repo.upload_video.side_effect = Exception("S3 indisponível")
+        db_repo = AsyncMock(spec=DBRepository)
+        db_repo.acquire_blob.return_value = False
+        db_repo.release_blob.return_value = None
+        use_case = UploadVideoUseCase(s3_repo=s3_repo, db_repo=db_repo, content_addressed=True)
+        mock_token_service.return_value = ("user@example.com", "12345")
+        file = mock_upload_file("video.mp4", "video/mp4", 1024)
+
+        await use_case.execute([file], token="mock_token", checksums=["ab" * 32])
+
+        s3_repo.delete_video.assert_not_called()
+        db_repo.delete_blob.assert_not_called()
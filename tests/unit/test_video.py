@@ -0,0 +1,72 @@
+import dataclasses
+import io
+import os
+import tempfile
+import unittest
+
+from domain.entities.video import Video, VideoPayload
+
+
+def make_video(**changes):
+    fields = {"file_name": "video.mp4", "file_size": 10, "user_email": "a@a.com", "user_id": "user-1"}
+    return Video(**{**fields, **changes})
+
+
+class TestVideo(unittest.TestCase):
+
+    def test_is_immutable_and_slotted(self):
+        video = make_video()
+
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            video.path_s3 = "outra/chave"
+        self.assertFalse(hasattr(video, "__dict__"))
+
+    def test_with_changes_returns_copy(self):
+        video = make_video()
+
+        moved = video.with_changes(path_s3="blobs/ab/abab")
+
+        self.assertEqual(video.path_s3, "")
+        self.assertEqual(moved.path_s3, "blobs/ab/abab")
+        self.assertEqual(moved.video_id, video.video_id)
+
+    def test_payload_is_left_out_of_repr_and_comparison(self):
+        video = make_video(payload=VideoPayload.from_stream(io.BytesIO(b"segredo")))
+
+        self.assertNotIn("payload", repr(video))
+        self.assertEqual(video, video.with_changes(payload=None))
+
+    def test_to_dynamo_item(self):
+        video = make_video(path_s3="user-1/video.mp4", checksum_sha256="ab" * 32)
+
+        item = video.to_dynamo_item("PENDENTE_PROCESSAMENTO")
+
+        self.assertEqual(item["id"], video.video_id)
+        self.assertEqual(item["ID_USUARIO"], "user-1")
+        self.assertEqual(item["EMAIL"], "a@a.com")
+        self.assertEqual(item["STATUS_PROCESSAMENTO"], "PENDENTE_PROCESSAMENTO")
+        self.assertEqual(item["NOME_VIDEO"], "video.mp4")
+        self.assertEqual(item["PATH_S3"], "user-1/video.mp4")
+        self.assertEqual(item["CHECKSUM_SHA256"], "ab" * 32)
+        self.assertNotIn("CHECKSUM_SHA256", make_video().to_dynamo_item("PENDENTE_PROCESSAMENTO"))
+
+
+class TestVideoPayload(unittest.TestCase):
+
+    def test_stream_is_not_closed_after_use(self):
+        stream = io.BytesIO(b"video")
+
+        with VideoPayload.from_stream(stream).open() as opened:
+            self.assertIs(opened, stream)
+        self.assertFalse(stream.closed)
+
+    def test_path_is_opened_only_on_use_and_reopened_each_time(self):
+        with tempfile.NamedTemporaryFile(delete=False) as spool:
+            spool.write(b"video")
+        self.addCleanup(os.remove, spool.name)
+        payload = VideoPayload.from_path(spool.name)
+
+        for _ in range(2):
+            with payload.open() as stream:
+                self.assertEqual(stream.read(), b"video")
+            self.assertTrue(stream.closed)
@@ -0,0 +1,29 @@
+import unittest
+
+from application.services.video_validation import sniff_video_container, matches_content_type
+
+
+class TestVideoValidation(unittest.TestCase):
+
+    def test_sniff_mp4_ftyp(self):
+        self.assertEqual(sniff_video_container(b"\x00\x00\x00\x18ftypisom"), "bmff")
+
+    def test_sniff_quicktime_moov_atom(self):
+        self.assertEqual(sniff_video_container(b"\x00\x00\x00\x08moov"), "bmff")
+
+    def test_sniff_mpeg_pack_header(self):
+        self.assertEqual(sniff_video_container(b"\x00\x00\x01\xba\x44\x00"), "mpeg")
+
+    def test_sniff_mpeg_transport_stream(self):
+        packet = b"\x47" + b"\x00" * 187
+        self.assertEqual(sniff_video_container(packet + packet[:1]), "mpeg")
+        self.assertIsNone(sniff_video_container(packet + b"\x00"))
+
+    def test_sniff_unknown_content(self):
+        self.assertIsNone(sniff_video_container(b"GIF89a......"))
+
+    def test_matches_content_type(self):
+        self.assertTrue(matches_content_type("video/mp4", b"\x00\x00\x00\x18ftypmp42"))
+        self.assertTrue(matches_content_type("video/quicktime", b"\x00\x00\x00\x14ftypqt  "))
+        self.assertFalse(matches_content_type("video/mpeg", b"\x00\x00\x00\x18ftypmp42"))
+        self.assertFalse(matches_content_type("video/avi", b"RIFF\x00\x00\x00\x00AVI "))